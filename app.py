@@ -1,541 +1,30 @@
+import math
+import time
 import streamlit as st
-import requests
-import feedparser
 import pandas as pd
-from bs4 import BeautifulSoup
+from contextlib import ExitStack
 from datetime import datetime, timedelta
-import re
-import time
-import json
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from openai import OpenAI
-
-st.set_page_config(page_title="Búsqueda Ayudas BOJA/BOE con IA", layout="wide", page_icon="🔍")
-
-# ============= CONFIGURACIÓN =============
-
-def crear_session():
-    session = requests.Session()
-    
-    retry_strategy = Retry(
-        total=3,
-        backoff_factor=1,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET", "POST"]
-    )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    
-    session.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
-        "Connection": "keep-alive",
-    })
-    
-    return session
-
-session = crear_session()
-
-# ============= SINÓNIMOS PARA BÚSQUEDA =============
-
-SINONIMOS = {
-    'feder': ['feder', 'fondos europeos', 'fondos europeo', 'desarrollo regional', 'union europea'],
-    'feader': ['feader', 'desarrollo rural', 'agricultura'],
-    'pyme': ['pyme', 'pequeña empresa', 'mediana empresa', 'autonomo', 'autónomo'],
-    'turismo': ['turismo', 'hosteleria', 'hostelería', 'restauracion', 'restauración'],
-}
-
-def expandir_palabras_clave(palabras):
-    """Expande palabras clave con sinónimos"""
-    expandidas = []
-    for palabra in palabras:
-        palabra_lower = palabra.lower().strip()
-        if palabra_lower in SINONIMOS:
-            expandidas.extend(SINONIMOS[palabra_lower])
-        else:
-            expandidas.append(palabra_lower)
-    return list(set(expandidas))
-
-# ============= EXTRACCIÓN DE INFORMACIÓN =============
 
-def extraer_informacion_documento(titulo, resumen, contenido, palabras_clave):
-    texto_completo = f"{titulo} {resumen} {contenido}".lower()
-    
-    info = {
-        'tipo_documento': '',
-        'organismo': '',
-        'cuantia': '',
-        'plazo_solicitud': '',
-        'beneficiarios': '',
-        'objeto': '',
-        'contexto_palabras': []
-    }
-    
-    if re.search(r'\b(resolución|resolucion)\b', texto_completo):
-        info['tipo_documento'] = 'Resolución'
-    elif re.search(r'\b(orden)\b', texto_completo):
-        info['tipo_documento'] = 'Orden'
-    elif re.search(r'\b(decreto)\b', texto_completo):
-        info['tipo_documento'] = 'Decreto'
-    elif re.search(r'\b(convocatoria)\b', texto_completo):
-        info['tipo_documento'] = 'Convocatoria'
-    
-    organismos = [
-        r'Consejería de [A-Za-záéíóúñÑ\s,]+',
-        r'Dirección General de [A-Za-záéíóúñÑ\s,]+',
-        r'Agencia [A-Za-záéíóúñÑ\s,]+',
-    ]
-    
-    for patron in organismos:
-        match = re.search(patron, texto_completo, re.IGNORECASE)
-        if match:
-            info['organismo'] = match.group(0).strip()
-            break
-    
-    match = re.search(r'(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s*euros?', texto_completo, re.IGNORECASE)
-    if match:
-        info['cuantia'] = match.group(0).strip()
-    
-    match = re.search(r'plazo\s+de\s+(?:presentación\s+de\s+)?solicitudes?[:\s]+([^.]{10,80})', texto_completo, re.IGNORECASE)
-    if match:
-        info['plazo_solicitud'] = match.group(0).strip()
-    
-    # Buscar contexto de palabras expandidas
-    palabras_expandidas = expandir_palabras_clave(palabras_clave)
-    
-    for palabra_original in palabras_clave:
-        encontrada = False
-        for palabra in expandir_palabras_clave([palabra_original]):
-            if palabra in texto_completo:
-                idx = texto_completo.find(palabra)
-                if idx != -1:
-                    inicio = max(0, idx - 150)
-                    fin = min(len(contenido) if contenido else len(texto_completo), idx + len(palabra) + 150)
-                    contexto = contenido[inicio:fin] if contenido else texto_completo[inicio:fin]
-                    
-                    info['contexto_palabras'].append({
-                        'palabra': palabra_original,
-                        'encontrado_como': palabra,
-                        'contexto': f"...{contexto}..."
-                    })
-                    encontrada = True
-                    break
-        
-        if not encontrada:
-            info['contexto_palabras'].append({
-                'palabra': palabra_original,
-                'encontrado_como': 'No encontrada',
-                'contexto': ''
-            })
-    
-    return info
-
-# ============= IA =============
-
-def resumir_con_openai(texto, api_key, modelo="gpt-4o-mini"):
-    try:
-        client = OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model=modelo,
-            messages=[
-                {"role": "system", "content": "Eres experto en ayudas españolas."},
-                {"role": "user", "content": f"Resume esta ayuda en JSON con: tipo, beneficiarios, cuantia, plazo, resumen:\n{texto[:8000]}"}
-            ],
-            temperature=0.2,
-            max_tokens=600,
-            response_format={"type": "json_object"}
-        )
-        return json.loads(response.choices[0].message.content)
-    except:
-        return {}
+from boletines import avisos
+from boletines.alertas import consultas_guardadas, guardar_consulta
+from boletines.busqueda import buscar_y_filtrar_progresivo, reunir_resultados
+from boletines.config import IA_MAX_CARACTERES, MAX_DESCARGAS, MAX_POR_HOST
+from boletines.extraccion import extraer_informacion_documentos
+from boletines.filtrado import POLITICAS_PREFILTRO
+from boletines.ia import resumir_documentos
+from boletines.indices import indice_documentos
+from boletines.ingesta import cobertura
+from boletines.metricas import ETAPAS, etapa, metricas, perfilar
+from boletines.ranking import indexar, ordenar_por_relevancia
+from boletines.red import configurar_descargas, estadisticas_cache
+
+RESULTADOS_POR_PAGINA = 20
+REFRESCO_PARCIALES = 0.5
 
-def busqueda_inteligente_openai(consulta, api_key, modelo="gpt-4o-mini"):
-    try:
-        client = OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model=modelo,
-            messages=[
-                {"role": "system", "content": "Convierte consultas a palabras clave."},
-                {"role": "user", "content": f"Palabras clave para buscar en BOE/BOJA: {consulta}"}
-            ],
-            temperature=0.3,
-            max_tokens=100
-        )
-        return response.choices[0].message.content.strip()
-    except:
-        return consulta
-
-# ============= BÚSQUEDA =============
-
-def extraer_contenido_completo(url, max_intentos=2):
-    for intento in range(max_intentos):
-        try:
-            response = session.get(url, timeout=20)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            for element in soup(["script", "style", "nav", "header", "footer"]):
-                element.decompose()
-            contenido = soup.get_text(separator=' ', strip=True)
-            return contenido if contenido else ""
-        except:
-            if intento < max_intentos - 1:
-                time.sleep(0.5)
-    return ""
-
-def buscar_boja_feed(contenido_completo=False):
-    resultados = []
-    try:
-        response = session.get("https://www.juntadeandalucia.es/boja/distribucion/boja.xml", timeout=20)
-        feed = feedparser.parse(response.content)
-        
-        for entry in feed.entries:
-            titulo = entry.get('title', '')
-            enlace = entry.get('link', '')
-            
-            if any(x in enlace for x in ['/temas/', '/organismos/']) or '/boja/' not in enlace:
-                continue
-            
-            fecha = pd.to_datetime(entry.get('published', ''), errors='coerce', utc=True)
-            if pd.notna(fecha):
-                fecha = fecha.tz_localize(None)
-            
-            resultados.append({
-                'Boletín': 'BOJA',
-                'Título': titulo,
-                'Resumen': BeautifulSoup(entry.get('summary', ''), 'html.parser').get_text()[:300],
-                'Contenido_Completo': extraer_contenido_completo(enlace) if contenido_completo else "",
-                'Enlace': enlace,
-                'Fecha': fecha
-            })
-    except:
-        pass
-    return resultados
-
-def buscar_boe_rss(contenido_completo=False):
-    resultados = []
-    try:
-        response = session.get("https://www.boe.es/rss/boe.php", timeout=20)
-        feed = feedparser.parse(response.content)
-        
-        for entry in feed.entries:
-            fecha = pd.to_datetime(entry.get('published', ''), errors='coerce', utc=True)
-            if pd.notna(fecha):
-                fecha = fecha.tz_localize(None)
-            
-            resultados.append({
-                'Boletín': 'BOE',
-                'Título': entry.get('title', ''),
-                'Resumen': BeautifulSoup(entry.get('summary', ''), 'html.parser').get_text()[:300],
-                'Contenido_Completo': "",
-                'Enlace': entry.get('link', ''),
-                'Fecha': fecha
-            })
-    except:
-        pass
-    return resultados
-
-# ============= BOJA HISTÓRICO =============
-
-def extraer_secciones_boja(url_boletin):
-    secciones = []
-    try:
-        response = session.get(url_boletin, timeout=15)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            for enlace in soup.find_all('a', href=True):
-                href = enlace['href']
-                if re.search(r'/s\d+', href):
-                    url = f"https://www.juntadeandalucia.es{href}" if href.startswith('/') else href
-                    secciones.append({'titulo': enlace.get_text(strip=True), 'url': url})
-            return list({s['url']: s for s in secciones}.values())
-    except:
-        pass
-    return []
-
-def extraer_documentos_de_seccion(url_seccion):
-    documentos = []
-    try:
-        response = session.get(url_seccion, timeout=15)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            for enlace in soup.find_all('a', href=True):
-                href = enlace['href']
-                titulo = enlace.get_text(strip=True)
-                if re.search(r'/\d+$', href) and '/s' not in href and len(titulo) > 10:
-                    url = f"https://www.juntadeandalucia.es{href}" if href.startswith('/') else href
-                    documentos.append({'titulo': titulo, 'url': url})
-            return list({d['url']: d for d in documentos}.values())
-    except:
-        pass
-    return []
-
-def buscar_en_boletin_completo(año, num_boletin, fecha_publicacion, contenido_completo=False, progress_container=None):
-    resultados = []
-    
-    urls_boletin = [
-        f"https://www.juntadeandalucia.es/boja/{año}/{str(num_boletin).zfill(3)}/",
-        f"https://www.juntadeandalucia.es/eboja/{año}/{str(num_boletin).zfill(3)}/",
-    ]
-    
-    url_valida = None
-    for url in urls_boletin:
-        try:
-            response = session.get(url, timeout=10)
-            if response.status_code == 200:
-                url_valida = url
-                break
-        except:
-            continue
-    
-    if not url_valida:
-        return []
-    
-    secciones = extraer_secciones_boja(url_valida)
-    
-    if len(secciones) > 0:
-        for seccion in secciones:
-            documentos = extraer_documentos_de_seccion(seccion['url'])
-            
-            for idx, doc in enumerate(documentos):
-                if progress_container:
-                    progress_container.text(f"    📄 {idx+1}/{len(documentos)}: {doc['titulo'][:40]}...")
-                
-                texto = extraer_contenido_completo(doc['url']) if contenido_completo else ""
-                
-                resultados.append({
-                    'Boletín': 'BOJA',
-                    'Título': doc['titulo'],
-                    'Resumen': f"BOJA {num_boletin}/{año} - {seccion['titulo']}",
-                    'Contenido_Completo': texto,
-                    'Enlace': doc['url'],
-                    'Fecha': fecha_publicacion,
-                    'Seccion': seccion['titulo'],
-                    'Numero_Boletin': num_boletin,
-                    'Tiene_Contenido': len(texto) > 0
-                })
-            
-            time.sleep(0.1)
-    
-    return resultados
-
-def encontrar_boletin_por_fecha(año, fecha_buscar, contenido_completo=False, progress_detail=None):
-    meses = ['enero','febrero','marzo','abril','mayo','junio','julio','agosto','septiembre','octubre','noviembre','diciembre']
-    
-    mes = fecha_buscar.month
-    dia = fecha_buscar.day
-    
-    dia_año = fecha_buscar.timetuple().tm_yday
-    dias_habiles = int(dia_año * (5/7))
-    num_estimado = int(dias_habiles * 0.85)
-    
-    if progress_detail:
-        progress_detail.text(f"    🎯 Estimación: BOJA {num_estimado}")
-    
-    for offset in range(-50, 51):
-        num_boletin = max(1, min(250, num_estimado + offset))
-        
-        if offset % 10 == 0 and progress_detail:
-            progress_detail.text(f"    🔍 Probando BOJA {num_boletin}...")
-        
-        urls = [
-            f"https://www.juntadeandalucia.es/boja/{año}/{str(num_boletin).zfill(3)}/",
-            f"https://www.juntadeandalucia.es/eboja/{año}/{str(num_boletin).zfill(3)}/",
-        ]
-        
-        for url in urls:
-            try:
-                response = session.get(url, timeout=8)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    texto = soup.get_text().lower()
-                    
-                    formatos_fecha = [
-                        fecha_buscar.strftime('%d/%m/%Y'),
-                        f"{dia} de {meses[mes-1]} de {año}",
-                        f"{dia}/{mes}/{año}",
-                    ]
-                    
-                    if any(f.lower() in texto for f in formatos_fecha):
-                        if progress_detail:
-                            progress_detail.text(f"    ✅ ENCONTRADO! BOJA {num_boletin}")
-                        
-                        return buscar_en_boletin_completo(año, num_boletin, pd.to_datetime(fecha_buscar), contenido_completo, progress_detail)
-                
-                time.sleep(0.05)
-            except:
-                continue
-    
-    # Búsqueda exhaustiva mes completo
-    if progress_detail:
-        progress_detail.text(f"    ⚠️ Probando TODO el mes {meses[mes-1]}...")
-    
-    rangos_mes = {
-        1: (1, 20), 2: (21, 40), 3: (41, 60), 4: (61, 80),
-        5: (81, 100), 6: (101, 120), 7: (121, 140), 8: (141, 160),
-        9: (161, 180), 10: (181, 200), 11: (201, 220), 12: (221, 240)
-    }
-    
-    inicio, fin = rangos_mes.get(mes, (1, 250))
-    
-    for num_boletin in range(inicio, fin + 1):
-        urls = [
-            f"https://www.juntadeandalucia.es/boja/{año}/{str(num_boletin).zfill(3)}/",
-            f"https://www.juntadeandalucia.es/eboja/{año}/{str(num_boletin).zfill(3)}/",
-        ]
-        
-        for url in urls:
-            try:
-                response = session.get(url, timeout=8)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    texto = soup.get_text().lower()
-                    
-                    formatos_fecha = [
-                        fecha_buscar.strftime('%d/%m/%Y'),
-                        f"{dia} de {meses[mes-1]} de {año}",
-                    ]
-                    
-                    if any(f.lower() in texto for f in formatos_fecha):
-                        if progress_detail:
-                            progress_detail.text(f"    ✅ ENCONTRADO! BOJA {num_boletin}")
-                        
-                        return buscar_en_boletin_completo(año, num_boletin, pd.to_datetime(fecha_buscar), contenido_completo, progress_detail)
-                
-                time.sleep(0.05)
-            except:
-                continue
-    
-    return []
-
-def buscar_boja_historico(fecha_inicio, fecha_fin, contenido_completo=False):
-    dias_antiguedad = (datetime.now() - fecha_fin).days
-    
-    if dias_antiguedad <= 30:
-        st.info("🔍 Fechas recientes (RSS)")
-        return buscar_boja_feed_filtrado_por_fechas(fecha_inicio, fecha_fin, contenido_completo)
-    else:
-        st.info(f"🔍 Búsqueda exhaustiva ({dias_antiguedad} días)")
-        return buscar_boja_historico_exhaustivo(fecha_inicio, fecha_fin, contenido_completo)
-
-def buscar_boja_feed_filtrado_por_fechas(fecha_inicio, fecha_fin, contenido_completo=False):
-    resultados = buscar_boja_feed(contenido_completo=False)
-    if not resultados:
-        return []
-    
-    df = pd.DataFrame(resultados)
-    if 'Fecha' in df.columns:
-        mascara = (df['Fecha'] >= pd.to_datetime(fecha_inicio)) & (df['Fecha'] <= pd.to_datetime(fecha_fin))
-        df = df[mascara]
-    
-    resultados = df.to_dict('records')
-    
-    if contenido_completo:
-        for r in resultados:
-            if r['Enlace']:
-                r['Contenido_Completo'] = extraer_contenido_completo(r['Enlace'])
-    
-    return resultados
-
-def buscar_boja_historico_exhaustivo(fecha_inicio, fecha_fin, contenido_completo=False):
-    resultados = []
-    fecha_actual = fecha_inicio
-    
-    progress_text = st.empty()
-    progress_detail = st.empty()
-    progress_bar = st.progress(0)
-    
-    total_dias = (fecha_fin - fecha_actual).days + 1
-    dia_actual = 0
-    
-    st.info("🔄 Búsqueda exhaustiva...")
-    
-    if contenido_completo:
-        st.warning("⚠️ DESCARGA ACTIVADA")
-    
-    while fecha_actual <= fecha_fin:
-        progress_bar.progress(dia_actual / total_dias)
-        progress_text.text(f"📅 {fecha_actual.strftime('%d/%m/%Y')} ({dia_actual+1}/{total_dias})")
-        
-        año = fecha_actual.year
-        
-        docs_encontrados = encontrar_boletin_por_fecha(año, fecha_actual, contenido_completo, progress_detail)
-        
-        if docs_encontrados:
-            con_contenido = sum(1 for d in docs_encontrados if d.get('Tiene_Contenido', False))
-            resultados.extend(docs_encontrados)
-            
-            if contenido_completo:
-                st.success(f"✅ {fecha_actual.strftime('%d/%m/%Y')}: {len(docs_encontrados)} docs ({con_contenido} con contenido)")
-            else:
-                st.success(f"✅ {fecha_actual.strftime('%d/%m/%Y')}: {len(docs_encontrados)} docs")
-        else:
-            st.warning(f"⚠️ {fecha_actual.strftime('%d/%m/%Y')}: No encontrado")
-        
-        fecha_actual += timedelta(days=1)
-        dia_actual += 1
-        time.sleep(0.1)
-    
-    progress_bar.empty()
-    progress_text.empty()
-    progress_detail.empty()
-    
-    if resultados:
-        con_contenido = sum(1 for d in resultados if d.get('Tiene_Contenido', False))
-        st.success(f"✅ Completado: {len(resultados)} docs ({con_contenido} con contenido)")
-    else:
-        st.error("❌ No se encontraron documentos")
-    
-    return resultados
-
-# ============= FILTRADO CON SINÓNIMOS =============
+st.set_page_config(page_title="Búsqueda Ayudas BOJA/BOE con IA", layout="wide", page_icon="🔍")
 
-def filtrar_resultados(df, palabras_clave, solo_ayudas=True, busqueda_exacta=False):
-    if df.empty:
-        return df
-    
-    if 'Contenido_Completo' in df.columns:
-        df['_texto'] = df['Título'].fillna('').astype(str) + ' ' + df['Resumen'].fillna('').astype(str) + ' ' + df['Contenido_Completo'].fillna('').astype(str)
-    else:
-        df['_texto'] = df['Título'].fillna('').astype(str) + ' ' + df['Resumen'].fillna('').astype(str)
-    
-    if 'Tiene_Contenido' in df.columns:
-        st.info(f"📊 {len(df)} docs, {df['Tiene_Contenido'].sum()} con contenido")
-    
-    if solo_ayudas:
-        patron = r'\b(ayuda|ayudas|subvención|subvencion|subvenciones|convocatoria|convocatorias)\b'
-        df = df[df['_texto'].str.contains(patron, case=False, regex=True, na=False)]
-        st.info(f"📊 Filtro ayudas: {len(df)} docs")
-    
-    if palabras_clave:
-        # Expandir palabras con sinónimos
-        palabras_expandidas = expandir_palabras_clave(palabras_clave)
-        st.info(f"🔍 Buscando: {', '.join(palabras_clave)} (expandido a: {', '.join(palabras_expandidas)})")
-        
-        mascara = pd.Series([False] * len(df), index=df.index)
-        
-        for palabra in palabras_expandidas:
-            if busqueda_exacta:
-                patron = r'\b' + re.escape(palabra) + r'\b'
-                m = df['_texto'].str.contains(patron, case=False, regex=True, na=False)
-            else:
-                m = df['_texto'].str.contains(palabra, case=False, regex=False, na=False)
-            
-            mascara = mascara | m
-            if m.sum() > 0:
-                st.info(f"  ✓ '{palabra}': {m.sum()} docs")
-        
-        df = df[mascara]
-    
-    df = df.drop(columns=['_texto'])
-    if 'Contenido_Completo' in df.columns:
-        df = df.drop(columns=['Contenido_Completo'])
-    
-    return df
+# Los mensajes de progreso de la librería se muestran con st.info, st.success...
+avisos.establecer(st)
 
 # ============= INTERFAZ =============
 
@@ -563,11 +52,19 @@ with st.sidebar:
     usar_boja = st.checkbox("BOJA (Feed)", value=True)
     usar_boe = st.checkbox("BOE (RSS)", value=False)
     usar_boja_hist = st.checkbox("BOJA (Histórico)", value=False)
+    usar_boe_hist = st.checkbox("BOE (Histórico)", value=False, help="Sumarios diarios del BOE")
+    usar_indice = st.checkbox("📚 Índice local", value=False, help="Documentos ya descargados en búsquedas anteriores, sin conexión")
+    
+    for fuente in ('boja', 'boe'):
+        rango = cobertura(fuente)
+        if rango:
+            texto = f"con texto completo hasta el {rango[2].strftime('%d/%m/%Y')}" if rango[2] else "sin texto completo"
+            st.caption(f"🗄️ {fuente.upper()} ingerido del {rango[0].strftime('%d/%m/%Y')} al {rango[1].strftime('%d/%m/%Y')} ({texto}): el histórico de ese rango se consulta sin descargar")
     
     fecha_desde = None
     fecha_hasta = None
     
-    if usar_boja_hist:
+    if usar_boja_hist or usar_boe_hist or usar_indice:
         col1, col2 = st.columns(2)
         fecha_desde = col1.date_input("Desde", datetime.now() - timedelta(days=7))
         fecha_hasta = col2.date_input("Hasta", datetime.now())
@@ -575,42 +72,103 @@ with st.sidebar:
     st.markdown("---")
     st.subheader("🔍 Opciones")
     contenido_completo = st.checkbox("🔥 Contenido completo", value=False)
+    politica_prefiltro = 'completa'
+    if contenido_completo:
+        configurar_descargas(st.slider("Descargas simultáneas por servidor", 1, MAX_DESCARGAS, MAX_POR_HOST))
+        politica_prefiltro = st.selectbox(
+            "Descargar contenido de", list(POLITICAS_PREFILTRO), index=1, format_func=POLITICAS_PREFILTRO.get,
+            help="Antes de descargar se filtra por título, sección y resumen"
+        )
     
     st.markdown("---")
     st.subheader("🎯 Filtros")
     solo_ayudas = st.checkbox("Solo ayudas", value=True)
     palabras_clave = st.text_input("Palabras clave:", "", help="Ej: FEDER, turismo, pyme")
     busqueda_exacta = st.checkbox("Búsqueda exacta", value=True)
+    consulta = st.text_input("🧠 Búsqueda inteligente", "", help="Consulta en lenguaje natural: ordena los resultados por relevancia, sin conexión ni API key")
+    
+    with st.expander("🔔 Alertas"):
+        st.caption("Las búsquedas guardadas se comparan con los documentos nuevos en cada ingesta (python -m boletines.ingesta --alertas)")
+        nombre_alerta = st.text_input("Nombre de la alerta")
+        destino_alerta = st.text_input("Destino", help="mailto:direccion o URL de un webhook; sin destino, solo el resumen diario")
+        if st.button("💾 Guardar palabras y filtros como alerta", disabled=not nombre_alerta):
+            guardar_consulta(nombre_alerta, [p.strip() for p in palabras_clave.split(',') if p.strip()], solo_ayudas, busqueda_exacta, destino_alerta)
+            st.success(f"Alerta «{nombre_alerta}» guardada")
+        for guardada in consultas_guardadas.listar():
+            st.markdown(f"- **{guardada['nombre']}**: {', '.join(guardada['palabras']) or 'todas las ayudas'}")
+    
+    st.markdown("---")
+    perfilar_busqueda = st.checkbox("📈 Perfilar búsqueda (cProfile)", value=False, help="Añade al panel de métricas las funciones más costosas del hilo principal")
 
+pila_perfil = ExitStack()
 if st.button("🚀 Buscar", type="primary"):
-    todos_resultados = []
-    
-    if usar_boja:
-        todos_resultados.extend(buscar_boja_feed(contenido_completo))
-    
-    if usar_boe:
-        todos_resultados.extend(buscar_boe_rss(contenido_completo))
+    lista_palabras = [p.strip() for p in palabras_clave.split(',') if p.strip()]
+    
+    # Métricas de esta búsqueda; el perfil abarca la búsqueda y la primera página
+    metricas.reiniciar()
+    perfil = pila_perfil.enter_context(perfilar()) if perfilar_busqueda else None
+    
+    fuentes = [f for f, activa in [('boja', usar_boja), ('boe', usar_boe), ('historico', usar_boja_hist), ('boe_historico', usar_boe_hist), ('indice', usar_indice)] if activa]
+    # Los documentos que pasan el filtro aparecen según llegan; al terminar se ordenan,
+    # se agrupan los casi duplicados y se paginan
+    parciales = st.empty()
+    partes = []
+    mostrado = 0.0
+    for tanda in buscar_y_filtrar_progresivo(
+        fuentes, lista_palabras, solo_ayudas, busqueda_exacta,
+        contenido_completo, politica_prefiltro, fecha_desde, fecha_hasta
+    ):
+        partes.append(tanda)
+        if tanda and time.monotonic() - mostrado >= REFRESCO_PARCIALES:
+            df_parcial = pd.DataFrame([r for tanda in partes for r in tanda])
+            with parciales.container():
+                st.info(f"⏳ {len(df_parcial)} resultados hasta ahora, la búsqueda continúa...")
+                st.dataframe(
+                    df_parcial[['Fecha', 'Boletín', 'Título', 'Enlace']],
+                    hide_index=True,
+                    column_config={
+                        'Fecha': st.column_config.DateColumn(format="DD/MM/YYYY"),
+                        'Enlace': st.column_config.LinkColumn(display_text="🔗 Ver"),
+                    },
+                )
+            mostrado = time.monotonic()
+    parciales.empty()
+    # Sin tandas, ninguna fuente ha producido documentos; con tandas vacías, ninguno ha pasado el filtro
+    if any(partes):
+        df_filtrado = reunir_resultados(partes)
+    else:
+        df_filtrado = pd.DataFrame() if partes else None
+    
+    stats_cache = estadisticas_cache()
+    st.caption(f"💾 Caché: {stats_cache['aciertos']} aciertos, {stats_cache['revalidados']} revalidados, {stats_cache['fallos']} descargas")
+    
+    # Los resultados quedan en la sesión: cambiar de página no repite la búsqueda
+    st.session_state.update(
+        buscado=True,
+        resultados=df_filtrado.reset_index(drop=True) if df_filtrado is not None else None,
+        palabras=lista_palabras,
+        extraidos={},
+        resumenes_ia={},
+        csv=None,
+        perfil=perfil,
+        pagina=1,
+        indice_relevancia=None,
+        consulta_ordenada=None,
+    )
+
+if st.session_state.get('buscado'):
+    df_filtrado = st.session_state['resultados']
     
-    if usar_boja_hist and fecha_desde and fecha_hasta:
-        todos_resultados.extend(
-            buscar_boja_historico(
-                datetime.combine(fecha_desde, datetime.min.time()),
-                datetime.combine(fecha_hasta, datetime.min.time()),
-                contenido_completo
-            )
-        )
+    # La búsqueda inteligente reordena los resultados guardados: el índice se construye una
+    # vez por búsqueda y cambiar la consulta no vuelve a buscar ni a indexar
+    if consulta.strip() and df_filtrado is not None and len(df_filtrado) > 0:
+        if st.session_state['indice_relevancia'] is None:
+            st.session_state['indice_relevancia'] = indexar(df_filtrado)
+        if st.session_state['consulta_ordenada'] != consulta:
+            st.session_state.update(consulta_ordenada=consulta, pagina=1)
+        df_filtrado = ordenar_por_relevancia(df_filtrado, consulta, indice=st.session_state['indice_relevancia'])
     
-    if todos_resultados:
-        df = pd.DataFrame(todos_resultados)
-        df = df.drop_duplicates(subset=['Enlace'], keep='first')
-        
-        st.info(f"📊 Total: {len(df)} docs")
-        
-        lista_palabras = [p.strip() for p in palabras_clave.split(',') if p.strip()]
-        
-        df_filtrado = filtrar_resultados(df, lista_palabras, solo_ayudas, busqueda_exacta)
-        df_filtrado = df_filtrado.sort_values('Fecha', ascending=False, na_position='last')
-        
+    if df_filtrado is not None:
         if len(df_filtrado) > 0:
             st.success(f"✅ **{len(df_filtrado)} resultados**")
             
@@ -621,47 +179,127 @@ if st.button("🚀 Buscar", type="primary"):
             st.markdown("---")
             st.subheader("📋 Información Extraída")
             
-            docs_procesados = []
-            for _, row in df_filtrado.iterrows():
-                info = extraer_informacion_documento(row['Título'], row['Resumen'], row.get('Contenido_Completo', ''), lista_palabras)
-                docs_procesados.append({**row.to_dict(), **info})
+            paginas = math.ceil(len(df_filtrado) / RESULTADOS_POR_PAGINA)
+            pagina = st.number_input(f"Página (de {paginas})", 1, paginas, key='pagina') if paginas > 1 else 1
+            df_pagina = df_filtrado.iloc[(pagina - 1) * RESULTADOS_POR_PAGINA:pagina * RESULTADOS_POR_PAGINA]
             
-            for idx, doc in enumerate(docs_procesados):
-                with st.expander(f"📄 {doc['Título'][:80]}...", expanded=(idx == 0)):
-                    col1, col2 = st.columns([2, 1])
-                    
-                    with col1:
-                        if doc['tipo_documento']:
-                            st.markdown(f"**Tipo:** {doc['tipo_documento']}")
-                        if doc['organismo']:
-                            st.markdown(f"**Organismo:** {doc['organismo'][:100]}")
-                        if doc['cuantia']:
-                            st.markdown(f"**Cuantía:** {doc['cuantia']}")
-                        if doc['plazo_solicitud']:
-                            st.markdown(f"**Plazo:** {doc['plazo_solicitud'][:100]}")
-                    
-                    with col2:
-                        st.markdown(f"**Boletín:** {doc['Boletín']}")
-                        if pd.notna(doc.get('Fecha')):
-                            st.markdown(f"**Fecha:** {doc['Fecha'].strftime('%d/%m/%Y')}")
-                        st.markdown(f"[🔗 Ver]({doc['Enlace']})")
-                    
-                    if doc['contexto_palabras']:
-                        st.markdown("---")
-                        st.markdown("**🔍 Palabras encontradas:**")
-                        for ctx in doc['contexto_palabras']:
-                            if ctx['encontrado_como'] != 'No encontrada':
-                                st.success(f"**{ctx['palabra'].upper()}** (encontrado como: '{ctx['encontrado_como']}')")
-                                if ctx['contexto']:
-                                    st.info(ctx['contexto'])
+            # Extracción y resúmenes solo para las filas de la página, una vez por búsqueda;
+            # el texto completo (HTML y PDF) se lee del índice local
+            extraidos = st.session_state['extraidos']
+            pendientes = df_pagina[~df_pagina['Enlace'].isin(extraidos)]
+            if len(pendientes) > 0:
+                info = extraer_informacion_documentos(pendientes, st.session_state['palabras'])
+                extraidos.update(zip(pendientes['Enlace'], info.to_dict('records')))
+            docs_procesados = [dict(doc, **extraidos[doc['Enlace']]) for doc in df_pagina.to_dict('records')]
+            
+            resumenes_ia = st.session_state['resumenes_ia']
+            if usar_ia and api_key_openai:
+                sin_resumen = [doc for doc in docs_procesados if doc['Enlace'] not in resumenes_ia]
+                if sin_resumen:
+                    # Sin texto completo se resume el título y el resumen; del texto solo se envía el principio
+                    textos = [
+                        contenido[:IA_MAX_CARACTERES] or f"{doc['Título']}\n{doc['Resumen']}"
+                        for doc, contenido in zip(sin_resumen, indice_documentos.iterar_contenidos(doc['Enlace'] for doc in sin_resumen))
+                    ]
+                    barra_ia = st.progress(0.0, text="🤖 Resumiendo con IA...")
+                    resumenes = resumir_documentos(
+                        textos, api_key_openai, progreso=lambda hechos, total: barra_ia.progress(hechos / total, text=f"🤖 {hechos}/{total} peticiones IA")
+                    )
+                    barra_ia.empty()
+                    for doc, resumen in zip(sin_resumen, resumenes):
+                        if resumen:
+                            resumenes_ia[doc['Enlace']] = resumen
+                for doc in docs_procesados:
+                    doc['resumen_ia'] = resumenes_ia.get(doc['Enlace'])
+            
+            with etapa('presentacion'):
+                st.dataframe(
+                    pd.DataFrame(docs_procesados)[
+                        ['Relevancia'] * ('Relevancia' in df_pagina.columns)
+                        + ['Fecha', 'Boletín', 'Título', 'tipo_documento', 'organismo', 'cuantia', 'plazo_solicitud', 'Enlace']
+                    ],
+                    hide_index=True,
+                    column_config={
+                        'Fecha': st.column_config.DateColumn(format="DD/MM/YYYY"),
+                        'tipo_documento': "Tipo", 'organismo': "Organismo", 'cuantia': "Cuantía", 'plazo_solicitud': "Plazo",
+                        'Enlace': st.column_config.LinkColumn(display_text="🔗 Ver"),
+                    },
+                )
+                
+                for idx, doc in enumerate(docs_procesados):
+                    with st.expander(f"📄 {doc['Título'][:80]}...", expanded=(idx == 0)):
+                        col1, col2 = st.columns([2, 1])
+                        
+                        with col1:
+                            if doc['tipo_documento']:
+                                st.markdown(f"**Tipo:** {doc['tipo_documento']}")
+                            if doc['organismo']:
+                                st.markdown(f"**Organismo:** {doc['organismo'][:100]}")
+                            if doc['cuantia']:
+                                st.markdown(f"**Cuantía:** {doc['cuantia']}")
+                            if doc['plazo_solicitud']:
+                                st.markdown(f"**Plazo:** {doc['plazo_solicitud'][:100]}")
+                            if doc.get('resumen_ia'):
+                                st.markdown("**🤖 Resumen IA:**")
+                                for campo, valor in doc['resumen_ia'].items():
+                                    if valor:
+                                        st.markdown(f"- **{campo.capitalize()}:** {valor}")
+                        
+                        with col2:
+                            st.markdown(f"**Boletín:** {doc['Boletín']}")
+                            if pd.notna(doc.get('Fecha')):
+                                st.markdown(f"**Fecha:** {doc['Fecha'].strftime('%d/%m/%Y')}")
+                            st.markdown(f"[🔗 Ver]({doc['Enlace']})")
+                            if doc.get('Duplicados'):
+                                st.markdown("**📑 También publicado en:** " + ", ".join(f"[{i}]({enlace})" for i, enlace in enumerate(doc['Duplicados'], 1)))
+                        
+                        if doc['contexto_palabras']:
+                            st.markdown("---")
+                            st.markdown("**🔍 Palabras encontradas:**")
+                            for ctx in doc['contexto_palabras']:
+                                if ctx['encontrado_como'] != 'No encontrada':
+                                    st.success(f"**{ctx['palabra'].upper()}** (encontrado como: '{ctx['encontrado_como']}')")
+                                    if ctx['contexto']:
+                                        st.info(ctx['contexto'])
             
             st.markdown("---")
-            csv = pd.DataFrame(docs_procesados).to_csv(index=False, encoding='utf-8-sig')
-            st.download_button("📥 Descargar CSV", csv, f"ayudas_{datetime.now().strftime('%Y%m%d_%H%M')}.csv", "text/csv")
+            if st.button("📥 Preparar CSV con todos los resultados"):
+                info = extraer_informacion_documentos(df_filtrado, st.session_state['palabras'])
+                df_csv = pd.concat([df_filtrado, info], axis=1)
+                if resumenes_ia:
+                    df_csv['resumen_ia'] = df_csv['Enlace'].map(resumenes_ia)
+                st.session_state['csv'] = df_csv.to_csv(index=False, encoding='utf-8-sig')
+            if st.session_state['csv']:
+                st.download_button("📥 Descargar CSV", st.session_state['csv'], f"ayudas_{datetime.now().strftime('%Y%m%d_%H%M')}.csv", "text/csv")
         else:
             st.warning("⚠️ Sin resultados")
     else:
         st.error("❌ No se obtuvieron resultados")
+    
+    pila_perfil.close()
+    with st.expander("📈 Métricas"):
+        resumen = metricas.resumen()
+        st.caption("Tiempo real y de CPU del hilo acumulados por etapa; las etapas anidadas (descarga y análisis dentro de sondeo o secciones) se solapan")
+        if resumen['etapas']:
+            st.dataframe(pd.DataFrame([
+                {'Etapa': nombre, 'Descripción': ETAPAS.get(nombre, ''), **valores} for nombre, valores in resumen['etapas'].items()
+            ]), hide_index=True)
+        if resumen['hosts']:
+            st.dataframe(pd.DataFrame([
+                {'Servidor': host, **{k: v for k, v in valores.items() if k != 'por_estado_y_cache'}, **valores['por_estado_y_cache']}
+                for host, valores in resumen['hosts'].items()
+            ]), hide_index=True)
+        peticiones = metricas.ultimas_peticiones()
+        if peticiones:
+            df_peticiones = pd.DataFrame(peticiones).sort_values('segundos', ascending=False)
+            st.markdown("**Peticiones más lentas**")
+            st.dataframe(df_peticiones.head(50)[['url', 'estado', 'cache', 'reintentos', 'bytes', 'segundos']], hide_index=True)
+        col1, col2 = st.columns(2)
+        col1.download_button("📥 JSON", metricas.json(), "metricas.json", "application/json")
+        col2.download_button("📥 Prometheus", metricas.prometheus(), "metricas.prom", "text/plain")
+        if st.session_state['perfil']:
+            st.markdown("**Perfil (cProfile, hilo principal)**")
+            st.code(st.session_state['perfil']['informe'])
 
 with st.expander("ℹ️ Ayuda"):
     st.markdown("""
@@ -0,0 +1,5 @@
+"""Benchmarks sin conexión: corpus grabado o sintético servido por un servidor local.
+
+    python -m benchmarks --json resultados.json
+    python -m benchmarks --comparar resultados.json
+"""
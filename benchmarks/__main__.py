@@ -0,0 +1,243 @@
+"""Benchmarks de los recorridos y filtros contra un servidor local con el corpus.
+
+    python -m benchmarks                               # corpus sintético, latencia 20 ms
+    python -m benchmarks --latencia 0.1 --errores 0.05 --json base.json
+    python -m benchmarks --comparar base.json
+    python -m benchmarks --grabar 2024-03-01 2024-03-15   # graba un corpus real (requiere conexión)
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from .corpus import Corpus, generar, grabar
+from .servidor import ServidorCorpus
+
+DIRECTORIO_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+BENCHMARKS = ("feed", "fecha", "historico", "historico_cache", "primer_resultado", "filtrar", "filtrar_tramos", "filtrar_indice",
+              "ordenar", "extraer")
+PALABRAS = ["pyme", "turismo", "FEDER"]
+CONSULTA = "ayudas a pymes del sector turístico con fondos FEDER"
+
+# ============= MEDICIÓN =============
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+def medir(funcion, elementos, preparar=None, servidor=None):
+    """Llama a funcion(elemento) una vez por elemento; funcion devuelve las unidades procesadas.
+
+    preparar() se ejecuta antes de cada llamada, fuera del tiempo medido. La memoria pico se
+    mide en una llamada aparte, porque tracemalloc ralentiza la ejecución.
+    """
+    tiempos, unidades = [], 0
+    peticiones = servidor.stats['peticiones'] if servidor else 0
+    for elemento in elementos:
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        unidades += funcion(elemento)
+        tiempos.append(time.perf_counter() - inicio)
+    peticiones = (servidor.stats['peticiones'] - peticiones) if servidor else 0
+    
+    if preparar:
+        preparar()
+    tracemalloc.start()
+    funcion(elementos[0])
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    
+    total = sum(tiempos)
+    return {
+        'llamadas': len(tiempos),
+        'unidades': unidades,
+        'unidades_s': unidades / total if total else 0.0,
+        'p50_ms': percentil(tiempos, 50) * 1000,
+        'p90_ms': percentil(tiempos, 90) * 1000,
+        'p99_ms': percentil(tiempos, 99) * 1000,
+        'pico_mb': pico / 2**20,
+        'peticiones': peticiones,
+    }
+
+def reiniciar_estado():
+    """Vacía la caché HTTP, los índices locales, el diario de recorridos y los limitadores de tasa (ejecución en frío)"""
+    from boletines import indices, red
+    
+    for almacen, tablas in ((red.cache_http, ["respuestas"]),
+                            (indices.indice_boletines, ["boletines"]),
+                            (indices.indice_documentos, ["documentos"])):
+        with almacen.lock:
+            for tabla in tablas:
+                almacen.conn.execute(f"DELETE FROM {tabla}")
+            almacen.conn.commit()
+    indices.diario_recorridos.borrar()
+    with red._limitadores_lock:
+        red._limitadores.clear()
+
+# ============= BENCHMARKS =============
+
+def ejecutar_benchmarks(corpus, servidor, args):
+    import pandas as pd
+    from boletines import fuentes
+    from boletines.busqueda import buscar_y_filtrar_progresivo
+    from boletines.extraccion import extraer_informacion_documento
+    from boletines.filtrado import filtrar_resultados
+    from boletines.indices import indice_documentos
+    from boletines.metricas import metricas
+    from boletines.ranking import ordenar_por_relevancia
+    
+    aleatorio = random.Random(args.semilla)
+    fechas = corpus.fechas()
+    laborables = [f for f in fechas if f.weekday() < 5]
+    inicio = datetime.combine(laborables[0], datetime.min.time())
+    fin = inicio + timedelta(days=args.dias - 1)
+    seleccion = set(args.solo or BENCHMARKS)
+    resultados = {}
+    
+    def ejecutar(nombre, *parametros, **opciones):
+        if nombre in seleccion:
+            print(f"  {nombre}...", file=sys.stderr)
+            metricas.reiniciar()
+            resultados[nombre] = medir(*parametros, servidor=servidor, **opciones)
+            # Desglose por etapa, solo en --json
+            resultados[nombre]['etapas'] = metricas.resumen()['etapas']
+    
+    ejecutar("feed", lambda _: len(fuentes.buscar_boja_feed()), [None] * args.repeticiones, preparar=reiniciar_estado)
+    
+    ejecutar("fecha",
+             lambda dia: len(fuentes.encontrar_boletin_por_fecha(dia.year, datetime.combine(dia, datetime.min.time()))),
+             [aleatorio.choice(fechas) for _ in range(args.repeticiones * 2)], preparar=reiniciar_estado)
+    
+    ejecutar("historico", lambda _: len(fuentes.buscar_boja_historico_exhaustivo(inicio, fin)),
+             [None] * args.repeticiones, preparar=reiniciar_estado)
+    
+    # Con la red en caché solo queda el análisis de las páginas y el guardado en el índice
+    fuentes.buscar_boja_historico_exhaustivo(inicio, fin)
+    ejecutar("historico_cache", lambda _: len(fuentes.buscar_boja_historico_exhaustivo(inicio, fin)),
+             [None] * args.repeticiones)
+    
+    # Hasta la primera tanda filtrada del histórico con contenido completo, en frío: el resto
+    # del recorrido se cancela al cerrar el generador
+    def primer_resultado(_):
+        tandas = buscar_y_filtrar_progresivo(["historico"], PALABRAS, True, False, True, "conservadora", inicio.date(), fin.date())
+        primera = next((tanda for tanda in tandas if tanda), None)
+        tandas.close()
+        return 0 if primera is None else len(primera)
+    
+    ejecutar("primer_resultado", primer_resultado, [None] * args.repeticiones, preparar=reiniciar_estado)
+    
+    if seleccion & {"filtrar", "filtrar_tramos", "filtrar_indice", "ordenar", "extraer"}:
+        # Disposiciones con texto completo (HTML y PDF), repetidas hasta --documentos filas
+        registros = fuentes.buscar_boja_historico_exhaustivo(inicio, inicio + timedelta(days=2), contenido_completo=True)
+        textos = list(indice_documentos.iterar_contenidos(r['Enlace'] for r in registros))
+        filas = [dict(registros[i % len(registros)], Contenido_Completo=textos[i % len(registros)],
+                      Enlace=f"{registros[i % len(registros)]['Enlace']}#{i}")
+                 for i in range(args.documentos)]
+        df = pd.DataFrame(filas)
+        # Las mismas filas sin texto en memoria: filtrar_resultados lo lee del índice local
+        df_indice = pd.DataFrame([registros[i % len(registros)] for i in range(args.documentos)])
+        
+        ejecutar("filtrar", lambda _: len(df) if filtrar_resultados(df.copy(), PALABRAS, True, False) is not None else 0,
+                 [None] * args.repeticiones)
+        ejecutar("filtrar_tramos", lambda _: len(df_indice) if filtrar_resultados(df_indice, PALABRAS, True, False) is not None else 0,
+                 [None] * args.repeticiones)
+        # Sin DataFrame, la consulta FTS5 sobre todo el índice local: unidades, documentos indexados
+        en_indice = indice_documentos.contar()
+        ejecutar("filtrar_indice", lambda _: en_indice if filtrar_resultados(None, PALABRAS, True, False) is not None else 0,
+                 [None] * args.repeticiones)
+        ejecutar("ordenar", lambda _: len(ordenar_por_relevancia(df, CONSULTA)), [None] * args.repeticiones)
+        ejecutar("extraer",
+                 lambda r: extraer_informacion_documento(r['Título'], r['Resumen'], r['Contenido_Completo'], PALABRAS) and 1,
+                 filas[:args.documentos])
+    
+    return resultados
+
+# ============= INFORME =============
+
+def imprimir(resultados, base=None):
+    print(f"{'benchmark':<17}{'llamadas':>9}{'unid./s':>11}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'pico MB':>9}{'peticiones':>11}"
+          + ("   Δ unid./s   Δ p50" if base else ""))
+    for nombre, r in resultados.items():
+        linea = (f"{nombre:<17}{r['llamadas']:>9}{r['unidades_s']:>11.1f}{r['p50_ms']:>10.2f}{r['p90_ms']:>10.2f}"
+                 f"{r['p99_ms']:>10.2f}{r['pico_mb']:>9.1f}{r['peticiones']:>11}")
+        anterior = (base or {}).get(nombre)
+        if anterior:
+            linea += (f"   {(r['unidades_s'] / anterior['unidades_s'] - 1) * 100:>+8.1f}%"
+                      f" {(r['p50_ms'] / anterior['p50_ms'] - 1) * 100:>+6.1f}%")
+        print(linea)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks", description="Benchmarks sin conexión de boletines")
+    parser.add_argument("--corpus", default=DIRECTORIO_CORPUS, help="Directorio del corpus (se genera si no existe)")
+    parser.add_argument("--regenerar", action="store_true", help="Volver a generar el corpus sintético")
+    parser.add_argument("--grabar", nargs=2, metavar=("DESDE", "HASTA"), type=date.fromisoformat,
+                        help="Grabar el corpus de los servidores reales y terminar")
+    parser.add_argument("--latencia", type=float, default=0.02, help="Segundos por petición en el servidor local")
+    parser.add_argument("--variacion", type=float, default=0.01, help="Latencia adicional aleatoria máxima")
+    parser.add_argument("--errores", type=float, default=0.0, help="Fracción de peticiones que responden 503")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--dias", type=int, default=5, help="Días del recorrido histórico")
+    parser.add_argument("--documentos", type=int, default=500, help="Filas para filtrar y extraer")
+    parser.add_argument("--solo", nargs="+", choices=BENCHMARKS)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--json", help="Guardar los resultados en este fichero")
+    parser.add_argument("--comparar", help="Resultados anteriores (--json) con los que comparar")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR, format="%(message)s")
+    
+    if args.grabar:
+        corpus = grabar(args.corpus, *args.grabar)
+        print(f"{len(corpus.rutas)} respuestas grabadas en {args.corpus}")
+        return 0
+    
+    corpus = Corpus(args.corpus)
+    if args.regenerar or not corpus.existe:
+        print(f"Generando corpus sintético en {args.corpus}...", file=sys.stderr)
+        corpus = generar(args.corpus, semilla=args.semilla)
+    
+    servidor = ServidorCorpus(corpus, args.latencia, args.variacion, args.errores, semilla=args.semilla)
+    url = servidor.arrancar()
+    
+    # La librería lee estas variables al importarse: caché vacía y servidores locales
+    os.environ["BOLETINES_CACHE_DIR"] = tempfile.mkdtemp(prefix="boletines-bench-")
+    os.environ["BOLETINES_URL_BOJA"] = url
+    os.environ["BOLETINES_URL_BOE"] = url
+    
+    try:
+        resultados = ejecutar_benchmarks(corpus, servidor, args)
+    finally:
+        servidor.parar()
+    
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)["resultados"]
+    imprimir(resultados, base)
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                'entorno': {
+                    'fecha': datetime.now().isoformat(timespec='seconds'),
+                    'python': platform.python_version(),
+                    'plataforma': platform.platform(),
+                    'corpus': corpus.meta,
+                    'latencia': args.latencia, 'variacion': args.variacion, 'errores': args.errores,
+                },
+                'resultados': resultados,
+            }, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,269 @@
+"""Corpus de respuestas HTTP para los benchmarks: grabado de los servidores reales o sintético.
+
+Estructura del directorio:
+
+    rutas.json   ruta (con query) -> fichero, tipo y estado HTTP
+    meta.json    origen y rango de fechas del corpus
+    ficheros/    cuerpos, uno por contenido distinto (sha1)
+
+Los enlaces absolutos a juntadeandalucia.es y boe.es se guardan como {{URL_BOJA}} y
+{{URL_BOE}}; el servidor local los sustituye por su propia dirección.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit
+
+MARCADORES = {
+    "https://www.juntadeandalucia.es": "{{URL_BOJA}}",
+    "http://www.juntadeandalucia.es": "{{URL_BOJA}}",
+    "https://www.boe.es": "{{URL_BOE}}",
+    "http://www.boe.es": "{{URL_BOE}}",
+}
+
+EXTENSIONES = {"text/html": ".html", "application/xml": ".xml", "text/xml": ".xml",
+               "application/rss+xml": ".xml", "application/pdf": ".pdf"}
+
+class Corpus:
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.lock = threading.Lock()
+        self.rutas = {}
+        self.meta = {}
+        if os.path.exists(os.path.join(directorio, "rutas.json")):
+            with open(os.path.join(directorio, "rutas.json"), encoding="utf-8") as f:
+                self.rutas = json.load(f)
+            with open(os.path.join(directorio, "meta.json"), encoding="utf-8") as f:
+                self.meta = json.load(f)
+
+    @property
+    def existe(self):
+        return bool(self.rutas)
+
+    def añadir(self, ruta, cuerpo, tipo="text/html; charset=utf-8", estado=200):
+        if isinstance(cuerpo, str):
+            cuerpo = cuerpo.encode("utf-8")
+        if not tipo.startswith("application/pdf"):
+            for origen, marcador in MARCADORES.items():
+                cuerpo = cuerpo.replace(origen.encode(), marcador.encode())
+        
+        nombre = hashlib.sha1(cuerpo).hexdigest()[:20] + EXTENSIONES.get(tipo.split(";")[0].strip(), "")
+        fichero = os.path.join(self.directorio, "ficheros", nombre)
+        with self.lock:
+            if not os.path.exists(fichero):
+                os.makedirs(os.path.dirname(fichero), exist_ok=True)
+                with open(fichero, "wb") as f:
+                    f.write(cuerpo)
+            self.rutas[ruta] = {"fichero": nombre, "tipo": tipo, "estado": estado}
+
+    def leer(self, ruta):
+        """(estado, tipo, cuerpo) de una ruta, o None si no está grabada"""
+        entrada = self.rutas.get(ruta)
+        if not entrada:
+            return None
+        with open(os.path.join(self.directorio, "ficheros", entrada["fichero"]), "rb") as f:
+            return entrada["estado"], entrada["tipo"], f.read()
+
+    def guardar(self, **meta):
+        self.meta.update(meta)
+        os.makedirs(self.directorio, exist_ok=True)
+        with self.lock:
+            with open(os.path.join(self.directorio, "rutas.json"), "w", encoding="utf-8") as f:
+                json.dump(self.rutas, f, ensure_ascii=False, indent=0, sort_keys=True)
+            with open(os.path.join(self.directorio, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(self.meta, f, ensure_ascii=False, indent=2)
+
+    def fechas(self):
+        inicio = date.fromisoformat(self.meta["desde"])
+        fin = date.fromisoformat(self.meta["hasta"])
+        return [inicio + timedelta(days=i) for i in range((fin - inicio).days + 1)]
+
+# ============= GRABACIÓN =============
+
+def grabar(directorio, desde, hasta, contenido_completo=True, boe=True):
+    """Recorre los servidores reales con la librería y guarda cada respuesta en el corpus"""
+    from boletines import fuentes
+    from boletines.red import session
+    
+    corpus = Corpus(directorio)
+    
+    def guardar_respuesta(response, *args, **kwargs):
+        if response.status_code in (200, 404):
+            partes = urlsplit(response.url)
+            ruta = partes.path + (f"?{partes.query}" if partes.query else "")
+            corpus.añadir(ruta, response.content, response.headers.get("Content-Type", ""), response.status_code)
+    
+    session.hooks["response"].append(guardar_respuesta)
+    try:
+        fuentes.buscar_boja_feed()
+        fuentes.buscar_boe_rss()
+        inicio, fin = datetime.combine(desde, datetime.min.time()), datetime.combine(hasta, datetime.min.time())
+        fuentes.buscar_boja_historico_exhaustivo(inicio, fin, contenido_completo)
+        if boe:
+            fuentes.buscar_boe_historico(inicio, fin, contenido_completo)
+    finally:
+        session.hooks["response"].remove(guardar_respuesta)
+    
+    corpus.guardar(origen="grabado", desde=desde.isoformat(), hasta=hasta.isoformat(), grabado=datetime.now().isoformat())
+    return corpus
+
+# ============= CORPUS SINTÉTICO =============
+
+MESES = ['enero','febrero','marzo','abril','mayo','junio','julio','agosto','septiembre','octubre','noviembre','diciembre']
+
+PALABRAS = ["Junta", "de", "Andalucía", "servicio", "ciudadanía", "trámite", "información", "procedimiento",
+            "administración", "la", "el", "en", "por", "para", "&amp;", "&nbsp;", "expediente", "resolución"]
+
+TITULOS = [
+    ("Resolución de {d} de {m} de {a}, de la Dirección General de Empresa, por la que se convocan ayudas a pymes del sector {s}", True),
+    ("Orden de {d} de {m} de {a}, por la que se aprueban las bases reguladoras de subvenciones para {s} cofinanciadas con FEDER", True),
+    ("Extracto de la convocatoria de incentivos a autónomos y pequeña empresa en {s}", True),
+    ("Resolución de {d} de {m} de {a}, por la que se nombra personal funcionario en {s}", False),
+    ("Anuncio de {d} de {m} de {a}, de notificación de actos administrativos relativos a {s}", False),
+    ("Decreto {d}/{a}, por el que se modifica la estructura orgánica de la Consejería de {s}", False),
+]
+SECTORES = ["turismo", "hostelería", "comercio", "agricultura", "industria", "innovación", "digitalización", "empleo"]
+
+def _relleno(aleatorio, n):
+    return " ".join(aleatorio.choice(PALABRAS) for _ in range(n))
+
+# Cabecera y pie comunes a todas las páginas del portal
+_NAV = "".join(f'<li><a href="/temas/tema-{i}.html"><span>Tema</span> {i}</a></li>' for i in range(120))
+_PIE = "".join(f'<a href="/organismos/organismo-{i}.html">Organismo {i}</a> ' for i in range(40)) + f"<p>{_relleno(random.Random(0), 150)}</p>"
+
+def _pagina(cuerpo):
+    return f"""<!DOCTYPE html><html lang="es"><head><meta charset="utf-8"><title>BOJA - Junta de Andalucía</title>
+<script>var portal = {{"version": "1 de enero de 2000"}};</script><style>.menu{{color:#007a33}}</style></head><body>
+<header><a href="/">Junta de Andalucía</a><nav><ul>{_NAV}</ul></nav></header>
+<main>{cuerpo}</main>
+<footer>{_PIE}</footer><script src="/js/portal.js"></script></body></html>"""
+
+def _numeros_boja(desde, hasta):
+    """Número de boletín de cada día laborable (numeración por año desde el 2 de enero)"""
+    numeros = {}
+    for año in range(desde.year, hasta.year + 1):
+        dia, numero = date(año, 1, 2), 0
+        while dia <= min(hasta, date(año, 12, 31)):
+            if dia.weekday() < 5:
+                numero += 1
+                if dia >= desde:
+                    numeros[dia] = numero
+            dia += timedelta(days=1)
+    return numeros
+
+def _pdfs():
+    """Tres PDF tipo: campos en la página 2, sin campos (40 páginas) y una sola página"""
+    import pymupdf
+    
+    tipos = {}
+    for nombre, paginas, pagina_campos in (("campos", 12, 1), ("largo", 40, None), ("corto", 1, 0)):
+        documento = pymupdf.open()
+        for i in range(paginas):
+            texto = f"Página {i + 1}. " + " ".join(["Texto de la disposición publicada en el boletín oficial."] * 30)
+            if i == pagina_campos:
+                texto += (" Plazo de presentación de solicitudes: un mes desde el día siguiente a la publicación."
+                          " Podrán ser beneficiarias las pequeñas y medianas empresas con sede en Andalucía."
+                          " La cuantía total asciende a 2.500.000,00 euros.")
+            documento.new_page().insert_textbox((50, 50, 550, 800), texto, fontsize=9)
+        # Sin identificador nuevo en cada guardado: mismos bytes con la misma semilla
+        tipos[nombre] = documento.tobytes(no_new_id=True)
+        documento.close()
+    return tipos
+
+def generar(directorio, desde=date(2024, 1, 2), hasta=date(2024, 2, 2), secciones=3, docs_por_seccion=12, semilla=1):
+    """Corpus sintético con la estructura de BOJA y BOE; reproducible con la misma semilla"""
+    aleatorio = random.Random(semilla)
+    corpus = Corpus(directorio)
+    pdfs = _pdfs()
+    numeros = _numeros_boja(desde, hasta)
+    ultimo = max(numeros)
+    items_feed = []
+    
+    # Variantes de página de disposición: con los campos en el HTML o solo en el PDF
+    variantes = []
+    for i in range(24):
+        campos = "<p>Cuantía máxima: 60.000,00 euros. Plazo de presentación de solicitudes: veinte días hábiles.</p>" if i % 3 == 0 else ""
+        articulos = "".join(f"<p>Artículo {k}. {_relleno(aleatorio, 90)}</p>" for k in range(25))
+        variantes.append((campos, articulos, ("campos", "largo", "corto")[i % 3]))
+    
+    for dia, numero in numeros.items():
+        año = dia.year
+        fecha_texto = f"{dia.day} de {MESES[dia.month - 1]} de {año}"
+        enlaces_secciones = "".join(
+            f'<li><a href="/boja/{año}/{numero:03d}/s{s}"><strong>{s}.</strong> Sección {s}</a></li>' for s in range(1, secciones + 1)
+        )
+        corpus.añadir(f"/boja/{año}/{numero:03d}/", _pagina((
+            f"<h1>BOJA número {numero}</h1><p class='fecha'>Publicado el {fecha_texto}</p>"
+            f"<p>{_relleno(aleatorio, 200)}</p><ul>{enlaces_secciones}</ul>"
+        )))
+        
+        for s in range(1, secciones + 1):
+            documentos = []
+            for k in range(docs_por_seccion):
+                id_doc = s * 1000 + k
+                plantilla, _ = aleatorio.choice(TITULOS)
+                titulo = plantilla.format(d=dia.day, m=MESES[dia.month - 1], a=año, s=aleatorio.choice(SECTORES))
+                ruta_doc = f"/boja/{año}/{numero:03d}/{id_doc}"
+                documentos.append(f'<div class="item"><h3><a href="{ruta_doc}">{titulo}</a></h3><p>{_relleno(aleatorio, 30)}</p></div>')
+                
+                campos, articulos, pdf = variantes[(numero + id_doc) % len(variantes)]
+                ruta_pdf = f"/eboja/{año}/{numero}/BOJA{año % 100}-{numero:03d}-{id_doc:05d}.pdf"
+                corpus.añadir(ruta_doc, _pagina(f"<h1>{titulo}</h1><article>{articulos}{campos}</article><a href='{ruta_pdf}'>Descargar PDF</a>"))
+                corpus.añadir(ruta_pdf, pdfs[pdf], "application/pdf")
+                
+                if dia == ultimo:
+                    items_feed.append(
+                        f"<item><title>{titulo}</title><link>https://www.juntadeandalucia.es{ruta_doc}</link>"
+                        f"<description>&lt;p&gt;{_relleno(aleatorio, 25)}&lt;/p&gt;</description>"
+                        f"<pubDate>{dia.strftime('%a, %d %b %Y')} 00:00:00 +0100</pubDate></item>"
+                    )
+            corpus.añadir(f"/boja/{año}/{numero:03d}/s{s}", _pagina(f"<h2>Sección {s}</h2>{''.join(documentos)}"))
+    
+    corpus.añadir("/boja/distribucion/boja.xml", (
+        f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>BOJA</title>{"".join(items_feed)}</channel></rss>'
+    ), "application/rss+xml; charset=utf-8")
+    
+    _generar_boe(corpus, aleatorio, desde, hasta, pdfs)
+    corpus.guardar(origen="sintetico", desde=desde.isoformat(), hasta=hasta.isoformat(), semilla=semilla)
+    return corpus
+
+def _generar_boe(corpus, aleatorio, desde, hasta, pdfs):
+    dia, numero = desde, 0
+    items_rss = []
+    while dia <= hasta:
+        if dia.weekday() < 6:
+            numero += 1
+            secciones = []
+            for codigo, nombre in (("1", "I. Disposiciones generales"), ("3", "III. Otras disposiciones"), ("5B", "V. Anuncios - B. Otros anuncios oficiales")):
+                items = []
+                for k in range(10):
+                    identificador = f"BOE-A-{dia.year}-{numero:03d}{codigo}{k:02d}"
+                    plantilla, _ = aleatorio.choice(TITULOS)
+                    titulo = plantilla.format(d=dia.day, m=MESES[dia.month - 1], a=dia.year, s=aleatorio.choice(SECTORES))
+                    items.append(
+                        f"<item><identificador>{identificador}</identificador><titulo>{titulo}</titulo>"
+                        f"<url_pdf>https://www.boe.es/boe/dias/{dia:%Y/%m/%d}/pdfs/{identificador}.pdf</url_pdf>"
+                        f"<url_html>https://www.boe.es/diario_boe/txt.php?id={identificador}</url_html></item>"
+                    )
+                    corpus.añadir(f"/diario_boe/txt.php?id={identificador}", (
+                        f"<html><head><title>{identificador}</title></head><body><h3>{titulo}</h3>"
+                        + "".join(f"<p>{_relleno(aleatorio, 80)}</p>" for _ in range(15)) + "</body></html>"
+                    ))
+                    corpus.añadir(f"/boe/dias/{dia:%Y/%m/%d}/pdfs/{identificador}.pdf", pdfs["campos"], "application/pdf")
+                    items_rss.append(f"<item><title>{titulo}</title><link>https://www.boe.es/diario_boe/txt.php?id={identificador}</link><pubDate>{dia.strftime('%a, %d %b %Y')} 07:30:00 +0100</pubDate></item>")
+                secciones.append(f'<seccion codigo="{codigo}" nombre="{nombre}"><departamento codigo="1" nombre="MINISTERIO DE INDUSTRIA">'
+                                 f'<epigrafe nombre="Ayudas">{"".join(items)}</epigrafe></departamento></seccion>')
+            corpus.añadir(f"/datosabiertos/api/boe/sumario/{dia:%Y%m%d}", (
+                f'<?xml version="1.0" encoding="utf-8"?><response><status><code>200</code><text>ok</text></status><data><sumario>'
+                f'<metadatos><publicacion>BOE</publicacion><fecha_publicacion>{dia:%Y%m%d}</fecha_publicacion></metadatos>'
+                f'<diario numero="{numero}">{"".join(secciones)}</diario></sumario></data></response>'
+            ), "application/xml")
+        dia += timedelta(days=1)
+    
+    corpus.añadir("/rss/boe.php", (
+        f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>BOE</title>{"".join(items_rss[-40:])}</channel></rss>'
+    ), "application/rss+xml; charset=utf-8")
@@ -0,0 +1,88 @@
+"""Servidor HTTP local que sirve un corpus con latencia y errores configurables"""
+
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class ServidorCorpus:
+    """Sirve BOJA y BOE desde un Corpus en http://127.0.0.1:<puerto>.
+
+    latencia + uniforme(0, variacion) segundos por petición; una fracción errores de
+    las peticiones responde 503 con Retry-After.
+    """
+
+    def __init__(self, corpus, latencia=0.0, variacion=0.0, errores=0.0, retry_after=1, semilla=None):
+        self.corpus = corpus
+        self.latencia = latencia
+        self.variacion = variacion
+        self.errores = errores
+        self.retry_after = retry_after
+        self.aleatorio = random.Random(semilla)
+        self.lock = threading.Lock()
+        self.stats = {'peticiones': 0, 'errores': 0, 'no_encontradas': 0, 'bytes': 0}
+        self.servidor = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.servidor.server_port}"
+
+    def arrancar(self):
+        servidor_corpus = self
+        
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                servidor_corpus._responder(self)
+        
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+        self.servidor.daemon_threads = True
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        return self.url
+
+    def parar(self):
+        if self.servidor:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+
+    def _contar(self, clave, n=1):
+        with self.lock:
+            self.stats[clave] += n
+
+    def _responder(self, manejador):
+        self._contar('peticiones')
+        with self.lock:
+            espera = self.latencia + self.aleatorio.uniform(0, self.variacion)
+            fallo = self.aleatorio.random() < self.errores
+        if espera:
+            time.sleep(espera)
+        
+        if fallo:
+            self._contar('errores')
+            self._enviar(manejador, 503, "text/plain", b"", {"Retry-After": str(self.retry_after)})
+            return
+        
+        grabada = self.corpus.leer(manejador.path)
+        if grabada is None:
+            self._contar('no_encontradas')
+            self._enviar(manejador, 404, "text/html", b"<html><body>Not Found</body></html>")
+            return
+        
+        estado, tipo, cuerpo = grabada
+        if not tipo.startswith("application/pdf"):
+            cuerpo = cuerpo.replace(b"{{URL_BOJA}}", self.url.encode()).replace(b"{{URL_BOE}}", self.url.encode())
+        self._contar('bytes', len(cuerpo))
+        self._enviar(manejador, estado, tipo, cuerpo)
+
+    def _enviar(self, manejador, estado, tipo, cuerpo, cabeceras=None):
+        manejador.send_response(estado)
+        manejador.send_header("Content-Type", tipo)
+        manejador.send_header("Content-Length", str(len(cuerpo)))
+        for nombre, valor in (cabeceras or {}).items():
+            manejador.send_header(nombre, valor)
+        manejador.end_headers()
+        manejador.wfile.write(cuerpo)
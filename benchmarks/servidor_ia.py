@@ -0,0 +1,123 @@
+"""Servidor local compatible con la API de chat de OpenAI, con latencia y errores configurables"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PATRON_DOCUMENTO = re.compile(r"### Documento (\d+)")
+
+class ServidorIA:
+    """Responde a POST /v1/chat/completions en http://127.0.0.1:<puerto>/v1.
+
+    Los resúmenes son deterministas: el tipo fijo y el resumen, el final del texto de cada
+    documento. latencia + uniforme(0, variacion) segundos por petición; una fracción errores
+    responde 429 con Retry-After y una fracción malformados, JSON cortado a la mitad (como
+    una respuesta que se queda sin max_tokens).
+    """
+
+    def __init__(self, latencia=0.0, variacion=0.0, errores=0.0, malformados=0.0, retry_after=0.1, semilla=None):
+        self.latencia = latencia
+        self.variacion = variacion
+        self.errores = errores
+        self.malformados = malformados
+        self.retry_after = retry_after
+        self.aleatorio = random.Random(semilla)
+        self.lock = threading.Lock()
+        self.stats = {'peticiones': 0, 'errores': 0, 'malformados': 0, 'documentos': 0}
+        self.servidor = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.servidor.server_port}/v1"
+
+    def arrancar(self):
+        servidor_ia = self
+        
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def log_message(self, *args):
+                pass
+            
+            def do_POST(self):
+                servidor_ia._responder(self)
+        
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+        self.servidor.daemon_threads = True
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        return self.url
+
+    def parar(self):
+        if self.servidor:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+
+    def _contar(self, clave, n=1):
+        with self.lock:
+            self.stats[clave] += n
+
+    def _responder(self, manejador):
+        self._contar('peticiones')
+        peticion = json.loads(manejador.rfile.read(int(manejador.headers.get("Content-Length", 0))))
+        with self.lock:
+            espera = self.latencia + self.aleatorio.uniform(0, self.variacion)
+            sorteo = self.aleatorio.random()
+        if espera:
+            time.sleep(espera)
+        
+        if not manejador.path.endswith("/chat/completions"):
+            self._enviar(manejador, 404, {"error": {"message": "Not Found", "type": "invalid_request_error"}})
+            return
+        if sorteo < self.errores:
+            self._contar('errores')
+            self._enviar(manejador, 429, {"error": {"message": "Rate limit", "type": "rate_limit_error"}},
+                         {"Retry-After": str(self.retry_after)})
+            return
+        
+        contenido = peticion["messages"][-1]["content"]
+        texto, documentos = self.responder(contenido)
+        self._contar('documentos', documentos)
+        fin = "stop"
+        if sorteo < self.errores + self.malformados:
+            self._contar('malformados')
+            texto, fin = texto[:len(texto) // 2], "length"
+        
+        completados = 10 * documentos
+        self._enviar(manejador, 200, {
+            "id": f"chatcmpl-{self.stats['peticiones']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": peticion.get("model", ""),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": texto}, "finish_reason": fin}],
+            "usage": {"prompt_tokens": len(contenido) // 4, "completion_tokens": completados,
+                      "total_tokens": len(contenido) // 4 + completados},
+        })
+
+    @staticmethod
+    def responder(contenido):
+        """Texto de la respuesta y número de documentos resumidos en ella"""
+        partes = PATRON_DOCUMENTO.split(contenido)
+        if len(partes) == 1:
+            if "JSON" not in contenido:
+                # Palabras clave de una consulta
+                return " ".join(contenido.split(":", 1)[-1].split()), 1
+            return json.dumps({"tipo": "ayuda", "resumen": contenido[-40:].strip()}), 1
+        
+        resumenes = [
+            {"id": int(numero), "tipo": "ayuda", "resumen": texto.strip()[-40:]}
+            for numero, texto in zip(partes[1::2], partes[2::2])
+        ]
+        return json.dumps({"resumenes": resumenes}), len(resumenes)
+
+    def _enviar(self, manejador, estado, datos, cabeceras=None):
+        cuerpo = json.dumps(datos).encode()
+        manejador.send_response(estado)
+        manejador.send_header("Content-Type", "application/json")
+        manejador.send_header("Content-Length", str(len(cuerpo)))
+        for nombre, valor in (cabeceras or {}).items():
+            manejador.send_header(nombre, valor)
+        manejador.end_headers()
+        manejador.wfile.write(cuerpo)
@@ -0,0 +1,60 @@
+"""Búsqueda de ayudas y subvenciones en BOJA y BOE, sin interfaz.
+
+Los submódulos se cargan al primer uso: ``import boletines`` no importa pandas,
+requests, lxml, feedparser ni openai.
+"""
+
+import importlib
+
+_EXPORTADOS = {
+    'buscar_y_filtrar': 'busqueda',
+    'buscar_y_filtrar_progresivo': 'busqueda',
+    'reunir_resultados': 'busqueda',
+    'buscar_boja_feed': 'fuentes',
+    'buscar_boe_rss': 'fuentes',
+    'buscar_boe_historico': 'fuentes',
+    'sumario_boe': 'fuentes',
+    'buscar_boja_historico': 'fuentes',
+    'buscar_boja_historico_exhaustivo': 'fuentes',
+    'iterar_boja_historico': 'fuentes',
+    'iterar_boe_historico': 'fuentes',
+    'buscar_boja_feed_filtrado_por_fechas': 'fuentes',
+    'buscar_en_boletin_completo': 'fuentes',
+    'encontrar_boletin_por_fecha': 'fuentes',
+    'extraer_contenido_completo': 'fuentes',
+    'completar_contenidos': 'fuentes',
+    'iterar_completados': 'fuentes',
+    'agrupar_duplicados': 'duplicados',
+    'filtrar_resultados': 'filtrado',
+    'filtrar_indice_local': 'filtrado',
+    'expandir_palabras_clave': 'filtrado',
+    'SINONIMOS': 'filtrado',
+    'BuscadorPalabras': 'filtrado',
+    'Prefiltro': 'filtrado',
+    'POLITICAS_PREFILTRO': 'filtrado',
+    'extraer_informacion_documento': 'extraccion',
+    'extraer_informacion_documentos': 'extraccion',
+    'resumir_con_openai': 'ia',
+    'resumir_documentos': 'ia',
+    'busqueda_inteligente_openai': 'ia',
+    'busqueda_inteligente': 'ranking',
+    'ordenar_por_relevancia': 'ranking',
+    'IndiceBM25': 'ranking',
+    'configurar_descargas': 'red',
+    'estadisticas_cache': 'red',
+    'session': 'red',
+    'metricas': 'metricas',
+    'etapa': 'metricas',
+    'perfilar': 'metricas',
+    'ingerir': 'ingesta',
+    'cobertura': 'ingesta',
+    'guardar_consulta': 'alertas',
+    'avisar': 'alertas',
+}
+
+__all__ = list(_EXPORTADOS)
+
+def __getattr__(nombre):
+    if nombre in _EXPORTADOS:
+        return getattr(importlib.import_module(f".{_EXPORTADOS[nombre]}", __name__), nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
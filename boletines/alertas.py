@@ -0,0 +1,306 @@
+"""Alertas: búsquedas guardadas que se comprueban contra cada disposición nueva del índice local.
+
+    python -m boletines.alertas guardar feder-pyme -p "FEDER, pyme" --destino mailto:ayudas@ejemplo.es
+    python -m boletines.alertas enviar
+    python -m boletines.ingesta --alertas --cada 3600
+
+Las búsquedas se compilan en un índice inverso (término -> búsquedas): cada documento nuevo
+se recorre una sola vez para todas ellas, con las mismas reglas que filtrar_resultados.
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import smtplib
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from email.message import EmailMessage
+
+from . import avisos
+from .config import CACHE_DIR, DIR_ALERTAS, REMITENTE_ALERTAS, SMTP_ALERTAS
+from .filtrado import TERMINOS_AYUDAS, BuscadorPalabras, expandir_palabras_clave, normalizar_texto
+from .indices import indice_documentos, marcas_ingesta
+
+PATRON_PALABRA = re.compile(r'\w+')
+
+# ============= BÚSQUEDAS GUARDADAS =============
+
+class ConsultasGuardadas:
+    """Búsquedas guardadas y disposiciones ya avisadas a cada una"""
+
+    def __init__(self, ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(ruta, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS consultas (
+                nombre TEXT PRIMARY KEY,
+                palabras TEXT,
+                solo_ayudas INTEGER,
+                busqueda_exacta INTEGER,
+                destino TEXT,
+                creada REAL
+            );
+            CREATE TABLE IF NOT EXISTS avisados (
+                consulta TEXT,
+                enlace TEXT,
+                avisado REAL,
+                PRIMARY KEY (consulta, enlace)
+            );
+        """)
+        self.conn.commit()
+
+    def guardar(self, nombre, palabras_clave, solo_ayudas=True, busqueda_exacta=True, destino=''):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO consultas VALUES (?, ?, ?, ?, ?, ?)",
+                (nombre, json.dumps(list(palabras_clave), ensure_ascii=False), int(solo_ayudas), int(busqueda_exacta), destino or '', time.time())
+            )
+            self.conn.commit()
+
+    def borrar(self, nombre):
+        with self.lock:
+            self.conn.execute("DELETE FROM consultas WHERE nombre = ?", (nombre,))
+            self.conn.execute("DELETE FROM avisados WHERE consulta = ?", (nombre,))
+            self.conn.commit()
+
+    def listar(self):
+        with self.lock:
+            filas = self.conn.execute(
+                "SELECT nombre, palabras, solo_ayudas, busqueda_exacta, destino FROM consultas ORDER BY nombre"
+            ).fetchall()
+        return [
+            {'nombre': nombre, 'palabras': json.loads(palabras), 'solo_ayudas': bool(solo_ayudas),
+             'busqueda_exacta': bool(busqueda_exacta), 'destino': destino}
+            for nombre, palabras, solo_ayudas, busqueda_exacta, destino in filas
+        ]
+
+    def marcar_avisados(self, nombre, enlaces):
+        """Registra los enlaces avisados a la consulta; devuelve los que no lo estaban ya"""
+        nuevos = []
+        with self.lock:
+            for enlace in enlaces:
+                cursor = self.conn.execute("INSERT OR IGNORE INTO avisados VALUES (?, ?, ?)", (nombre, enlace, time.time()))
+                if cursor.rowcount:
+                    nuevos.append(enlace)
+            self.conn.commit()
+        return nuevos
+
+consultas_guardadas = ConsultasGuardadas(os.path.join(CACHE_DIR, "alertas.sqlite"))
+
+# ============= PERCOLADOR =============
+
+class Percolador:
+    """Índice inverso de las búsquedas guardadas.
+
+    Los términos exactos se agrupan por su primera palabra: de cada documento solo se comprueban
+    los que empiezan por una palabra que aparece en él. Los parciales (subcadenas) no se pueden
+    indexar por palabra y van en una única expresión regular.
+    """
+
+    def __init__(self, consultas):
+        self.consultas = list(consultas)
+        self.ayudas = {normalizar_texto(t) for t in TERMINOS_AYUDAS}
+        self.inverso = {(True, t): set() for t in self.ayudas}
+        self.sin_palabras = set()
+        parciales = set()
+
+        for i, consulta in enumerate(self.consultas):
+            expandidas = expandir_palabras_clave(consulta['palabras'])
+            if not expandidas:
+                self.sin_palabras.add(i)
+            exacta = bool(consulta['busqueda_exacta'])
+            for termino in expandidas:
+                if not exacta:
+                    parciales.add(termino)
+                self.inverso.setdefault((exacta, normalizar_texto(termino)), set()).add(i)
+
+        self.por_palabra = {}
+        self.siempre = []
+        for exacta, termino in self.inverso:
+            if not exacta:
+                continue
+            patron = re.compile(r'\b' + re.escape(termino) + r'\b')
+            palabras = PATRON_PALABRA.findall(termino)
+            if palabras and PATRON_PALABRA.fullmatch(termino[0]) and PATRON_PALABRA.fullmatch(termino[-1]):
+                self.por_palabra.setdefault(palabras[0], []).append((termino, patron))
+            else:
+                self.siempre.append((termino, patron))
+        self.parcial = BuscadorPalabras(sorted(parciales), busqueda_exacta=False) if parciales else None
+
+    def terminos(self, texto):
+        """Claves (exacta, término normalizado) presentes en el texto ya normalizado"""
+        hallados = set()
+        for palabra in set(PATRON_PALABRA.findall(texto)) & self.por_palabra.keys():
+            hallados.update((True, termino) for termino, patron in self.por_palabra[palabra] if patron.search(texto))
+        hallados.update((True, termino) for termino, patron in self.siempre if patron.search(texto))
+        if self.parcial:
+            hallados.update((False, self.parcial.terminos[i]) for i in self.parcial.encontrar(texto))
+        return hallados
+
+    def coincidencias(self, texto):
+        """Índices de las consultas que cumple el texto (título, resumen y contenido)"""
+        hallados = self.terminos(normalizar_texto(texto))
+        es_ayuda = any((True, termino) in hallados for termino in self.ayudas)
+
+        candidatas = set(self.sin_palabras)
+        for clave in hallados:
+            candidatas |= self.inverso.get(clave, set())
+        return sorted(i for i in candidatas if es_ayuda or not self.consultas[i]['solo_ayudas'])
+
+def _ultimo_percolado():
+    """Última versión del índice ya comparada; la primera vez, la última existente"""
+    marca = marcas_ingesta.leer('alertas')
+    if marca is None:
+        marca = {'version': indice_documentos.ultima_version()}
+        marcas_ingesta.guardar('alertas', marca)
+    # Las marcas anteriores guardaban el id del documento, que es su primera versión
+    return marca.get('version', marca.get('id'))
+
+def guardar_consulta(nombre, palabras_clave, solo_ayudas=True, busqueda_exacta=True, destino=''):
+    """Guarda una búsqueda; solo se avisará de las disposiciones que lleguen a partir de ahora"""
+    _ultimo_percolado()
+    consultas_guardadas.guardar(nombre, palabras_clave, solo_ayudas, busqueda_exacta, destino)
+
+def percolar():
+    """Compara los documentos nuevos o cambiados del índice con todas las búsquedas guardadas y
+    avanza la marca. Un documento guardado antes sin texto completo se vuelve a comparar cuando
+    llega su texto.
+
+    Devuelve {nombre: [documentos]} solo con las disposiciones no avisadas antes a cada búsqueda.
+    """
+    desde = _ultimo_percolado()
+    consultas = consultas_guardadas.listar()
+    if not consultas:
+        # Sin búsquedas no hay nada que comparar, pero la marca avanza: una búsqueda guardada
+        # después no debe recibir lo que llegó antes
+        marcas_ingesta.guardar('alertas', {'version': indice_documentos.ultima_version()})
+        return {}
+    
+    percolador = Percolador(consultas)
+    coincidencias = {consulta['nombre']: [] for consulta in consultas}
+    ultimo = desde
+    for doc in indice_documentos.posteriores(desde):
+        texto = f"{doc['Título'] or ''} {doc['Resumen'] or ''} {doc['Contenido_Completo'] or ''}"
+        for i in percolador.coincidencias(texto):
+            coincidencias[consultas[i]['nombre']].append({k: doc[k] for k in ('Boletín', 'Título', 'Enlace', 'Fecha')})
+        ultimo = doc['version']
+    
+    nuevas = {}
+    for nombre, docs in coincidencias.items():
+        avisables = set(consultas_guardadas.marcar_avisados(nombre, [d['Enlace'] for d in docs]))
+        if avisables:
+            nuevas[nombre] = [d for d in docs if d['Enlace'] in avisables]
+    
+    marcas_ingesta.guardar('alertas', {'version': ultimo})
+    return nuevas
+
+# ============= ENVÍO =============
+
+def _texto_alerta(nombre, documentos):
+    lineas = [f"## {nombre} ({len(documentos)})", ""]
+    for doc in documentos:
+        fecha = datetime.fromisoformat(doc['Fecha']).strftime('%d/%m/%Y') if doc['Fecha'] else ''
+        lineas.append(f"- [{doc['Título']}]({doc['Enlace']}) — {doc['Boletín']} {fecha}".rstrip())
+    return "\n".join(lineas) + "\n"
+
+def enviar_correo(destinatario, asunto, cuerpo, servidor=SMTP_ALERTAS):
+    host, _, puerto = servidor.partition(':')
+    mensaje = EmailMessage()
+    mensaje['From'] = REMITENTE_ALERTAS
+    mensaje['To'] = destinatario
+    mensaje['Subject'] = asunto
+    mensaje.set_content(cuerpo)
+    with smtplib.SMTP(host, int(puerto or 25), timeout=30) as smtp:
+        smtp.send_message(mensaje)
+
+def enviar_webhook(url, nombre, documentos):
+    from .red import session
+    
+    response = session.post(url, json={'consulta': nombre, 'documentos': documentos}, timeout=30)
+    response.raise_for_status()
+
+def entregar(coincidencias, directorio=DIR_ALERTAS, consultas=None):
+    """Añade las coincidencias al resumen del día y las envía al destino de cada búsqueda.
+
+    Devuelve la ruta del resumen, o None si no había nada que avisar.
+    """
+    if not coincidencias:
+        return None
+    
+    destinos = {c['nombre']: c['destino'] for c in (consultas or consultas_guardadas.listar())}
+    ahora = datetime.now()
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f"alertas-{ahora:%Y-%m-%d}.md")
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(f"# Alertas {ahora:%d/%m/%Y %H:%M}\n\n")
+        for nombre, documentos in coincidencias.items():
+            f.write(_texto_alerta(nombre, documentos) + "\n")
+    
+    # Un destino que falla no impide avisar al resto; el resumen del día ya lo recoge
+    for nombre, documentos in coincidencias.items():
+        destino = destinos.get(nombre) or ''
+        try:
+            if destino.startswith('mailto:'):
+                enviar_correo(destino[len('mailto:'):], f"Boletines: {len(documentos)} disposiciones nuevas para «{nombre}»",
+                              _texto_alerta(nombre, documentos))
+            elif destino.startswith(('http://', 'https://')):
+                enviar_webhook(destino, nombre, documentos)
+        except Exception:
+            avisos.log.exception(f"No se pudo avisar a {destino} de la alerta {nombre}")
+    return ruta
+
+def avisar(directorio=DIR_ALERTAS):
+    """percolar y entregar: una pasada de alertas; devuelve el número de avisos por búsqueda"""
+    coincidencias = percolar()
+    ruta = entregar(coincidencias, directorio)
+    if ruta:
+        avisos.salida.success(f"🔔 {sum(map(len, coincidencias.values()))} avisos en {ruta}")
+    return {nombre: len(documentos) for nombre, documentos in coincidencias.items()}
+
+# ============= LÍNEA DE COMANDOS =============
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="boletines.alertas", description="Búsquedas guardadas y avisos de disposiciones nuevas")
+    ordenes = parser.add_subparsers(dest="orden", required=True)
+    
+    guardar = ordenes.add_parser("guardar", help="Guardar o sustituir una búsqueda")
+    guardar.add_argument("nombre")
+    guardar.add_argument("-p", "--palabras", default="", help="Palabras clave separadas por comas")
+    guardar.add_argument("--todas", action="store_true", help="No limitar a ayudas y subvenciones")
+    guardar.add_argument("--no-exacta", action="store_true", help="Coincidencia parcial en lugar de palabra completa")
+    guardar.add_argument("--destino", default="", help="mailto:direccion o URL de un webhook; sin destino, solo el resumen diario")
+    
+    borrar = ordenes.add_parser("borrar", help="Borrar una búsqueda")
+    borrar.add_argument("nombre")
+    
+    ordenes.add_parser("listar", help="Mostrar las búsquedas guardadas")
+    
+    enviar = ordenes.add_parser("enviar", help="Comparar los documentos nuevos del índice y enviar los avisos")
+    enviar.add_argument("--directorio", default=DIR_ALERTAS, help="Carpeta de los resúmenes diarios")
+    
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostrar el progreso")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+    
+    if args.orden == "guardar":
+        palabras = [p.strip() for p in args.palabras.split(',') if p.strip()]
+        guardar_consulta(args.nombre, palabras, not args.todas, not args.no_exacta, args.destino)
+    elif args.orden == "borrar":
+        consultas_guardadas.borrar(args.nombre)
+    elif args.orden == "listar":
+        for consulta in consultas_guardadas.listar():
+            print(f"{consulta['nombre']}: {', '.join(consulta['palabras']) or '(sin palabras)'}"
+                  f"{'' if consulta['solo_ayudas'] else ' [todas]'}{'' if consulta['busqueda_exacta'] else ' [parcial]'}"
+                  f"{' -> ' + consulta['destino'] if consulta['destino'] else ''}")
+    else:
+        avisados = avisar(args.directorio)
+        print(", ".join(f"{nombre}: {n}" for nombre, n in avisados.items()) or "Sin disposiciones nuevas")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
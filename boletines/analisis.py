@@ -0,0 +1,113 @@
+"""Análisis HTML con lxml: árbol en C y recorridos limitados a lo que necesita cada función.
+
+Los resultados coinciden con los de BeautifulSoup(..., 'html.parser') que sustituyen.
+
+La página se analiza entera: libxml2 no tiene un modo que construya solo algunos elementos, y
+iterparse(tag='a') sobre una página de sección tarda más que el árbol completo (unos 2 ms
+frente a 1,5 ms). Lo que se limita es el recorrido: enlaces solo visita los <a> y
+cabecera_boletin solo la cabecera del boletín.
+"""
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from .metricas import medido
+
+ETIQUETAS_SIN_TEXTO = ('script', 'style', 'nav', 'header', 'footer')
+
+# Partes del portal que rodean al boletín y elementos con que termina su cabecera
+_ETIQUETAS_PORTAL = ('header', 'nav', 'footer', 'aside')
+_FIN_CABECERA = ('h1', 'h2', 'h3', 'ul', 'ol', 'table', 'section', 'article')
+
+# Contenido que BeautifulSoup no cuenta como texto
+_NO_TEXTO = ('script', 'style', 'template')
+
+# Espacios que BeautifulSoup reduce a uno cuando forman toda una cadena, salvo en ESPACIOS_LITERALES
+_ESPACIOS_ASCII = frozenset(' \n\t\f\r')
+_ESPACIOS_LITERALES = ('pre', 'textarea')
+
+def _reducir_espacios(cadena):
+    if not _ESPACIOS_ASCII.issuperset(cadena):
+        return cadena
+    return '\n' if '\n' in cadena else ' '
+
+def _textos(elemento, reducir=False):
+    """Cadenas de texto del elemento como las ve BeautifulSoup: sin scripts, estilos ni comentarios
+    y, con reducir, con las cadenas de solo espacios reducidas a un espacio o un salto de línea"""
+    reducir = reducir and elemento.tag not in _ESPACIOS_LITERALES
+    if elemento.text:
+        yield _reducir_espacios(elemento.text) if reducir else elemento.text
+    for hijo in elemento:
+        if isinstance(hijo.tag, str) and hijo.tag not in _NO_TEXTO:
+            yield from _textos(hijo, reducir)
+        if hijo.tail:
+            yield _reducir_espacios(hijo.tail) if reducir else hijo.tail
+
+@medido('analisis')
+def documento(texto):
+    """Árbol lxml de una página; None si está vacía"""
+    if not texto or not texto.strip():
+        return None
+    try:
+        return lxml_html.document_fromstring(texto)
+    except ValueError:
+        # lxml no admite cadenas con declaración de codificación XML
+        return lxml_html.document_fromstring(texto.encode('utf-8'))
+    except etree.ParserError:
+        return None
+
+def enlaces(arbol):
+    """(href, texto) de cada <a href>, con el texto como get_text(strip=True)"""
+    if arbol is None:
+        return []
+    return [
+        (a.get('href'), ''.join(s.strip() for s in _textos(a)))
+        for a in arbol.iter('a') if a.get('href') is not None
+    ]
+
+def primer_enlace(arbol, patron):
+    """Primer href que cumple patron"""
+    if arbol is None:
+        return None
+    for a in arbol.iter('a'):
+        href = a.get('href')
+        if href is not None and patron.search(href):
+            return href
+    return None
+
+@medido('analisis')
+def cabecera_boletin(arbol):
+    """Texto de la cabecera de la página de un boletín: su título (el primer <h1> fuera de la
+    cabecera, la navegación y el pie del portal) y lo que le sigue hasta el siguiente
+    encabezado o la lista de secciones. '' si la página no tiene título"""
+    if arbol is None:
+        return ''
+    for titulo in arbol.iter('h1'):
+        if any(ancestro.tag in _ETIQUETAS_PORTAL for ancestro in titulo.iterancestors()):
+            continue
+        partes = [''.join(_textos(titulo))]
+        for hermano in titulo.itersiblings():
+            if not isinstance(hermano.tag, str) or hermano.tag in _NO_TEXTO:
+                continue
+            if hermano.tag in _FIN_CABECERA:
+                break
+            partes.append(''.join(_textos(hermano)))
+        return ' '.join(partes)
+    return ''
+
+@medido('analisis')
+def texto_visible(arbol):
+    """Texto sin scripts, estilos ni navegación, como get_text(separator=' ', strip=True) (modifica el árbol)"""
+    if arbol is None:
+        return ''
+    etree.strip_elements(arbol, *ETIQUETAS_SIN_TEXTO, *_NO_TEXTO, with_tail=False)
+    return ' '.join(s.strip() for s in arbol.itertext() if s.strip())
+
+def texto_fragmento(fragmento):
+    """Texto de un fragmento HTML, p. ej. el resumen de una entrada de feed, como get_text()"""
+    if not fragmento or ('<' not in fragmento and '&' not in fragmento):
+        return fragmento or ''
+    # Dentro de un <div> lxml conserva los espacios iniciales y los &nbsp; sueltos, que
+    # fragment_fromstring descarta
+    cuerpo = lxml_html.document_fromstring(f'<html><body><div>{fragmento}</div></body></html>').body
+    return ''.join(_textos(cuerpo, reducir=True))
@@ -0,0 +1,47 @@
+"""Mensajes de progreso de las búsquedas, independientes de la interfaz.
+
+Por defecto van a logging. La interfaz Streamlit llama a establecer(st): el módulo
+streamlit ofrece los mismos métodos (info, success, warning, error, empty, progress).
+"""
+
+import logging
+
+log = logging.getLogger("boletines")
+
+class _Marcador:
+    """Equivalente sin interfaz de st.empty() y st.progress()"""
+
+    def text(self, texto):
+        log.debug(texto)
+
+    def progress(self, valor):
+        pass
+
+    def empty(self):
+        pass
+
+class Avisos:
+    def info(self, texto):
+        log.info(texto)
+
+    def success(self, texto):
+        log.info(texto)
+
+    def warning(self, texto):
+        log.warning(texto)
+
+    def error(self, texto):
+        log.error(texto)
+
+    def empty(self):
+        return _Marcador()
+
+    def progress(self, valor):
+        return _Marcador()
+
+salida = Avisos()
+
+def establecer(destino):
+    """Redirige los mensajes de la librería (p. ej. al módulo streamlit)"""
+    global salida
+    salida = destino
@@ -0,0 +1,164 @@
+"""Búsqueda completa: fuentes, eliminación de duplicados y casi duplicados, y filtrado"""
+
+from datetime import datetime
+
+from . import avisos
+from .duplicados import agrupar_duplicados
+from .filtrado import FiltroIncremental, Prefiltro, filtrar_indice_local, filtrar_resultados
+
+FUENTES = ('boja', 'boe', 'historico', 'boe_historico', 'indice')
+
+# Fuentes históricas: marca de ingesta y boletín con que se consultan en el índice local
+HISTORICOS = {'historico': ('boja', 'BOJA'), 'boe_historico': ('boe', 'BOE')}
+
+def buscar_y_filtrar(fuentes, palabras_clave, solo_ayudas=True, busqueda_exacta=False,
+                     contenido_completo=False, politica='conservadora', fecha_desde=None, fecha_hasta=None, consulta=None):
+    """Consulta las fuentes indicadas y devuelve los documentos filtrados, más recientes primero.
+
+    Con una consulta en lenguaje natural se ordenan por relevancia (ver ranking).
+    Devuelve None si ninguna fuente ha producido documentos.
+    """
+    import pandas as pd
+    from .fuentes import buscar_boe_historico, buscar_boe_rss, buscar_boja_feed, buscar_boja_historico
+    
+    prefiltro = Prefiltro(palabras_clave, solo_ayudas, busqueda_exacta, politica)
+    todos_resultados = []
+    
+    if 'boja' in fuentes:
+        todos_resultados.extend(buscar_boja_feed(contenido_completo, prefiltro))
+    
+    if 'boe' in fuentes:
+        todos_resultados.extend(buscar_boe_rss(contenido_completo))
+    
+    recorridos = {'historico': buscar_boja_historico, 'boe_historico': buscar_boe_historico}
+    historicos_locales = []
+    for fuente, buscar_historico in recorridos.items():
+        if fuente not in fuentes or not (fecha_desde and fecha_hasta):
+            continue
+        
+        # Rango ya ingerido por boletines.ingesta: se responde desde el índice local sin descargar
+        marca, boletin = HISTORICOS[fuente]
+        if _cubierto_por_ingesta(marca, fecha_desde, fecha_hasta, contenido_completo):
+            historicos_locales.append(boletin)
+            continue
+        
+        todos_resultados.extend(
+            buscar_historico(
+                datetime.combine(fecha_desde, datetime.min.time()),
+                datetime.combine(fecha_hasta, datetime.min.time()),
+                contenido_completo,
+                prefiltro
+            )
+        )
+    
+    usar_indice = 'indice' in fuentes
+    if not todos_resultados and not usar_indice and not historicos_locales:
+        return None
+    
+    partes = []
+    if todos_resultados:
+        df = pd.DataFrame(todos_resultados)
+        df = df.drop_duplicates(subset=['Enlace'], keep='first')
+        
+        avisos.salida.info(f"📊 Total: {len(df)} docs")
+        
+        partes.append(filtrar_resultados(df, palabras_clave, solo_ayudas, busqueda_exacta))
+    
+    if usar_indice:
+        partes.append(filtrar_resultados(None, palabras_clave, solo_ayudas, busqueda_exacta, fecha_desde, fecha_hasta))
+    else:
+        for boletin in historicos_locales:
+            partes.append(filtrar_indice_local(palabras_clave, solo_ayudas, busqueda_exacta, fecha_desde, fecha_hasta, boletin))
+    
+    return reunir_resultados(partes, consulta)
+
+def reunir_resultados(partes, consulta=None):
+    """Une las partes filtradas (DataFrames o listas de registros) sin repetir enlaces, más
+    recientes primero y con los casi duplicados agrupados; con una consulta, por relevancia"""
+    import pandas as pd
+    
+    df_filtrado = pd.concat([pd.DataFrame(parte) for parte in partes], ignore_index=True).drop_duplicates(subset=['Enlace'], keep='first')
+    # Dentro de un mismo día, por enlace: el resultado no depende del orden de llegada
+    df_filtrado = df_filtrado.sort_values('Enlace', kind='stable').sort_values('Fecha', ascending=False, na_position='last', kind='stable')
+    # Las publicaciones repetidas de una disposición son un único resultado, el más reciente
+    df_filtrado = agrupar_duplicados(df_filtrado)
+    if consulta:
+        from .ranking import ordenar_por_relevancia
+        return ordenar_por_relevancia(df_filtrado, consulta)
+    return df_filtrado
+
+def buscar_y_filtrar_progresivo(fuentes, palabras_clave, solo_ayudas=True, busqueda_exacta=False,
+                                contenido_completo=False, politica='conservadora', fecha_desde=None, fecha_hasta=None):
+    """buscar_y_filtrar por partes: genera listas con los registros nuevos que pasan el filtro
+    en cuanto llegan (vacías para las tandas en que no pasa ninguno).
+
+    Las fuentes entregan tandas (un feed, un boletín o sumario del histórico) que se filtran al
+    momento. Con contenido completo, lo que ya pasa por título y resumen sale sin esperar a su
+    descarga y el resto se filtra al terminar la suya; los registros generados se completan
+    mientras tanto, así que se unen con reunir_resultados al agotar el generador.
+    """
+    from .fuentes import buscar_boe_rss, buscar_boja_feed, iterar_boe_historico, iterar_boja_historico, iterar_completados
+    
+    prefiltro = Prefiltro(palabras_clave, solo_ayudas, busqueda_exacta, politica)
+    filtro = FiltroIncremental(palabras_clave, solo_ayudas, busqueda_exacta)
+    vistos = set()
+    
+    def tandas():
+        if 'boja' in fuentes:
+            yield buscar_boja_feed(), contenido_completo
+        if 'boe' in fuentes:
+            # El RSS del BOE no se completa con el texto de cada disposición (ver buscar_boe_rss)
+            yield buscar_boe_rss(), False
+        
+        recorridos = {'historico': iterar_boja_historico, 'boe_historico': iterar_boe_historico}
+        for fuente, iterar_historico in recorridos.items():
+            if fuente not in fuentes or not (fecha_desde and fecha_hasta):
+                continue
+            # Con el índice local entre las fuentes, el rango ingerido ya sale en su consulta
+            marca, boletin = HISTORICOS[fuente]
+            if _cubierto_por_ingesta(marca, fecha_desde, fecha_hasta, contenido_completo):
+                if 'indice' not in fuentes:
+                    yield filtrar_indice_local(palabras_clave, solo_ayudas, busqueda_exacta, fecha_desde, fecha_hasta, boletin).to_dict('records'), None
+                continue
+            for registros in iterar_historico(
+                datetime.combine(fecha_desde, datetime.min.time()), datetime.combine(fecha_hasta, datetime.min.time())
+            ):
+                yield registros, contenido_completo
+        
+        if 'indice' in fuentes:
+            yield filtrar_resultados(None, palabras_clave, solo_ayudas, busqueda_exacta, fecha_desde, fecha_hasta).to_dict('records'), None
+    
+    for registros, completar in tandas():
+        # Lo descartado en una tanda puede pasar en otra (el índice local tiene su texto)
+        registros = [r for r in registros if r.get('Enlace') not in vistos]
+        # completar es None para las tandas que ya vienen filtradas del índice local
+        aceptados = registros if completar is None else filtro.filtrar(registros)
+        vistos.update(r.get('Enlace') for r in aceptados)
+        # Una tanda sin nada que pase se genera vacía: distingue "sin resultados" de "sin documentos"
+        if registros:
+            yield aceptados
+        if not completar:
+            continue
+        
+        ya_aceptados = {id(r) for r in aceptados}
+        for r in iterar_completados(registros, prefiltro):
+            r['Tiene_Contenido'] = r['Longitud_Contenido'] > 0
+            if id(r) not in ya_aceptados and filtro.filtrar([r]):
+                vistos.add(r['Enlace'])
+                yield [r]
+    
+    # Recuento por término, como en filtrar_resultados, de lo filtrado por tandas
+    if filtro.hallados:
+        filtro.avisar()
+
+def _cubierto_por_ingesta(fuente, fecha_desde, fecha_hasta, contenido_completo):
+    from .ingesta import cobertura
+    
+    rango = cobertura(fuente)
+    if not rango:
+        return False
+    inicio, fin, contenido_hasta = rango
+    if inicio <= fecha_desde and fecha_hasta <= fin and (not contenido_completo or (contenido_hasta and fecha_hasta <= contenido_hasta)):
+        avisos.salida.info(f"📚 Histórico {fuente.upper()} desde el índice local (ingerido hasta {fin.strftime('%d/%m/%Y')})")
+        return True
+    return False
@@ -0,0 +1,89 @@
+"""Búsqueda por lotes sin navegador: python -m boletines --fuentes boja boe -o ayudas.csv"""
+
+import argparse
+import logging
+from datetime import date
+
+def _fecha(texto):
+    return date.fromisoformat(texto)
+
+def crear_parser():
+    from .busqueda import FUENTES
+    from .filtrado import POLITICAS_PREFILTRO
+    
+    parser = argparse.ArgumentParser(prog="boletines", description="Busca ayudas y subvenciones en BOJA y BOE")
+    parser.add_argument("--fuentes", nargs="+", choices=FUENTES, default=["boja"],
+                        help="boja y boe leen los feeds del día; historico recorre boletines BOJA; boe_historico lee los sumarios diarios del BOE; indice consulta el índice local")
+    parser.add_argument("--desde", type=_fecha, help="Fecha inicial (AAAA-MM-DD) para historico, boe_historico e indice")
+    parser.add_argument("--hasta", type=_fecha, default=date.today(), help="Fecha final (AAAA-MM-DD), hoy por defecto")
+    parser.add_argument("-p", "--palabras", default="", help="Palabras clave separadas por comas, p. ej. 'FEDER, turismo'")
+    parser.add_argument("-c", "--consulta", help="Consulta en lenguaje natural: ordena los resultados por relevancia (BM25) en lugar de por fecha")
+    parser.add_argument("--todas", action="store_true", help="No limitar a ayudas y subvenciones")
+    parser.add_argument("--no-exacta", action="store_true", help="Coincidencia parcial en lugar de palabra completa")
+    parser.add_argument("--contenido-completo", action="store_true", help="Descargar el texto completo de las disposiciones")
+    parser.add_argument("--politica", choices=list(POLITICAS_PREFILTRO), default="conservadora",
+                        help="Qué documentos descargar completos (ver Prefiltro)")
+    parser.add_argument("--repetir", action="store_true",
+                        help="Volver a recorrer los boletines y sumarios ya recorridos (por defecto se reanuda desde el diario)")
+    parser.add_argument("-o", "--salida", required=True, help="Fichero de resultados .csv o .parquet")
+    parser.add_argument("--metricas", help="Guardar peticiones HTTP y tiempos por etapa en un fichero .json o .prom (Prometheus)")
+    parser.add_argument("--perfil", help="Guardar un perfil cProfile de la ejecución (abrir con pstats o snakeviz)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostrar el progreso")
+    return parser
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+    
+    if args.salida.endswith(".parquet"):
+        formato = "parquet"
+    elif args.salida.endswith(".csv"):
+        formato = "csv"
+    else:
+        raise SystemExit("La salida debe terminar en .csv o .parquet")
+    if args.metricas and not args.metricas.endswith((".json", ".prom")):
+        raise SystemExit("Las métricas deben guardarse en un fichero .json o .prom")
+    
+    from contextlib import nullcontext
+    from .metricas import metricas, perfilar
+    
+    with perfilar(args.perfil) if args.perfil else nullcontext():
+        codigo = _buscar(args, formato)
+    
+    if args.metricas:
+        with open(args.metricas, "w", encoding="utf-8") as f:
+            f.write(metricas.json() if args.metricas.endswith(".json") else metricas.prometheus())
+    return codigo
+
+def _buscar(args, formato):
+    import json
+    import pandas as pd
+    from .busqueda import buscar_y_filtrar
+    from .extraccion import extraer_informacion_documentos
+    
+    if args.repetir:
+        from .indices import diario_recorridos
+        diario_recorridos.borrar()
+    
+    lista_palabras = [p.strip() for p in args.palabras.split(',') if p.strip()]
+    df_filtrado = buscar_y_filtrar(
+        args.fuentes, lista_palabras, not args.todas, not args.no_exacta,
+        args.contenido_completo, args.politica, args.desde, args.hasta, args.consulta
+    )
+    
+    if df_filtrado is None:
+        logging.error("❌ No se obtuvieron resultados")
+        return 1
+    
+    # El texto completo (HTML y PDF) se lee por tramos del índice local
+    info = extraer_informacion_documentos(df_filtrado, lista_palabras)
+    df_salida = pd.concat([df_filtrado, info], axis=1)
+    
+    if formato == "parquet":
+        df_salida['contexto_palabras'] = df_salida['contexto_palabras'].map(lambda c: json.dumps(c, ensure_ascii=False))
+        df_salida.to_parquet(args.salida, index=False)
+    else:
+        df_salida.to_csv(args.salida, index=False, encoding='utf-8-sig')
+    
+    print(f"{len(df_salida)} resultados -> {args.salida}")
+    return 0
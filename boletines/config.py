@@ -0,0 +1,95 @@
+"""Parámetros de descarga, caché y limitación de tasa"""
+
+import os
+import re
+
+MAX_DESCARGAS = 8
+MAX_POR_HOST = 4
+MAX_DIAS_PARALELO = 4
+
+# Peticiones por segundo y servidor: empiezan en TASA_INICIAL, suben con cada
+# respuesta sana y se reducen a la mitad con cada error o 429/503. Solo se reintentan
+# los métodos de METODOS_REINTENTO: un POST (el webhook de alertas) no se envía dos veces
+TASA_INICIAL = 5.0
+TASA_MINIMA = 0.5
+TASA_MAXIMA = 25.0
+TASA_INCREMENTO = 0.5
+REINTENTOS = 3
+ESTADOS_REINTENTO = (429, 500, 502, 503, 504)
+METODOS_REINTENTO = ('GET', 'HEAD')
+MAX_RETRY_AFTER = 120
+
+CACHE_DIR = os.environ.get("BOLETINES_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"))
+CACHE_TTL_FEEDS = 15 * 60
+CACHE_TTL_NO_ENCONTRADO = 24 * 3600
+
+# Raíces de juntadeandalucia.es y boe.es; pueden apuntarse a un servidor local con un corpus grabado
+URL_BOJA = os.environ.get("BOLETINES_URL_BOJA", "https://www.juntadeandalucia.es").rstrip("/")
+URL_BOE = os.environ.get("BOLETINES_URL_BOE", "https://www.boe.es").rstrip("/")
+
+# Boletín, secciones, disposiciones y sumarios: mientras se publican pueden llegar incompletos,
+# así que se guardan CACHE_TTL_BOLETINES segundos; la copia descargada DIAS_DEFINITIVO días
+# después de la fecha del boletín ya no cambia y se sirve siempre
+PATRON_BOLETIN = re.compile(
+    r'^https?://[^/]+/(?:e?boja/(?P<anio>\d{4})/(?P<numero>\d{3})/|datosabiertos/api/boe/sumario/(?P<dia>\d{8})$)'
+)
+CACHE_TTL_BOLETINES = 15 * 60
+DIAS_DEFINITIVO = 3
+PATRON_FEED = re.compile(r'/boja/distribucion/boja\.xml|/rss/boe\.php')
+
+# Textos completos: se guardan en el índice local al descargarse y los registros solo
+# conservan su longitud; filtrado y extracción los leen por tramos de TRAMO_TEXTOS filas
+TRAMO_TEXTOS = 200
+MMAP_INDICE = 256 * 1024 * 1024
+
+# Casi duplicados (extracto y orden, correcciones, réplica en el BOE de un anuncio del BOJA):
+# firma MinHash de las ternas de palabras del título, repartida en BANDAS_MINHASH bandas;
+# los títulos de menos de MIN_PALABRAS_DUPLICADO palabras no se comparan. El umbral es bajo
+# porque insertar el organismo en el título ya deja la similitud en torno a 0,55: lo que
+# separa disposiciones distintas es la comparación de palabras (ver duplicados)
+PERMUTACIONES_MINHASH = 64
+BANDAS_MINHASH = 32
+UMBRAL_DUPLICADOS = 0.5
+MIN_PALABRAS_DUPLICADO = 6
+
+# Ingesta incremental: días hacia atrás en la primera ejecución y segundos entre pasadas;
+# un boletín que sigue sin documentos tras INTENTOS_BOLETIN_VACIO pasadas se salta
+DIAS_INGESTA_INICIAL = 7
+INTERVALO_INGESTA = 3600
+INTENTOS_BOLETIN_VACIO = 3
+
+# Alertas de búsquedas guardadas: resumen diario en DIR_ALERTAS y, según el destino de
+# cada búsqueda, correo por SMTP (mailto:) o POST JSON a un webhook (http/https)
+DIR_ALERTAS = os.environ.get("BOLETINES_DIR_ALERTAS", os.path.join(CACHE_DIR, "alertas"))
+SMTP_ALERTAS = os.environ.get("BOLETINES_SMTP", "localhost:25")
+REMITENTE_ALERTAS = os.environ.get("BOLETINES_REMITENTE", "boletines@localhost")
+
+# Búsqueda inteligente sin conexión: parámetros de BM25 y peso de los términos añadidos
+# a la consulta (sinónimos y los TERMINOS_EXPANSION que más aparecen junto a los suyos)
+BM25_K1 = 1.2
+BM25_B = 0.75
+TERMINOS_EXPANSION = 5
+PESO_SINONIMO = 0.6
+PESO_EXPANSION = 0.3
+
+# Resúmenes con IA: los textos cortos se agrupan en una sola petición y cada
+# ejecución tiene un presupuesto de tokens (entrada + salida)
+MODELO_IA = "gpt-4o-mini"
+MAX_IA_PARALELO = 4
+IA_MAX_CARACTERES = 8000
+IA_LOTE_CARACTERES = 1500
+IA_MAX_LOTE = 6
+IA_PRESUPUESTO_TOKENS = 200_000
+
+# PDF de las disposiciones: solo si el HTML no llega a PDF_MIN_CARACTERES_HTML o el
+# prefiltro ya da la disposición por buena; se leen en procesos aparte, página a página,
+# y se dejan de leer en cuanto aparecen los campos que faltaban en el HTML. Junto a un
+# HTML completo solo se guardan esos campos con PDF_MARGEN_CAMPO caracteres a cada lado
+PDF_MIN_CARACTERES_HTML = 500
+PDF_MARGEN_CAMPO = 150
+MAX_PROCESOS_PDF = min(4, os.cpu_count() or 1)
+PDF_MAX_BYTES = 20 * 1024 * 1024
+PDF_MAX_PAGINAS = 40
+PDF_MAX_CARACTERES = 200_000
+PDF_TIMEOUT = 60
+PDF_TAREAS_POR_PROCESO = 100
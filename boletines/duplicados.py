@@ -0,0 +1,159 @@
+"""Disposiciones casi duplicadas: extracto y orden completa, correcciones de errores o la
+réplica en el BOE de un anuncio del BOJA.
+
+Cada título se resume en una firma MinHash de sus ternas de palabras, repartida en bandas
+(LSH): dos documentos son candidatos si coinciden en alguna banda y su similitud de Jaccard
+estimada alcanza UMBRAL_DUPLICADOS, y casi duplicados si además las palabras de uno de los
+títulos están todas en el otro (salvo cifras y las propias de la publicación). Así la réplica
+en el BOE que añade el organismo al título va con la del BOJA, y dos títulos que solo se
+diferencian en el municipio no. Los
+grupos se usan al mostrar y resumir los resultados; cada publicación conserva su propio texto.
+
+Al descargar solo se ahorran las publicaciones cuyo texto no puede aportar nada: mismo título
+normalizado y mismo día que otra ya descargada o por descargar. Las correcciones de errores
+se descargan siempre, porque cambian cuantías o plazos.
+"""
+
+import hashlib
+import zlib
+from functools import lru_cache
+
+from . import avisos
+from .config import BANDAS_MINHASH, MIN_PALABRAS_DUPLICADO, PERMUTACIONES_MINHASH, UMBRAL_DUPLICADOS
+from .filtrado import normalizar_texto
+from .ranking import tokenizar
+
+# Mayor primo de 32 bits: a * h + b, con los tres por debajo de 2^32, cabe en 64 bits y el
+# módulo mezcla de verdad (con un primo mucho mayor las permutaciones saldrían correlacionadas)
+PRIMO_MINHASH = 4294967291
+
+# Distinguen las publicaciones de una misma disposición, no la disposición
+PALABRAS_PUBLICACION = frozenset(['extracto', 'correccion', 'correcciones', 'errores', 'error', 'advertidos', 'anuncio'])
+PALABRAS_CORRECCION = frozenset(['correccion', 'correcciones'])
+
+# ============= FIRMAS =============
+
+@lru_cache(maxsize=1)
+def _coeficientes():
+    import numpy as np
+
+    aleatorio = np.random.default_rng(20240101)
+    return (aleatorio.integers(1, PRIMO_MINHASH, PERMUTACIONES_MINHASH, dtype=np.uint64),
+            aleatorio.integers(0, PRIMO_MINHASH, PERMUTACIONES_MINHASH, dtype=np.uint64))
+
+def _palabras(titulo):
+    return [p for p in tokenizar(normalizar_texto(titulo or '')) if p not in PALABRAS_PUBLICACION]
+
+def vocabulario(titulo):
+    """Palabras del título que distinguen una disposición de otra (sin cifras)"""
+    return frozenset(p for p in _palabras(titulo) if not p.isdigit())
+
+def firma(titulo):
+    """Firma MinHash del título, o None si tiene muy pocas palabras para compararlo"""
+    import numpy as np
+
+    palabras = _palabras(titulo)
+    if len(palabras) < MIN_PALABRAS_DUPLICADO:
+        return None
+    # Con ternas, cambiar una sola palabra ('turístico' por 'agrícola') ya separa dos títulos largos
+    ternas = {zlib.crc32(' '.join(palabras[i:i + 3]).encode()) for i in range(len(palabras) - 2)}
+    a, b = _coeficientes()
+    hashes = np.fromiter(ternas, dtype=np.uint64, count=len(ternas))
+    return ((np.outer(a, hashes) + b[:, None]) % np.uint64(PRIMO_MINHASH)).min(axis=1)
+
+def claves_bandas(firma):
+    """Una clave (entero de 64 bits) por banda de la firma"""
+    filas = len(firma) // BANDAS_MINHASH
+    return [
+        int.from_bytes(hashlib.blake2b(bytes([i]) + firma[i * filas:(i + 1) * filas].tobytes(), digest_size=8).digest(), 'big', signed=True)
+        for i in range(BANDAS_MINHASH)
+    ]
+
+def similitud(firma_a, firma_b):
+    """Similitud de Jaccard estimada entre dos firmas"""
+    return float((firma_a == firma_b).mean())
+
+class Agrupador:
+    """Grupos de casi duplicados en memoria: cada documento va con el primero parecido que se añadió"""
+
+    def __init__(self):
+        self.bandas = {}
+        self.firmas = {}
+        self.vocabularios = {}
+
+    def representante(self, clave, firma, vocabulario=frozenset()):
+        """Clave del primer documento casi igual ya añadido; si no lo hay, se añade este y devuelve clave.
+
+        Cada título tiene que contener todas las palabras del otro o estar contenido en él: una
+        palabra distinta en cada uno ('Écija' y 'Osuna') separa dos disposiciones aunque la
+        similitud de las firmas supere el umbral.
+        """
+        if firma is None:
+            return clave
+        claves = claves_bandas(firma)
+        for banda in claves:
+            for otra in self.bandas.get(banda, ()):
+                otro_vocabulario = self.vocabularios[otra]
+                if (similitud(firma, self.firmas[otra]) >= UMBRAL_DUPLICADOS
+                        and (vocabulario <= otro_vocabulario or otro_vocabulario <= vocabulario)):
+                    return otra
+        self.firmas[clave] = firma
+        self.vocabularios[clave] = vocabulario
+        for banda in claves:
+            self.bandas.setdefault(banda, []).append(clave)
+        return clave
+
+# ============= DESCARGAS Y RESULTADOS =============
+
+def _clave_descarga(registro):
+    """(título normalizado, día) de un registro cuyo texto puede ahorrarse, o None"""
+    import pandas as pd
+    
+    palabras = tokenizar(normalizar_texto(registro.get('Título') or ''))
+    fecha = registro.get('Fecha')
+    if len(palabras) < MIN_PALABRAS_DUPLICADO or PALABRAS_CORRECCION & set(palabras) or fecha is None or pd.isna(fecha):
+        return None
+    return ' '.join(palabras), pd.Timestamp(fecha).date()
+
+def repartir_descargas(registros, guardados=()):
+    """Separa los registros que hay que descargar de las publicaciones repetidas.
+
+    Devuelve (descargar, repetidos): de cada título normalizado y día se descarga el primero,
+    salvo que uno de guardados (ya con texto en el índice) coincida; repetidos es
+    [(registro, enlace del representante)]. Las correcciones de errores, los títulos muy
+    cortos y los registros sin fecha se descargan siempre.
+    """
+    representantes = {}
+    for registro in guardados:
+        clave = _clave_descarga(registro)
+        if clave:
+            representantes.setdefault(clave, registro['Enlace'])
+    
+    descargar, repetidos = [], []
+    for registro in registros:
+        clave = _clave_descarga(registro)
+        if clave is None:
+            descargar.append(registro)
+        elif clave in representantes:
+            repetidos.append((registro, representantes[clave]))
+        else:
+            representantes[clave] = registro['Enlace']
+            descargar.append(registro)
+    return descargar, repetidos
+
+def agrupar_duplicados(df):
+    """Una fila por grupo de casi duplicados, la primera; la columna Duplicados lleva los enlaces del resto"""
+    if df is None or df.empty:
+        return df
+
+    agrupador = Agrupador()
+    grupos = [agrupador.representante(enlace, firma(titulo), vocabulario(titulo)) for enlace, titulo in zip(df['Enlace'], df['Título'])]
+    df = df.assign(Grupo=grupos)
+    es_representante = df['Enlace'] == df['Grupo']
+    duplicados = df[~es_representante].groupby('Grupo')['Enlace'].agg(list)
+
+    unicos = df[es_representante].drop(columns='Grupo')
+    unicos['Duplicados'] = [duplicados.get(enlace, []) for enlace in unicos['Enlace']]
+    if len(duplicados):
+        avisos.salida.info(f"📑 {len(df) - len(unicos)} publicaciones repetidas agrupadas en {len(duplicados)} resultados")
+    return unicos
@@ -0,0 +1,148 @@
+"""Extracción de tipo, organismo, cuantía, plazo y contexto de las palabras clave"""
+
+import re
+
+from .config import TRAMO_TEXTOS
+from .filtrado import expandir_palabras_clave
+from .indices import indice_documentos
+from .metricas import medido
+
+# ============= EXTRACCIÓN DE INFORMACIÓN =============
+
+PATRONES_TIPO = [
+    ('Resolución', re.compile(r'\b(?:resolución|resolucion)\b')),
+    ('Orden', re.compile(r'\b(?:orden)\b')),
+    ('Decreto', re.compile(r'\b(?:decreto)\b')),
+    ('Convocatoria', re.compile(r'\b(?:convocatoria)\b')),
+]
+
+PATRONES_ORGANISMO = [
+    re.compile(r'(?P<valor>Consejería de [A-Za-záéíóúñÑ\s,]+)', re.IGNORECASE),
+    re.compile(r'(?P<valor>Dirección General de [A-Za-záéíóúñÑ\s,]+)', re.IGNORECASE),
+    re.compile(r'(?P<valor>Agencia [A-Za-záéíóúñÑ\s,]+)', re.IGNORECASE),
+]
+
+PATRON_CUANTIA = re.compile(r'(?P<valor>\d{1,3}(?:\.\d{3})*(?:,\d{2})?\s*euros?)', re.IGNORECASE)
+PATRON_PLAZO = re.compile(r'(?P<valor>plazo\s+de\s+(?:presentación\s+de\s+)?solicitudes?[:\s]+[^.]{10,80})', re.IGNORECASE)
+
+# Campos que suelen estar solo en el PDF de la disposición
+PATRONES_CAMPOS = (PATRON_CUANTIA, PATRON_PLAZO)
+
+def _contexto_palabras(texto_completo, contenido, palabras_clave, expansiones):
+    contexto_palabras = []
+    for palabra_original in palabras_clave:
+        encontrada = False
+        for palabra in expansiones[palabra_original]:
+            idx = texto_completo.find(palabra)
+            if idx != -1:
+                inicio = max(0, idx - 150)
+                fin = min(len(contenido) if contenido else len(texto_completo), idx + len(palabra) + 150)
+                contexto = contenido[inicio:fin] if contenido else texto_completo[inicio:fin]
+                
+                contexto_palabras.append({
+                    'palabra': palabra_original,
+                    'encontrado_como': palabra,
+                    'contexto': f"...{contexto}..."
+                })
+                encontrada = True
+                break
+        
+        if not encontrada:
+            contexto_palabras.append({
+                'palabra': palabra_original,
+                'encontrado_como': 'No encontrada',
+                'contexto': ''
+            })
+    return contexto_palabras
+
+@medido('extraccion')
+def extraer_informacion_documento(titulo, resumen, contenido, palabras_clave):
+    texto_completo = f"{titulo} {resumen} {contenido}".lower()
+    
+    info = {
+        'tipo_documento': '',
+        'organismo': '',
+        'cuantia': '',
+        'plazo_solicitud': '',
+        'beneficiarios': '',
+        'objeto': '',
+        'contexto_palabras': []
+    }
+    
+    for tipo, patron in PATRONES_TIPO:
+        if patron.search(texto_completo):
+            info['tipo_documento'] = tipo
+            break
+    
+    for patron in PATRONES_ORGANISMO:
+        match = patron.search(texto_completo)
+        if match:
+            info['organismo'] = match.group(0).strip()
+            break
+    
+    match = PATRON_CUANTIA.search(texto_completo)
+    if match:
+        info['cuantia'] = match.group(0).strip()
+    
+    match = PATRON_PLAZO.search(texto_completo)
+    if match:
+        info['plazo_solicitud'] = match.group(0).strip()
+    
+    # Buscar contexto de palabras expandidas
+    expansiones = {p: expandir_palabras_clave([p]) for p in palabras_clave}
+    info['contexto_palabras'] = _contexto_palabras(texto_completo, contenido, palabras_clave, expansiones)
+    
+    return info
+
+@medido('extraccion')
+def extraer_informacion_documentos(df, palabras_clave):
+    """extraer_informacion_documento para todas las filas de df (mismo índice, mismos campos).
+
+    Sin columna Contenido_Completo, el texto completo de cada Enlace se lee del índice local.
+    Se procesa por tramos de TRAMO_TEXTOS filas para no tener todo el texto en memoria.
+    """
+    import pandas as pd
+    
+    expansiones = {p: expandir_palabras_clave([p]) for p in palabras_clave}
+    partes = []
+    for inicio in range(0, len(df), TRAMO_TEXTOS):
+        tramo = df.iloc[inicio:inicio + TRAMO_TEXTOS]
+        if 'Contenido_Completo' not in tramo.columns and 'Enlace' in tramo.columns:
+            tramo = tramo.assign(Contenido_Completo=list(indice_documentos.iterar_contenidos(tramo['Enlace'])))
+        partes.append(_extraer_tramo(tramo, palabras_clave, expansiones))
+    return pd.concat(partes) if partes else _extraer_tramo(df, palabras_clave, expansiones)
+
+def _extraer_tramo(df, palabras_clave, expansiones):
+    import pandas as pd
+    
+    vacio = pd.Series('', index=df.index, dtype=object)
+    contenido = df['Contenido_Completo'].fillna('').astype(str) if 'Contenido_Completo' in df.columns else vacio
+    texto = (
+        df['Título'].fillna('').astype(str) + ' ' + df['Resumen'].fillna('').astype(str) + ' ' + contenido
+    ).str.lower()
+    
+    info = pd.DataFrame(index=df.index)
+    
+    # Cada patrón solo se evalúa en las filas que los anteriores no resolvieron
+    tipo = vacio.copy()
+    for nombre, patron in PATRONES_TIPO:
+        pendientes = tipo == ''
+        tipo[pendientes] = texto[pendientes].str.contains(patron, na=False).map({True: nombre, False: ''})
+    info['tipo_documento'] = tipo
+    
+    organismo = vacio.copy()
+    for patron in PATRONES_ORGANISMO:
+        pendientes = organismo == ''
+        organismo[pendientes] = texto[pendientes].str.extract(patron, expand=False).fillna('').str.strip()
+    info['organismo'] = organismo
+    
+    info['cuantia'] = texto.str.extract(PATRON_CUANTIA, expand=False).fillna('').str.strip()
+    info['plazo_solicitud'] = texto.str.extract(PATRON_PLAZO, expand=False).fillna('').str.strip()
+    info['beneficiarios'] = ''
+    info['objeto'] = ''
+    
+    info['contexto_palabras'] = [
+        _contexto_palabras(t, c, palabras_clave, expansiones) for t, c in zip(texto, contenido)
+    ]
+    
+    return info
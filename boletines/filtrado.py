@@ -0,0 +1,249 @@
+"""Filtrado de resultados por ayudas y palabras clave con sinónimos"""
+
+import re
+from collections import Counter
+from itertools import repeat
+
+from . import avisos
+from .indices import expresion_fts, indice_documentos
+from .metricas import medido
+
+# ============= SINÓNIMOS PARA BÚSQUEDA =============
+
+SINONIMOS = {
+    'feder': ['feder', 'fondos europeos', 'fondos europeo', 'desarrollo regional', 'union europea'],
+    'feader': ['feader', 'desarrollo rural', 'agricultura'],
+    'pyme': ['pyme', 'pequeña empresa', 'mediana empresa', 'autonomo', 'autónomo'],
+    'turismo': ['turismo', 'hosteleria', 'hostelería', 'restauracion', 'restauración'],
+}
+
+def expandir_palabras_clave(palabras):
+    """Expande palabras clave con sinónimos"""
+    expandidas = []
+    for palabra in palabras:
+        palabra_lower = palabra.lower().strip()
+        if palabra_lower in SINONIMOS:
+            expandidas.extend(SINONIMOS[palabra_lower])
+        else:
+            expandidas.append(palabra_lower)
+    return list(set(expandidas))
+
+TERMINOS_AYUDAS = ['ayuda', 'ayudas', 'subvención', 'subvencion', 'subvenciones', 'convocatoria', 'convocatorias']
+
+# ============= FILTRADO CON SINÓNIMOS =============
+
+TABLA_ACENTOS = str.maketrans('áàäâéèëêíìïîóòöôúùüûñç', 'aaaaeeeeiiiioooouuuunc')
+
+def normalizar_texto(texto):
+    """Minúsculas y sin acentos, para que 'subvención' y 'subvencion' coincidan"""
+    return texto.lower().translate(TABLA_ACENTOS)
+
+class BuscadorPalabras:
+    """Expresión regular única, compilada una vez por consulta, que localiza todos los términos en una pasada"""
+
+    def __init__(self, terminos, busqueda_exacta=True):
+        self.originales = list(terminos)
+        self.terminos = list(dict.fromkeys(normalizar_texto(t) for t in self.originales))
+        self.indice = {t: self.terminos.index(normalizar_texto(t)) for t in self.originales}
+        
+        borde = r'\b' if busqueda_exacta else ''
+        patrones = [borde + re.escape(t) + borde for t in self.terminos]
+        
+        # Más largos primero; la búsqueda anticipada permite coincidencias solapadas
+        orden = sorted(range(len(self.terminos)), key=lambda i: -len(self.terminos[i]))
+        self.patron = re.compile('(?=' + '|'.join(f'(?P<t{i}>{patrones[i]})' for i in orden) + ')')
+        self.patron_alguno = re.compile('|'.join(patrones[i] for i in orden))
+        
+        # Si aparece un término, aparecen también los términos que contiene
+        self.contenidos = {
+            i: frozenset(j for j, patron in enumerate(patrones) if re.search(patron, self.terminos[i]))
+            for i in range(len(self.terminos))
+        }
+
+    def coincide(self, texto):
+        return self.patron_alguno.search(texto) is not None
+
+    def encontrar(self, texto):
+        """Índices de los términos normalizados presentes en texto (ya normalizado)"""
+        hallados = set()
+        for match in self.patron.finditer(texto):
+            hallados |= self.contenidos[int(match.lastgroup[1:])]
+        return hallados
+
+# Disposiciones que no son ayudas aunque no lo digan expresamente (texto ya normalizado)
+PATRON_DESCARTE = re.compile(
+    r'\b(?:nombramiento|nombra|cese|oposiciones|proceso selectivo|pruebas selectivas|concurso de meritos'
+    r'|provision de puestos|libre designacion|edicto|juzgado|sentencia|emplazamiento|recurso contencioso)'
+)
+
+POLITICAS_PREFILTRO = {
+    'estricta': "Solo coincidencias en título/resumen",
+    'conservadora': "Coincidencias y dudosos",
+    'completa': "Todos",
+}
+
+class Prefiltro:
+    """Decide, con título, sección y resumen, qué documentos merecen descargar el contenido completo.
+
+    'estricta' descarga solo los que ya pasan los filtros; 'conservadora' también los dudosos
+    (ni pasan ni parecen nombramientos, oposiciones o edictos); 'completa' descarga todos.
+    """
+
+    def __init__(self, palabras_clave, solo_ayudas=True, busqueda_exacta=False, politica='conservadora'):
+        self.politica = politica
+        self.ayudas = BuscadorPalabras(TERMINOS_AYUDAS) if solo_ayudas else None
+        self.palabras = BuscadorPalabras(expandir_palabras_clave(palabras_clave), busqueda_exacta) if palabras_clave else None
+
+    def clasificar(self, registro):
+        texto = normalizar_texto(f"{registro.get('Título', '')} {registro.get('Seccion', '')} {registro.get('Resumen', '')}")
+        if (not self.ayudas or self.ayudas.coincide(texto)) and (not self.palabras or self.palabras.coincide(texto)):
+            return 'pasa'
+        if PATRON_DESCARTE.search(texto):
+            return 'descartado'
+        return 'dudoso'
+
+    def necesita_contenido(self, registro):
+        if self.politica == 'completa':
+            return True
+        clase = self.clasificar(registro)
+        return clase == 'pasa' or (clase == 'dudoso' and self.politica == 'conservadora')
+
+@medido('filtrado')
+def filtrar_resultados(df, palabras_clave, solo_ayudas=True, busqueda_exacta=False, fecha_desde=None, fecha_hasta=None):
+    if df is None:
+        return filtrar_indice_local(palabras_clave, solo_ayudas, busqueda_exacta, fecha_desde, fecha_hasta)
+    
+    if df.empty:
+        return df
+    
+    import numpy as np
+    
+    if 'Tiene_Contenido' in df.columns:
+        avisos.salida.info(f"📊 {len(df)} docs, {df['Tiene_Contenido'].sum()} con contenido")
+    
+    ayudas = BuscadorPalabras(TERMINOS_AYUDAS) if solo_ayudas else None
+    if palabras_clave:
+        # Expandir palabras con sinónimos
+        palabras_expandidas = expandir_palabras_clave(palabras_clave)
+        buscador = BuscadorPalabras(palabras_expandidas, busqueda_exacta)
+    
+    # Una sola pasada fila a fila: solo el texto de la fila actual está normalizado en memoria
+    es_ayuda, hallados = [], []
+    for texto in textos_documentos(df):
+        pasa = ayudas is None or ayudas.coincide(texto)
+        es_ayuda.append(pasa)
+        hallados.append(buscador.encontrar(texto) if pasa and palabras_clave else ())
+    
+    df = df.drop(columns=['Contenido_Completo'], errors='ignore')
+    
+    if solo_ayudas:
+        df = df[np.array(es_ayuda, dtype=bool)]
+        avisos.salida.info(f"📊 Filtro ayudas: {len(df)} docs")
+    
+    if palabras_clave:
+        avisos.salida.info(f"🔍 Buscando: {', '.join(palabras_clave)} (expandido a: {', '.join(palabras_expandidas)})")
+        
+        hallados = [terminos for terminos, pasa in zip(hallados, es_ayuda) if pasa] if solo_ayudas else hallados
+        conteo = {}
+        for terminos in hallados:
+            for i in terminos:
+                conteo[i] = conteo.get(i, 0) + 1
+        
+        for palabra in palabras_expandidas:
+            n = conteo.get(buscador.indice[palabra], 0)
+            if n > 0:
+                avisos.salida.info(f"  ✓ '{palabra}': {n} docs")
+        
+        df = df[np.array([bool(terminos) for terminos in hallados], dtype=bool)]
+    
+    return df
+
+def textos_documentos(df):
+    """Título, resumen y texto completo normalizados de cada fila, de uno en uno.
+
+    El texto completo sale de la columna Contenido_Completo si existe o, para las filas con
+    Longitud_Contenido, del índice local por tramos.
+    """
+    cabeceras = df['Título'].fillna('').astype(str) + ' ' + df['Resumen'].fillna('').astype(str)
+    if 'Contenido_Completo' in df.columns:
+        contenidos = df['Contenido_Completo'].fillna('').astype(str)
+    elif 'Longitud_Contenido' in df.columns:
+        contenidos = indice_documentos.iterar_contenidos(df['Enlace'].where(df['Longitud_Contenido'].fillna(0) > 0))
+    else:
+        contenidos = repeat('')
+    
+    for cabecera, contenido in zip(cabeceras, contenidos):
+        yield normalizar_texto(f"{cabecera} {contenido}" if contenido else cabecera)
+
+class FiltroIncremental:
+    """El criterio de filtrar_resultados aplicado a tandas de registros, para mostrar los
+    resultados según llegan sin volver a filtrar los ya vistos.
+
+    Lleva la cuenta de lo que pasa el filtro de ayudas y de los documentos con cada término,
+    para dar con avisar() el mismo resumen que filtrar_resultados. Un registro que se vuelve a
+    filtrar (al llegar su texto completo) cuenta una vez, con su último resultado.
+    """
+
+    def __init__(self, palabras_clave, solo_ayudas=True, busqueda_exacta=False):
+        self.palabras_clave = list(palabras_clave or [])
+        self.ayudas = BuscadorPalabras(TERMINOS_AYUDAS) if solo_ayudas else None
+        self.palabras = BuscadorPalabras(expandir_palabras_clave(palabras_clave), busqueda_exacta) if palabras_clave else None
+        self.hallados = {}
+
+    def filtrar(self, registros):
+        """Los registros que pasan; el texto completo se lee del índice local"""
+        registros = list(registros)
+        contenidos = indice_documentos.iterar_contenidos(r['Enlace'] if r.get('Longitud_Contenido') else None for r in registros)
+        aceptados = []
+        for r, contenido in zip(registros, contenidos):
+            texto = normalizar_texto(f"{r.get('Título') or ''} {r.get('Resumen') or ''} {contenido}")
+            # None: no pasa el filtro de ayudas; si no, los términos encontrados
+            terminos = None
+            if not self.ayudas or self.ayudas.coincide(texto):
+                terminos = self.palabras.encontrar(texto) if self.palabras else frozenset()
+            self.hallados[r.get('Enlace') or id(r)] = terminos
+            if terminos is not None and (not self.palabras or terminos):
+                aceptados.append(r)
+        return aceptados
+
+    def avisar(self):
+        """Resumen de lo filtrado hasta ahora: documentos de ayudas y documentos por término"""
+        if self.ayudas:
+            avisos.salida.info(f"📊 Filtro ayudas: {sum(t is not None for t in self.hallados.values())} docs")
+        if not self.palabras:
+            return
+        avisos.salida.info(f"🔍 Buscando: {', '.join(self.palabras_clave)} (expandido a: {', '.join(self.palabras.originales)})")
+        conteo = Counter(i for terminos in self.hallados.values() if terminos for i in terminos)
+        for palabra in self.palabras.originales:
+            n = conteo[self.palabras.indice[palabra]]
+            if n > 0:
+                avisos.salida.info(f"  ✓ '{palabra}': {n} docs")
+
+@medido('filtrado')
+def filtrar_indice_local(palabras_clave, solo_ayudas=True, busqueda_exacta=False, fecha_desde=None, fecha_hasta=None, boletin=None):
+    """Filtrado de filtrar_resultados resuelto con el índice FTS5, sin cargar el corpus.
+
+    Con búsqueda exacta ambos dan lo mismo. Sin ella, FTS5 solo busca por comienzo de palabra
+    ("pyme"* encuentra "pymes" pero no "micropyme"), mientras que filtrar_resultados busca el
+    término en cualquier parte del texto.
+    """
+    condiciones = []
+    if solo_ayudas:
+        condiciones.append(expresion_fts(TERMINOS_AYUDAS))
+    
+    if palabras_clave:
+        palabras_expandidas = expandir_palabras_clave(palabras_clave)
+        avisos.salida.info(f"🔍 Buscando en índice local: {', '.join(palabras_clave)} (expandido a: {', '.join(palabras_expandidas)})")
+        
+        for palabra in palabras_expandidas:
+            n = indice_documentos.contar(
+                ' AND '.join(condiciones + [expresion_fts([palabra], busqueda_exacta)]), fecha_desde, fecha_hasta, boletin
+            )
+            if n > 0:
+                avisos.salida.info(f"  ✓ '{palabra}': {n} docs")
+        
+        condiciones.append(expresion_fts(palabras_expandidas, busqueda_exacta))
+    
+    df = indice_documentos.consultar(' AND '.join(condiciones), fecha_desde, fecha_hasta, boletin)
+    avisos.salida.info(f"📚 Índice local: {len(df)} docs")
+    return df
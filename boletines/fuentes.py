@@ -0,0 +1,695 @@
+"""Fuentes de documentos: feeds BOJA/BOE, recorrido histórico de boletines BOJA y sumarios del BOE"""
+
+import re
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urljoin
+
+from . import analisis, avisos
+from .config import MAX_DESCARGAS, MAX_DIAS_PARALELO, PDF_MARGEN_CAMPO, PDF_MIN_CARACTERES_HTML, URL_BOE, URL_BOJA
+from .extraccion import PATRONES_CAMPOS
+from .indices import diario_recorridos, indice_boletines, indice_documentos, leer_fecha_boletin
+from .metricas import medido
+from .red import ejecutar_concurrente, iterar_concurrente, pagina_definitiva, publicado_del_todo, session
+
+PATRON_PDF = re.compile(r'\.pdf$', re.IGNORECASE)
+PATRON_SECCION = re.compile(r'/s\d+')
+PATRON_DOCUMENTO = re.compile(r'/\d+$')
+
+# ============= DESCARGA DE CONTENIDO =============
+
+@medido('contenido')
+def completar_contenidos(registros, prefiltro=None, progreso=None):
+    """Descarga el texto completo de los registros que lo necesitan según el prefiltro.
+
+    Cada texto se guarda en el índice local en cuanto llega y el registro solo conserva
+    Longitud_Contenido; el texto se relee con indice_documentos.iterar_contenidos. Los que ya
+    tienen texto en el índice no se descargan de nuevo, ni las publicaciones repetidas: mismo
+    título normalizado y mismo día que otra descargada (ver duplicados.repartir_descargas).
+    Estas se quedan sin texto, nunca con el de otro enlace, y al mostrar los resultados van en
+    el grupo de la descargada. Las correcciones de errores se descargan siempre.
+    """
+    for _ in iterar_completados(registros, prefiltro, progreso):
+        pass
+    return registros
+
+def iterar_completados(registros, prefiltro=None, progreso=None):
+    """completar_contenidos registro a registro: genera cada uno en cuanto está completo.
+
+    Primero los que no se descargan (no lo necesitan o ya están en el índice), después los
+    descargados según terminan y al final las publicaciones repetidas de uno descargado.
+    """
+    from .duplicados import repartir_descargas
+    
+    seleccion = [r for r in registros if r.get('Enlace') and (prefiltro is None or prefiltro.necesita_contenido(r))]
+    guardados = indice_documentos.longitudes(r['Enlace'] for r in seleccion)
+    for r in seleccion:
+        r['Longitud_Contenido'] = guardados.get(r['Enlace'], 0)
+    pendientes, repetidos = repartir_descargas(
+        [r for r in seleccion if r['Enlace'] not in guardados],
+        [r for r in seleccion if r['Enlace'] in guardados],
+    )
+    
+    en_espera = {id(r) for r in pendientes} | {id(r) for r, _ in repetidos}
+    yield from (r for r in registros if id(r) not in en_espera)
+    
+    def descargar(registro):
+        leer_pdf = prefiltro is not None and prefiltro.clasificar(registro) == 'pasa'
+        texto = extraer_contenido_completo(registro['Enlace'], url_pdf=registro.get('Enlace_PDF'), leer_pdf=leer_pdf)
+        if texto:
+            indice_documentos.guardar([dict(registro, Contenido_Completo=texto)])
+        return len(texto)
+    
+    descargados = dict(guardados)
+    for hechos, (i, longitud) in enumerate(iterar_concurrente(descargar, pendientes, por_defecto=0), 1):
+        pendientes[i]['Longitud_Contenido'] = descargados[pendientes[i]['Enlace']] = longitud
+        if progreso:
+            progreso(hechos, len(pendientes))
+        yield pendientes[i]
+    
+    if repetidos:
+        yield from (r for r, representante in repetidos if descargados.get(representante))
+        # Si el representante no se pudo descargar, se descargan las demás publicaciones
+        sin_representante = [r for r, representante in repetidos if not descargados.get(representante)]
+        for i, longitud in iterar_concurrente(descargar, sin_representante, por_defecto=0):
+            sin_representante[i]['Longitud_Contenido'] = longitud
+            yield sin_representante[i]
+        avisos.log.info(f"📑 {len(repetidos) - len(sin_representante)} publicaciones repetidas sin descargar")
+
+# ============= BÚSQUEDA =============
+
+def extraer_contenido_completo(url, max_intentos=1, url_pdf=None, leer_pdf=False):
+    """Texto de la disposición; el PDF se lee si el HTML está vacío o es muy corto o, con
+    leer_pdf (el prefiltro ya la da por buena), para los campos que le falten al HTML.
+
+    Los reintentos por errores de red o 5xx los hace la sesión; max_intentos repite además
+    la petición completa.
+    """
+    if url.lower().endswith('.pdf'):
+        return texto_de_pdf(url)
+    
+    contenido = ""
+    for intento in range(max_intentos):
+        try:
+            response = session.get(url, timeout=20)
+            response.raise_for_status()
+            arbol = analisis.documento(response.text)
+            if url_pdf is None:
+                enlace = analisis.primer_enlace(arbol, PATRON_PDF)
+                if enlace:
+                    url_pdf = urljoin(url, enlace)
+            contenido = analisis.texto_visible(arbol)
+            break
+        except:
+            continue
+    
+    corto = len(contenido) < PDF_MIN_CARACTERES_HTML
+    if not url_pdf or not (corto or leer_pdf):
+        return contenido
+    faltan = [p for p in PATRONES_CAMPOS if not p.search(contenido)]
+    if not faltan:
+        return contenido
+    
+    texto_pdf = texto_de_pdf(url_pdf, faltan)
+    if corto:
+        return texto_pdf if len(texto_pdf) > len(contenido) else contenido
+    # Con el HTML completo, del PDF solo los campos que faltaban: el texto no se duplica
+    campos = []
+    for patron in faltan:
+        match = patron.search(texto_pdf)
+        if match:
+            campos.append(texto_pdf[max(0, match.start() - PDF_MARGEN_CAMPO):match.end() + PDF_MARGEN_CAMPO])
+    return ' '.join([contenido, *campos])
+
+def texto_de_pdf(url, patrones_parada=PATRONES_CAMPOS):
+    from .pdf import descargar_pdf, extraer_texto_pdf
+    
+    datos = descargar_pdf(session, url)
+    return extraer_texto_pdf(datos, patrones_parada) if datos else ""
+
+def buscar_boja_feed(contenido_completo=False, prefiltro=None):
+    import pandas as pd
+    import feedparser
+    
+    resultados = []
+    try:
+        response = session.get(f"{URL_BOJA}/boja/distribucion/boja.xml", timeout=20)
+        feed = feedparser.parse(response.content)
+        
+        for entry in feed.entries:
+            titulo = entry.get('title', '')
+            enlace = entry.get('link', '')
+            
+            if any(x in enlace for x in ['/temas/', '/organismos/']) or '/boja/' not in enlace:
+                continue
+            
+            # La fecha del feed no va al índice de boletines: solo la de la página del boletín es cierta
+            fecha = pd.to_datetime(entry.get('published', ''), errors='coerce', utc=True)
+            if pd.notna(fecha):
+                fecha = fecha.tz_localize(None)
+            
+            resultados.append({
+                'Boletín': 'BOJA',
+                'Título': titulo,
+                'Resumen': analisis.texto_fragmento(entry.get('summary', ''))[:300],
+                'Longitud_Contenido': 0,
+                'Enlace': enlace,
+                'Fecha': fecha
+            })
+        
+        if contenido_completo:
+            completar_contenidos(resultados, prefiltro)
+        
+        indice_documentos.guardar(resultados)
+    except:
+        pass
+    return resultados
+
+def buscar_boe_rss(contenido_completo=False):
+    import pandas as pd
+    import feedparser
+    
+    resultados = []
+    try:
+        response = session.get(f"{URL_BOE}/rss/boe.php", timeout=20)
+        feed = feedparser.parse(response.content)
+        
+        for entry in feed.entries:
+            fecha = pd.to_datetime(entry.get('published', ''), errors='coerce', utc=True)
+            if pd.notna(fecha):
+                fecha = fecha.tz_localize(None)
+            
+            resultados.append({
+                'Boletín': 'BOE',
+                'Título': entry.get('title', ''),
+                'Resumen': analisis.texto_fragmento(entry.get('summary', ''))[:300],
+                'Longitud_Contenido': 0,
+                'Enlace': entry.get('link', ''),
+                'Fecha': fecha
+            })
+        
+        indice_documentos.guardar(resultados)
+    except:
+        pass
+    return resultados
+
+# ============= BOJA HISTÓRICO =============
+
+@medido('secciones')
+def extraer_secciones_boja(url_boletin):
+    secciones = []
+    try:
+        response = session.get(url_boletin, timeout=15)
+        if response.status_code == 200:
+            for href, titulo in analisis.enlaces(analisis.documento(response.text)):
+                if PATRON_SECCION.search(href):
+                    url = f"{URL_BOJA}{href}" if href.startswith('/') else href
+                    secciones.append({'titulo': titulo, 'url': url})
+            return list({s['url']: s for s in secciones}.values())
+    except:
+        pass
+    return []
+
+@medido('secciones')
+def extraer_documentos_de_seccion(url_seccion):
+    documentos = diario_recorridos.leer(url_seccion)
+    if documentos is not None:
+        return documentos
+    
+    documentos = []
+    try:
+        response = session.get(url_seccion, timeout=15)
+        if response.status_code == 200:
+            for href, titulo in analisis.enlaces(analisis.documento(response.text)):
+                if PATRON_DOCUMENTO.search(href) and '/s' not in href and len(titulo) > 10:
+                    url = f"{URL_BOJA}{href}" if href.startswith('/') else href
+                    documentos.append({'titulo': titulo, 'url': url})
+            documentos = list({d['url']: d for d in documentos}.values())
+            # Una sección sin enlaces a disposiciones o de un boletín reciente puede estar aún
+            # publicándose: no se da por terminada
+            if documentos and pagina_definitiva(url_seccion):
+                diario_recorridos.guardar(url_seccion, documentos)
+            return documentos
+    except:
+        pass
+    return []
+
+def url_boletin(año, num_boletin, variante='boja'):
+    return f"{URL_BOJA}/{variante}/{año}/{str(num_boletin).zfill(3)}/"
+
+class BoletinNoDisponible(Exception):
+    """El boletín no se ha podido consultar (red, error del servidor o página sin fecha): no consta que no exista"""
+
+@medido('sondeo')
+def sondear_boletin(año, num_boletin, revalidar=False):
+    """Fecha de publicación y variante de URL de un boletín; consulta antes el índice.
+
+    Devuelve None solo si ninguna variante existe (404); si alguna no se ha podido consultar
+    lanza BoletinNoDisponible. Con revalidar no se usa un "no encontrado" guardado en caché
+    (boletines recién publicados).
+    """
+    conocido = indice_boletines.obtener(año, num_boletin)
+    if conocido:
+        return conocido
+    
+    cabeceras = {'Cache-Control': 'no-cache'} if revalidar else None
+    fallo = None
+    for variante in ('boja', 'eboja'):
+        try:
+            response = session.get(url_boletin(año, num_boletin, variante), timeout=8, headers=cabeceras)
+        except Exception as e:
+            fallo = e
+            continue
+        if response.status_code == 404:
+            continue
+        if response.status_code != 200:
+            fallo = f"HTTP {response.status_code}"
+            continue
+        fecha = leer_fecha_boletin(analisis.cabecera_boletin(analisis.documento(response.text)))
+        if not fecha:
+            fallo = "página sin fecha de publicación"
+            continue
+        indice_boletines.registrar(año, num_boletin, fecha, variante)
+        return fecha, variante
+    
+    if fallo:
+        raise BoletinNoDisponible(f"BOJA {num_boletin}/{año}: {fallo}")
+    return None
+
+def buscar_en_boletin_completo(año, num_boletin, fecha_publicacion, contenido_completo=False, progress_container=None, variante=None, prefiltro=None):
+    # Un boletín ya recorrido entero se lee del diario; sus fechas se reponen
+    clave = f"boja/{año}/{num_boletin:03d}"
+    resultados = diario_recorridos.leer(clave)
+    if resultados is not None:
+        for r in resultados:
+            r['Fecha'] = fecha_publicacion
+        return _completar_boletin(resultados, contenido_completo, progress_container, prefiltro)
+    
+    resultados = []
+    if variante:
+        url_valida = url_boletin(año, num_boletin, variante)
+    else:
+        url_valida = None
+        for url in [url_boletin(año, num_boletin, 'boja'), url_boletin(año, num_boletin, 'eboja')]:
+            try:
+                response = session.get(url, timeout=10)
+                if response.status_code == 200:
+                    url_valida = url
+                    break
+            except:
+                continue
+    
+    if not url_valida:
+        return []
+    
+    secciones = extraer_secciones_boja(url_valida)
+    documentos_por_seccion = ejecutar_concurrente(
+        lambda seccion: extraer_documentos_de_seccion(seccion['url']), secciones, por_defecto=[]
+    )
+    # Completo si se han leído todas las secciones y el boletín ya no puede cambiar; si no, la
+    # próxima vez solo se piden las secciones que faltan
+    completo = (publicado_del_todo(fecha_publicacion) and bool(secciones)
+                and all(diario_recorridos.leer(seccion['url']) is not None for seccion in secciones))
+    
+    for seccion, documentos in zip(secciones, documentos_por_seccion):
+        for doc in documentos:
+            resultados.append({
+                'Boletín': 'BOJA',
+                'Título': doc['titulo'],
+                'Resumen': f"BOJA {num_boletin}/{año} - {seccion['titulo']}",
+                'Longitud_Contenido': 0,
+                'Enlace': doc['url'],
+                'Fecha': fecha_publicacion,
+                'Seccion': seccion['titulo'],
+                'Numero_Boletin': num_boletin,
+                'Tiene_Contenido': False
+            })
+    
+    if completo:
+        diario_recorridos.guardar(clave, resultados)
+    return _completar_boletin(resultados, contenido_completo, progress_container, prefiltro)
+
+def _completar_boletin(resultados, contenido_completo, progress_container, prefiltro):
+    if contenido_completo:
+        def progreso(hechos, total):
+            if progress_container:
+                progress_container.text(f"    📄 {hechos}/{total} documentos descargados")
+        
+        completar_contenidos(resultados, prefiltro, progreso)
+        for r in resultados:
+            r['Tiene_Contenido'] = r['Longitud_Contenido'] > 0
+    
+    indice_documentos.guardar(resultados)
+    return resultados
+
+@medido('sondeo')
+def localizar_boletin(año, fecha_buscar, progress_detail=None):
+    """Número y variante del boletín publicado en fecha_buscar, o None si ese día no hubo boletín.
+
+    Si un sondeo falla se propaga BoletinNoDisponible: el rango solo se acota con respuestas ciertas.
+    """
+    conocido = indice_boletines.por_fecha(fecha_buscar)
+    if conocido:
+        if progress_detail:
+            progress_detail.text(f"    📚 En índice: BOJA {conocido[0]}")
+        return conocido
+    
+    # Acotar con los boletines ya indexados a ambos lados de la fecha
+    anterior, posterior = indice_boletines.vecinos(fecha_buscar)
+    minimo = anterior + 1 if anterior else 1
+    maximo = posterior - 1 if posterior else 250
+    
+    # Extremos conocidos (número, fecha) para interpolar
+    bajo = (anterior, indice_boletines.obtener(año, anterior)[0]) if anterior else (0, datetime(año - 1, 12, 31))
+    alto = (posterior, indice_boletines.obtener(año, posterior)[0]) if posterior else (maximo + 1, datetime(año + 1, 1, 1))
+    
+    biseccion = False
+    while minimo <= maximo:
+        if biseccion:
+            num_boletin = (minimo + maximo) // 2
+        else:
+            proporcion = (fecha_buscar - bajo[1]) / (alto[1] - bajo[1])
+            num_boletin = bajo[0] + round(proporcion * (alto[0] - bajo[0]))
+            num_boletin = max(minimo, min(maximo, num_boletin))
+        
+        if progress_detail:
+            progress_detail.text(f"    🔍 Probando BOJA {num_boletin} (rango {minimo}-{maximo})...")
+        
+        amplitud = maximo - minimo
+        sondeo = sondear_boletin(año, num_boletin)
+        
+        if sondeo is None:
+            # Número aún no publicado (404): el boletín buscado es anterior
+            maximo = num_boletin - 1
+        else:
+            fecha, variante = sondeo
+            if fecha.date() == fecha_buscar.date():
+                if progress_detail:
+                    progress_detail.text(f"    ✅ ENCONTRADO! BOJA {num_boletin}")
+                return num_boletin, variante
+            
+            if fecha < fecha_buscar:
+                minimo = num_boletin + 1
+                bajo = (num_boletin, fecha)
+            else:
+                maximo = num_boletin - 1
+                alto = (num_boletin, fecha)
+        
+        # Si la interpolación no ha reducido el rango a la mitad, bisecar
+        biseccion = (maximo - minimo) > amplitud / 2
+    
+    # Boletines consecutivos a ambos lados: ese día no hubo publicación
+    if progress_detail:
+        progress_detail.text("    📭 Sin boletín ese día")
+    return None
+
+def encontrar_boletin_por_fecha(año, fecha_buscar, contenido_completo=False, progress_detail=None, prefiltro=None):
+    import pandas as pd
+    
+    clave = f"boja/dia/{fecha_buscar.strftime('%Y-%m-%d')}"
+    if diario_recorridos.leer(clave) is not None:
+        return []
+    
+    try:
+        localizado = localizar_boletin(año, fecha_buscar, progress_detail)
+    except BoletinNoDisponible as e:
+        # Sin respuesta cierta no se anota nada: el día se vuelve a buscar en el próximo recorrido
+        avisos.log.warning(f"{fecha_buscar.strftime('%d/%m/%Y')}: {e}")
+        return []
+    if not localizado:
+        # Solo se anota como día sin boletín si los publicados antes y después son consecutivos
+        anterior, posterior = indice_boletines.vecinos(fecha_buscar)
+        if anterior and posterior == anterior + 1:
+            diario_recorridos.guardar(clave, [])
+        return []
+    num_boletin, variante = localizado
+    return buscar_en_boletin_completo(año, num_boletin, pd.to_datetime(fecha_buscar), contenido_completo, progress_detail, variante, prefiltro)
+
+def buscar_boja_historico(fecha_inicio, fecha_fin, contenido_completo=False, prefiltro=None):
+    dias_antiguedad = (datetime.now() - fecha_fin).days
+    
+    if dias_antiguedad <= 30:
+        avisos.salida.info("🔍 Fechas recientes (RSS)")
+        return buscar_boja_feed_filtrado_por_fechas(fecha_inicio, fecha_fin, contenido_completo, prefiltro)
+    else:
+        avisos.salida.info(f"🔍 Búsqueda exhaustiva ({dias_antiguedad} días)")
+        return buscar_boja_historico_exhaustivo(fecha_inicio, fecha_fin, contenido_completo, prefiltro)
+
+def buscar_boja_feed_filtrado_por_fechas(fecha_inicio, fecha_fin, contenido_completo=False, prefiltro=None):
+    import pandas as pd
+    
+    resultados = buscar_boja_feed(contenido_completo=False)
+    if not resultados:
+        return []
+    
+    df = pd.DataFrame(resultados)
+    if 'Fecha' in df.columns:
+        mascara = (df['Fecha'] >= pd.to_datetime(fecha_inicio)) & (df['Fecha'] <= pd.to_datetime(fecha_fin))
+        df = df[mascara]
+    
+    resultados = df.to_dict('records')
+    
+    if contenido_completo:
+        completar_contenidos(resultados, prefiltro)
+        indice_documentos.guardar(resultados)
+    
+    return resultados
+
+def buscar_boja_historico_exhaustivo(fecha_inicio, fecha_fin, contenido_completo=False, prefiltro=None):
+    por_dia = dict(_recorrer_boja_historico(fecha_inicio, fecha_fin, contenido_completo, prefiltro))
+    return [doc for i in sorted(por_dia) for doc in por_dia[i]]
+
+def iterar_boja_historico(fecha_inicio, fecha_fin):
+    """Registros del histórico BOJA por tandas y sin contenido completo: las fechas recientes de
+    una vez, desde el feed, y las demás día a día según termina cada uno"""
+    dias_antiguedad = (datetime.now() - fecha_fin).days
+    if dias_antiguedad <= 30:
+        avisos.salida.info("🔍 Fechas recientes (RSS)")
+        yield buscar_boja_feed_filtrado_por_fechas(fecha_inicio, fecha_fin)
+        return
+    
+    avisos.salida.info(f"🔍 Búsqueda exhaustiva ({dias_antiguedad} días)")
+    for _, docs in _recorrer_boja_historico(fecha_inicio, fecha_fin):
+        yield docs
+
+class _EtapasDias:
+    """Última etapa de cada día en curso del recorrido exhaustivo.
+
+    Los hilos del recorrido la anotan con para(fecha).text(...), la misma interfaz de
+    st.empty(); el hilo principal la muestra con resumen(), porque Streamlit solo pinta desde él.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.etapas = {}
+
+    def para(self, fecha):
+        return _EtapaDia(self, fecha)
+
+    def anotar(self, fecha, texto):
+        with self.lock:
+            self.etapas[fecha] = texto.strip()
+
+    def terminar(self, fecha):
+        with self.lock:
+            self.etapas.pop(fecha, None)
+
+    def resumen(self):
+        with self.lock:
+            return " · ".join(f"{fecha.strftime('%d/%m/%Y')} {texto}" for fecha, texto in sorted(self.etapas.items()))
+
+class _EtapaDia:
+    def __init__(self, etapas, fecha):
+        self.etapas = etapas
+        self.fecha = fecha
+
+    def text(self, texto):
+        self.etapas.anotar(self.fecha, texto)
+
+def _recorrer_boja_historico(fecha_inicio, fecha_fin, contenido_completo=False, prefiltro=None):
+    """Recorrido exhaustivo con su progreso y mensajes: genera (día, registros) según termina cada día"""
+    progress_text = avisos.salida.empty()
+    progress_detail = avisos.salida.empty()
+    progress_bar = avisos.salida.progress(0)
+    
+    total_dias = (fecha_fin - fecha_inicio).days + 1
+    fechas = [fecha_inicio + timedelta(days=i) for i in range(total_dias)]
+    
+    avisos.salida.info("🔄 Búsqueda exhaustiva...")
+    
+    # Días ya recorridos en una ejecución anterior, terminada o interrumpida: se leen del diario
+    claves = []
+    for fecha in fechas:
+        conocido = indice_boletines.por_fecha(fecha)
+        claves.append(f"boja/{fecha.year}/{conocido[0]:03d}" if conocido else f"boja/dia/{fecha.strftime('%Y-%m-%d')}")
+    reanudados = len(diario_recorridos.terminadas(claves))
+    if reanudados:
+        avisos.salida.info(f"♻️ {reanudados} de {total_dias} días ya recorridos: solo se descarga lo que falta")
+    
+    if contenido_completo:
+        avisos.salida.warning("⚠️ DESCARGA ACTIVADA")
+    
+    # Los días terminan en cualquier orden; los mensajes se emiten por fecha
+    terminados = {}
+    siguiente = 0
+    total_docs = total_con_contenido = 0
+    etapas = _EtapasDias()
+    
+    def al_completar(i, docs_encontrados):
+        nonlocal siguiente
+        terminados[i] = docs_encontrados
+        etapas.terminar(fechas[i])
+        en_curso = etapas.resumen()
+        progress_detail.text(f"    ✔️ {fechas[i].strftime('%d/%m/%Y')} procesado" + (f" · {en_curso}" if en_curso else ""))
+        
+        while siguiente in terminados:
+            fecha_actual = fechas[siguiente]
+            docs_encontrados = terminados.pop(siguiente)
+            
+            if docs_encontrados:
+                con_contenido = sum(1 for d in docs_encontrados if d.get('Tiene_Contenido', False))
+                if contenido_completo:
+                    avisos.salida.success(f"✅ {fecha_actual.strftime('%d/%m/%Y')}: {len(docs_encontrados)} docs ({con_contenido} con contenido)")
+                else:
+                    avisos.salida.success(f"✅ {fecha_actual.strftime('%d/%m/%Y')}: {len(docs_encontrados)} docs")
+            else:
+                avisos.salida.warning(f"⚠️ {fecha_actual.strftime('%d/%m/%Y')}: No encontrado")
+            siguiente += 1
+    
+    try:
+        for hechos, (i, docs) in enumerate(iterar_concurrente(
+            lambda fecha: encontrar_boletin_por_fecha(fecha.year, fecha, contenido_completo, etapas.para(fecha), prefiltro),
+            fechas, max_workers=MAX_DIAS_PARALELO, por_defecto=[]
+        ), 1):
+            al_completar(i, docs)
+            progress_bar.progress(hechos / total_dias)
+            progress_text.text(f"📅 {hechos}/{total_dias} días")
+            total_docs += len(docs)
+            total_con_contenido += sum(1 for d in docs if d.get('Tiene_Contenido', False))
+            yield i, docs
+    finally:
+        progress_bar.empty()
+        progress_text.empty()
+        progress_detail.empty()
+    
+    if total_docs:
+        avisos.salida.success(f"✅ Completado: {total_docs} docs ({total_con_contenido} con contenido)")
+    else:
+        avisos.salida.error("❌ No se encontraron documentos")
+
+# ============= BOE HISTÓRICO =============
+
+def url_sumario_boe(fecha):
+    return f"{URL_BOE}/datosabiertos/api/boe/sumario/{fecha.strftime('%Y%m%d')}"
+
+@medido('analisis')
+def leer_sumario_boe(contenido, fecha):
+    """Disposiciones de un sumario XML de la API de datos abiertos del BOE"""
+    import xml.etree.ElementTree as ET
+    import pandas as pd
+    
+    raiz = ET.fromstring(contenido)
+    resultados = []
+    for diario in raiz.iter('diario'):
+        numero = diario.get('numero')
+        for seccion in diario.iter('seccion'):
+            for departamento in seccion.iter('departamento'):
+                for item in departamento.iter('item'):
+                    url_pdf = (item.findtext('url_pdf') or '').strip()
+                    enlace = (item.findtext('url_html') or '').strip() or url_pdf
+                    resultados.append({
+                        'Boletín': 'BOE',
+                        'Título': (item.findtext('titulo') or '').strip(),
+                        'Resumen': f"BOE {numero}/{fecha.year} - {seccion.get('nombre', '')} - {departamento.get('nombre', '')}",
+                        'Longitud_Contenido': 0,
+                        'Enlace': enlace,
+                        'Enlace_PDF': url_pdf or None,
+                        'Fecha': pd.Timestamp(fecha.date()),
+                        'Seccion': seccion.get('nombre', ''),
+                        'Numero_Boletin': int(numero) if numero and numero.isdigit() else None,
+                        'Tiene_Contenido': False
+                    })
+    return resultados
+
+def sumario_boe(fecha, revalidar=False):
+    """Disposiciones del BOE de un día; lista vacía si ese día no hubo BOE"""
+    import pandas as pd
+    
+    # Los sumarios publicados del todo no cambian: se leen del diario si ya se recorrieron
+    clave = f"boe/{fecha.strftime('%Y-%m-%d')}"
+    if not revalidar:
+        registros = diario_recorridos.leer(clave)
+        if registros is not None:
+            for r in registros:
+                r['Fecha'] = pd.Timestamp(fecha.date())
+            return registros
+    
+    cabeceras = {'Accept': 'application/xml'}
+    if revalidar:
+        cabeceras['Cache-Control'] = 'no-cache'
+    response = session.get(url_sumario_boe(fecha), timeout=20, headers=cabeceras)
+    if response.status_code == 404:
+        return []
+    response.raise_for_status()
+    registros = leer_sumario_boe(response.content, fecha)
+    if not revalidar and publicado_del_todo(fecha):
+        diario_recorridos.guardar(clave, registros)
+    return registros
+
+def buscar_boe_historico(fecha_inicio, fecha_fin, contenido_completo=False, prefiltro=None):
+    por_dia = dict(_recorrer_boe_historico(fecha_inicio, fecha_fin))
+    resultados = [doc for i in sorted(por_dia) if por_dia[i] for doc in por_dia[i]]
+    
+    if contenido_completo:
+        completar_contenidos(resultados, prefiltro)
+        for r in resultados:
+            r['Tiene_Contenido'] = r['Longitud_Contenido'] > 0
+    
+    indice_documentos.guardar(resultados)
+    return resultados
+
+def iterar_boe_historico(fecha_inicio, fecha_fin):
+    """Disposiciones del BOE por sumarios, sin contenido completo, según se leen"""
+    for _, docs in _recorrer_boe_historico(fecha_inicio, fecha_fin):
+        if docs:
+            indice_documentos.guardar(docs)
+            yield docs
+
+def _recorrer_boe_historico(fecha_inicio, fecha_fin):
+    """Sumarios del BOE con su progreso y mensajes: genera (día, registros) según se leen,
+    con None en los días cuyo sumario no se ha podido leer"""
+    progress_text = avisos.salida.empty()
+    progress_bar = avisos.salida.progress(0)
+    
+    total_dias = (fecha_fin - fecha_inicio).days + 1
+    fechas = [fecha_inicio + timedelta(days=i) for i in range(total_dias)]
+    hoy = datetime.now().date()
+    
+    avisos.salida.info(f"🔄 Sumarios BOE ({total_dias} días)...")
+    
+    fallidos = []
+    total_docs = sumarios = 0
+    try:
+        # El sumario de hoy puede no estar publicado todavía: no se reutiliza un 404 guardado
+        for hechos, (i, docs) in enumerate(iterar_concurrente(
+            lambda fecha: sumario_boe(fecha, revalidar=fecha.date() >= hoy),
+            fechas, max_workers=MAX_DESCARGAS, por_defecto=None
+        ), 1):
+            progress_bar.progress(hechos / total_dias)
+            progress_text.text(f"📅 {hechos}/{total_dias} sumarios")
+            if docs is None:
+                fallidos.append(fechas[i])
+            elif docs:
+                total_docs += len(docs)
+                sumarios += 1
+            yield i, docs
+    finally:
+        progress_bar.empty()
+        progress_text.empty()
+    
+    if fallidos:
+        avisos.salida.warning(f"⚠️ Sumarios BOE no disponibles: {', '.join(f.strftime('%d/%m/%Y') for f in sorted(fallidos))}")
+    if total_docs:
+        avisos.salida.success(f"✅ BOE: {total_docs} docs en {sumarios} sumarios")
+    else:
+        avisos.salida.error("❌ No se encontraron documentos en el BOE")
@@ -0,0 +1,255 @@
+"""Resúmenes y búsqueda inteligente con OpenAI"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from . import avisos
+from .config import (
+    CACHE_DIR, ESTADOS_REINTENTO, IA_LOTE_CARACTERES, IA_MAX_CARACTERES, IA_MAX_LOTE, IA_PRESUPUESTO_TOKENS,
+    MAX_IA_PARALELO, MODELO_IA, REINTENTOS,
+)
+from .metricas import medido
+from .red import ejecutar_concurrente, leer_retry_after, limitador_host
+
+PROMPT_SISTEMA = "Eres experto en ayudas españolas."
+CAMPOS_RESUMEN = "tipo, beneficiarios, cuantia, plazo, resumen"
+
+# ============= CACHÉ DE RESÚMENES =============
+
+class CacheResumenes:
+    """Resúmenes en SQLite, indexados por hash del texto enviado y modelo"""
+
+    def __init__(self, ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(ruta, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS resumenes (
+                clave TEXT PRIMARY KEY,
+                modelo TEXT,
+                resumen TEXT,
+                guardado REAL
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def clave(texto, modelo):
+        return hashlib.sha256(f"{modelo}\0{texto}".encode()).hexdigest()
+
+    def leer(self, claves):
+        if not claves:
+            return {}
+        with self.lock:
+            filas = self.conn.execute(
+                f"SELECT clave, resumen FROM resumenes WHERE clave IN ({','.join('?' * len(claves))})", list(claves)
+            ).fetchall()
+        return {clave: json.loads(resumen) for clave, resumen in filas}
+
+    def guardar(self, clave, modelo, resumen):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO resumenes VALUES (?, ?, ?, ?)", (clave, modelo, json.dumps(resumen), time.time())
+            )
+            self.conn.commit()
+
+cache_resumenes = CacheResumenes(os.path.join(CACHE_DIR, "ia.sqlite"))
+
+# ============= CLIENTE =============
+
+_clientes = {}
+_clientes_lock = threading.Lock()
+
+def cliente_openai(api_key):
+    """Cliente OpenAI reutilizable (uno por clave); OPENAI_BASE_URL permite usar un servidor compatible"""
+    from openai import OpenAI
+    
+    with _clientes_lock:
+        if api_key not in _clientes:
+            # Los reintentos los gestiona completar_chat a través del limitador de tasa
+            _clientes[api_key] = OpenAI(api_key=api_key, max_retries=0)
+        return _clientes[api_key]
+
+def completar_chat(client, **parametros):
+    """chat.completions.create con el limitador de tasa del servidor y reintentos en 429/5xx"""
+    from openai import APIConnectionError, APIStatusError
+    
+    limitador = limitador_host(str(client.base_url))
+    for intento in range(REINTENTOS + 1):
+        limitador.esperar()
+        try:
+            response = client.chat.completions.create(**parametros)
+        except APIStatusError as e:
+            if e.status_code not in ESTADOS_REINTENTO or intento == REINTENTOS:
+                raise
+            limitador.fallo(leer_retry_after(e.response))
+            continue
+        except APIConnectionError:
+            limitador.fallo()
+            if intento == REINTENTOS:
+                raise
+            continue
+        limitador.exito()
+        return response
+
+class PresupuestoTokens:
+    """Tokens disponibles en una ejecución; cada petición reserva su estimación antes de enviarse"""
+
+    def __init__(self, limite):
+        self.lock = threading.Lock()
+        self.limite = limite
+        self.usados = 0
+
+    def reservar(self, estimacion):
+        with self.lock:
+            if self.usados + estimacion > self.limite:
+                return False
+            self.usados += estimacion
+            return True
+
+    def ajustar(self, estimacion, reales):
+        with self.lock:
+            self.usados += reales - estimacion
+
+# ============= IA =============
+
+def _estimar_tokens(texto, max_tokens):
+    return len(texto) // 3 + max_tokens
+
+def _leer_json(response):
+    """Objeto JSON de la respuesta, o None si está mal formado o se ha cortado por max_tokens"""
+    eleccion = response.choices[0]
+    if eleccion.finish_reason == "length":
+        return None
+    try:
+        datos = json.loads(eleccion.message.content or "")
+    except json.JSONDecodeError:
+        return None
+    return datos if isinstance(datos, dict) else None
+
+def _resumir_lote(client, modelo, textos, presupuesto):
+    """Resume uno o varios textos en una petición; devuelve una lista de resúmenes (None si falla)"""
+    if len(textos) == 1:
+        contenido = f"Resume esta ayuda en JSON con: {CAMPOS_RESUMEN}:\n{textos[0]}"
+        max_tokens = 600
+    else:
+        documentos = "\n\n".join(f"### Documento {i}\n{texto}" for i, texto in enumerate(textos))
+        contenido = (
+            f"Resume cada ayuda. Responde en JSON con la clave \"resumenes\": una lista con un objeto por documento, "
+            f"en el mismo orden, con: id, {CAMPOS_RESUMEN}.\n{documentos}"
+        )
+        max_tokens = 300 * len(textos)
+    
+    estimacion = _estimar_tokens(contenido, max_tokens)
+    if not presupuesto.reservar(estimacion):
+        return [None] * len(textos)
+    
+    try:
+        response = completar_chat(
+            client,
+            model=modelo,
+            messages=[
+                {"role": "system", "content": PROMPT_SISTEMA},
+                {"role": "user", "content": contenido}
+            ],
+            temperature=0.2,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"}
+        )
+    except Exception as e:
+        presupuesto.ajustar(estimacion, 0)
+        avisos.log.warning(f"Resumen IA fallido: {e}")
+        return [None] * len(textos)
+    
+    presupuesto.ajustar(estimacion, response.usage.total_tokens if response.usage else estimacion)
+    datos = _leer_json(response)
+    if datos is None:
+        if len(textos) == 1:
+            avisos.log.warning("Resumen IA con JSON mal formado o incompleto: se descarta")
+            return [None]
+        # Un lote cortado por max_tokens o ilegible se pide documento a documento
+        avisos.log.warning(f"Lote IA de {len(textos)} documentos con JSON mal formado o incompleto: se reintenta por documento")
+        return [_resumir_lote(client, modelo, [texto], presupuesto)[0] for texto in textos]
+    if len(textos) == 1:
+        return [datos]
+    
+    resumenes = [None] * len(textos)
+    lista = datos.get("resumenes")
+    for i, resumen in enumerate(lista if isinstance(lista, list) else []):
+        if not isinstance(resumen, dict):
+            continue
+        indice = resumen.pop("id", i)
+        if isinstance(indice, int) and 0 <= indice < len(textos):
+            resumenes[indice] = resumen
+    return resumenes
+
+@medido('ia')
+def resumir_documentos(textos, api_key, modelo=MODELO_IA, presupuesto_tokens=IA_PRESUPUESTO_TOKENS, progreso=None):
+    """Resúmenes JSON de varios textos, en el mismo orden; {} para los que no se han podido resumir.
+
+    Los resúmenes ya obtenidos con el mismo modelo se leen de la caché sin llamar a la API.
+    """
+    textos = [(texto or "")[:IA_MAX_CARACTERES] for texto in textos]
+    claves = [CacheResumenes.clave(texto, modelo) for texto in textos]
+    resumenes = cache_resumenes.leer(set(claves))
+    
+    # Textos pendientes (sin repetir); los cortos se agrupan hasta IA_MAX_LOTE por petición
+    pendientes = {}
+    for texto, clave in zip(textos, claves):
+        if texto.strip() and clave not in resumenes:
+            pendientes[clave] = texto
+    
+    lotes, lote = [], []
+    for clave, texto in sorted(pendientes.items(), key=lambda p: len(p[1]), reverse=True):
+        if len(texto) >= IA_LOTE_CARACTERES:
+            lotes.append([clave])
+            continue
+        lote.append(clave)
+        if len(lote) == IA_MAX_LOTE:
+            lotes.append(lote)
+            lote = []
+    if lote:
+        lotes.append(lote)
+    
+    if lotes:
+        client = cliente_openai(api_key)
+        presupuesto = PresupuestoTokens(presupuesto_tokens)
+        por_lote = ejecutar_concurrente(
+            lambda lote: _resumir_lote(client, modelo, [pendientes[c] for c in lote], presupuesto),
+            lotes, max_workers=MAX_IA_PARALELO, progreso=progreso
+        )
+        for lote, obtenidos in zip(lotes, por_lote):
+            for clave, resumen in zip(lote, obtenidos or [None] * len(lote)):
+                if resumen:
+                    resumenes[clave] = resumen
+                    cache_resumenes.guardar(clave, modelo, resumen)
+        
+        sin_resumen = sum(1 for clave in pendientes if clave not in resumenes)
+        if sin_resumen:
+            avisos.salida.warning(f"⚠️ IA: {sin_resumen} documentos sin resumen (errores o presupuesto de {presupuesto_tokens} tokens agotado)")
+    
+    return [resumenes.get(clave, {}) for clave in claves]
+
+def resumir_con_openai(texto, api_key, modelo=MODELO_IA):
+    return resumir_documentos([texto], api_key, modelo)[0]
+
+def busqueda_inteligente_openai(consulta, api_key, modelo=MODELO_IA):
+    """Palabras clave de una consulta con el modelo; sin conexión, ranking.busqueda_inteligente"""
+    try:
+        response = completar_chat(
+            cliente_openai(api_key),
+            model=modelo,
+            messages=[
+                {"role": "system", "content": "Convierte consultas a palabras clave."},
+                {"role": "user", "content": f"Palabras clave para buscar en BOE/BOJA: {consulta}"}
+            ],
+            temperature=0.3,
+            max_tokens=100
+        )
+        return response.choices[0].message.content.strip()
+    except Exception:
+        return consulta
@@ -0,0 +1,384 @@
+"""Índices locales: números de boletín por fecha y texto completo de las disposiciones"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from .config import CACHE_DIR, MMAP_INDICE, TRAMO_TEXTOS
+
+# ============= ÍNDICE DE BOLETINES =============
+
+MESES = ['enero','febrero','marzo','abril','mayo','junio','julio','agosto','septiembre','octubre','noviembre','diciembre']
+
+PATRON_FECHA_BOLETIN = re.compile(r'(\d{1,2}) de (' + '|'.join(MESES) + r') de (\d{4})|(\d{1,2})/(\d{1,2})/(\d{4})')
+
+def leer_fecha_boletin(texto):
+    """Primera fecha del texto, que debe ser solo la cabecera del boletín (analisis.cabecera_boletin):
+    en el resto de la página hay fechas de menús, noticias o disposiciones citadas"""
+    for match in PATRON_FECHA_BOLETIN.finditer(texto.lower()):
+        try:
+            if match.group(1):
+                return datetime(int(match.group(3)), MESES.index(match.group(2)) + 1, int(match.group(1)))
+            return datetime(int(match.group(6)), int(match.group(5)), int(match.group(4)))
+        except ValueError:
+            continue
+    return None
+
+class IndiceBoletines:
+    """Relación persistente (año, número de boletín) -> fecha de publicación y variante de URL"""
+
+    def __init__(self, ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(ruta, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS boletines (
+                anio INTEGER,
+                numero INTEGER,
+                fecha TEXT,
+                variante TEXT,
+                PRIMARY KEY (anio, numero)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS boletines_fecha ON boletines (fecha)")
+        self.conn.commit()
+
+    def registrar(self, año, numero, fecha, variante='boja'):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO boletines VALUES (?, ?, ?, ?)",
+                (año, numero, fecha.strftime('%Y-%m-%d'), variante)
+            )
+            self.conn.commit()
+
+    def obtener(self, año, numero):
+        with self.lock:
+            fila = self.conn.execute(
+                "SELECT fecha, variante FROM boletines WHERE anio = ? AND numero = ?", (año, numero)
+            ).fetchone()
+        return (datetime.strptime(fila[0], '%Y-%m-%d'), fila[1]) if fila else None
+
+    def por_fecha(self, fecha):
+        with self.lock:
+            fila = self.conn.execute(
+                "SELECT numero, variante FROM boletines WHERE fecha = ? ORDER BY numero LIMIT 1",
+                (fecha.strftime('%Y-%m-%d'),)
+            ).fetchone()
+        return (fila[0], fila[1]) if fila else None
+
+    def vecinos(self, fecha):
+        """Números de los boletines indexados inmediatamente anterior y posterior a fecha"""
+        dia = fecha.strftime('%Y-%m-%d')
+        with self.lock:
+            anterior = self.conn.execute(
+                "SELECT MAX(numero) FROM boletines WHERE anio = ? AND fecha < ?", (fecha.year, dia)
+            ).fetchone()[0]
+            posterior = self.conn.execute(
+                "SELECT MIN(numero) FROM boletines WHERE anio = ? AND fecha > ?", (fecha.year, dia)
+            ).fetchone()[0]
+        return anterior, posterior
+
+indice_boletines = IndiceBoletines(os.path.join(CACHE_DIR, "boletines.sqlite"))
+
+# ============= ÍNDICE DE TEXTO COMPLETO =============
+
+class IndiceDocumentos:
+    """Disposiciones descargadas, con índice FTS5 sobre título, resumen y contenido"""
+
+    COLUMNAS = ['Boletín', 'Título', 'Resumen', 'Enlace', 'Fecha', 'Seccion', 'Numero_Boletin', 'Longitud_Contenido']
+
+    def __init__(self, ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(ruta, check_same_thread=False)
+        # Los textos se guardan uno a uno al descargarse y se releen por tramos
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA mmap_size={MMAP_INDICE}")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documentos (
+                id INTEGER PRIMARY KEY,
+                enlace TEXT UNIQUE,
+                boletin TEXT,
+                titulo TEXT,
+                resumen TEXT,
+                contenido TEXT,
+                seccion TEXT,
+                numero_boletin INTEGER,
+                fecha TEXT,
+                version INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS documentos_fecha ON documentos (fecha);
+            CREATE VIRTUAL TABLE IF NOT EXISTS documentos_fts USING fts5(
+                titulo, resumen, contenido,
+                content='documentos', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS documentos_ai AFTER INSERT ON documentos BEGIN
+                INSERT INTO documentos_fts (rowid, titulo, resumen, contenido)
+                VALUES (new.id, new.titulo, new.resumen, new.contenido);
+            END;
+            CREATE TRIGGER IF NOT EXISTS documentos_ad AFTER DELETE ON documentos BEGIN
+                INSERT INTO documentos_fts (documentos_fts, rowid, titulo, resumen, contenido)
+                VALUES ('delete', old.id, old.titulo, old.resumen, old.contenido);
+            END;
+            CREATE TRIGGER IF NOT EXISTS documentos_au AFTER UPDATE ON documentos BEGIN
+                INSERT INTO documentos_fts (documentos_fts, rowid, titulo, resumen, contenido)
+                VALUES ('delete', old.id, old.titulo, old.resumen, old.contenido);
+                INSERT INTO documentos_fts (rowid, titulo, resumen, contenido)
+                VALUES (new.id, new.titulo, new.resumen, new.contenido);
+            END;
+        """)
+        # Índices creados antes de la columna version: la de cada documento guardado es su id
+        if 'version' not in {columna for _, columna, *_ in self.conn.execute("PRAGMA table_info(documentos)")}:
+            self.conn.execute("ALTER TABLE documentos ADD COLUMN version INTEGER")
+            self.conn.execute("UPDATE documentos SET version = id")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS documentos_version ON documentos (version)")
+        self.conn.commit()
+
+    def guardar(self, registros):
+        """Añade o actualiza los registros por enlace.
+
+        Cada alta o cambio de título, resumen o contenido recibe el siguiente número de
+        version, con el que posteriores encuentra también los documentos que ya estaban en el
+        índice y cuyo texto completo llega después.
+        """
+        import pandas as pd
+        
+        filas = []
+        for r in registros:
+            if not r.get('Enlace'):
+                continue
+            fecha = r.get('Fecha')
+            numero = r.get('Numero_Boletin')
+            filas.append((
+                r['Enlace'], r.get('Boletín'), r.get('Título', ''), r.get('Resumen', ''),
+                r.get('Contenido_Completo') or '', r.get('Seccion'),
+                int(numero) if pd.notna(numero) else None,
+                pd.Timestamp(fecha).isoformat() if pd.notna(fecha) else None
+            ))
+        
+        with self.lock:
+            # Un registro sin contenido no borra el contenido ya guardado
+            self.conn.executemany("""
+                INSERT INTO documentos (enlace, boletin, titulo, resumen, contenido, seccion, numero_boletin, fecha, version)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(version), 0) + 1 FROM documentos))
+                ON CONFLICT (enlace) DO UPDATE SET
+                    titulo = excluded.titulo,
+                    resumen = excluded.resumen,
+                    contenido = CASE WHEN excluded.contenido != '' THEN excluded.contenido ELSE documentos.contenido END,
+                    seccion = COALESCE(excluded.seccion, documentos.seccion),
+                    numero_boletin = COALESCE(excluded.numero_boletin, documentos.numero_boletin),
+                    fecha = COALESCE(excluded.fecha, documentos.fecha),
+                    version = excluded.version
+                WHERE documentos.titulo IS NOT excluded.titulo
+                    OR documentos.resumen IS NOT excluded.resumen
+                    OR (excluded.contenido != '' AND documentos.contenido IS NOT excluded.contenido)
+            """, filas)
+            self.conn.commit()
+
+    def _filtro(self, expresion, fecha_desde, fecha_hasta, boletin=None):
+        import pandas as pd
+        
+        condiciones, parametros = [], []
+        if expresion:
+            condiciones.append("documentos_fts MATCH ?")
+            parametros.append(expresion)
+        if boletin:
+            condiciones.append("d.boletin = ?")
+            parametros.append(boletin)
+        if fecha_desde is not None:
+            condiciones.append("d.fecha >= ?")
+            parametros.append(pd.Timestamp(fecha_desde).normalize().isoformat())
+        if fecha_hasta is not None:
+            condiciones.append("d.fecha < ?")
+            parametros.append((pd.Timestamp(fecha_hasta).normalize() + timedelta(days=1)).isoformat())
+        
+        origen = "documentos d JOIN documentos_fts ON documentos_fts.rowid = d.id" if expresion else "documentos d"
+        donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return f"{origen} {donde}", parametros
+
+    def contar(self, expresion=None, fecha_desde=None, fecha_hasta=None, boletin=None):
+        consulta, parametros = self._filtro(expresion, fecha_desde, fecha_hasta, boletin)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {consulta}", parametros).fetchone()[0]
+
+    def consultar(self, expresion=None, fecha_desde=None, fecha_hasta=None, boletin=None):
+        """DataFrame con los documentos que cumplen la expresión FTS5 y el rango de fechas"""
+        import pandas as pd
+        
+        consulta, parametros = self._filtro(expresion, fecha_desde, fecha_hasta, boletin)
+        with self.lock:
+            filas = self.conn.execute(f"""
+                SELECT d.boletin, d.titulo, d.resumen, d.enlace, d.fecha, d.seccion, d.numero_boletin, length(d.contenido)
+                FROM {consulta}
+            """, parametros).fetchall()
+        
+        df = pd.DataFrame(filas, columns=self.COLUMNAS)
+        df['Fecha'] = pd.to_datetime(df['Fecha'], errors='coerce')
+        df['Longitud_Contenido'] = df['Longitud_Contenido'].fillna(0).astype(int)
+        df['Tiene_Contenido'] = df['Longitud_Contenido'] > 0
+        return df
+
+    def contenidos(self, enlaces):
+        """Texto completo guardado para cada enlace (solo los que tienen contenido)"""
+        enlaces = list(enlaces)
+        with self.lock:
+            filas = []
+            # SQLite limita el número de parámetros por consulta
+            for i in range(0, len(enlaces), 500):
+                tramo = enlaces[i:i + 500]
+                filas += self.conn.execute(
+                    f"SELECT enlace, contenido FROM documentos WHERE contenido != '' AND enlace IN ({','.join('?' * len(tramo))})",
+                    tramo
+                ).fetchall()
+        return dict(filas)
+
+    def longitudes(self, enlaces):
+        """Longitud del texto completo guardado para cada enlace (solo los que tienen contenido)"""
+        enlaces = list(enlaces)
+        with self.lock:
+            filas = []
+            for i in range(0, len(enlaces), 500):
+                tramo = enlaces[i:i + 500]
+                filas += self.conn.execute(
+                    f"SELECT enlace, length(contenido) FROM documentos WHERE contenido != '' AND enlace IN ({','.join('?' * len(tramo))})",
+                    tramo
+                ).fetchall()
+        return dict(filas)
+
+    def ultima_version(self):
+        with self.lock:
+            return self.conn.execute("SELECT COALESCE(MAX(version), 0) FROM documentos").fetchone()[0]
+
+    def posteriores(self, desde, tramo=TRAMO_TEXTOS):
+        """Documentos añadidos o cambiados después de la version desde, en orden y leídos por tramos"""
+        while True:
+            with self.lock:
+                filas = self.conn.execute("""
+                    SELECT version, boletin, titulo, resumen, contenido, enlace, fecha FROM documentos
+                    WHERE version > ? ORDER BY version LIMIT ?
+                """, (desde, tramo)).fetchall()
+            for fila in filas:
+                yield dict(zip(('version', 'Boletín', 'Título', 'Resumen', 'Contenido_Completo', 'Enlace', 'Fecha'), fila))
+            if len(filas) < tramo:
+                return
+            desde = filas[-1][0]
+
+    def iterar_contenidos(self, enlaces, tramo=TRAMO_TEXTOS):
+        """Texto completo de cada enlace en el mismo orden ('' si no hay), leído por tramos"""
+        enlaces = list(enlaces)
+        for i in range(0, len(enlaces), tramo):
+            bloque = enlaces[i:i + tramo]
+            encontrados = self.contenidos([e for e in bloque if isinstance(e, str) and e])
+            for enlace in bloque:
+                yield encontrados.get(enlace, '') if isinstance(enlace, str) else ''
+
+def expresion_fts(terminos, busqueda_exacta=True):
+    """Alternativa FTS5 de frases; sin búsqueda exacta, la última palabra actúa como prefijo"""
+    frases = ['"' + t.replace('"', '""') + '"' + ('' if busqueda_exacta else '*') for t in terminos]
+    return '(' + ' OR '.join(frases) + ')'
+
+indice_documentos = IndiceDocumentos(os.path.join(CACHE_DIR, "documentos.sqlite"))
+
+# ============= MARCAS DE INGESTA =============
+
+class MarcasIngesta:
+    """Último boletín ingerido por fuente, para que la ingesta solo descargue lo nuevo"""
+
+    def __init__(self, ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(ruta, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS marcas (
+                fuente TEXT PRIMARY KEY,
+                valor TEXT,
+                actualizado REAL
+            )
+        """)
+        self.conn.commit()
+
+    def leer(self, fuente):
+        with self.lock:
+            fila = self.conn.execute("SELECT valor, actualizado FROM marcas WHERE fuente = ?", (fuente,)).fetchone()
+        if fila:
+            return dict(json.loads(fila[0]), actualizado=fila[1])
+        return None
+
+    def guardar(self, fuente, valor):
+        valor = {k: v for k, v in valor.items() if k != 'actualizado'}
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO marcas VALUES (?, ?, ?)", (fuente, json.dumps(valor), time.time())
+            )
+            self.conn.commit()
+
+    def borrar(self, fuente):
+        with self.lock:
+            self.conn.execute("DELETE FROM marcas WHERE fuente = ?", (fuente,))
+            self.conn.commit()
+
+marcas_ingesta = MarcasIngesta(os.path.join(CACHE_DIR, "ingesta.sqlite"))
+
+# ============= DIARIO DE RECORRIDOS =============
+
+class DiarioRecorridos:
+    """Partes terminadas de los recorridos históricos (secciones, boletines, días) con sus registros.
+
+    Un recorrido interrumpido o repetido lee del diario lo que ya terminó y solo descarga lo que
+    falta. Solo se anota lo que no puede cambiar: boletines y sumarios publicados hace al menos
+    DIAS_DEFINITIVO días, la misma regla con la que la caché HTTP da por definitiva una copia.
+    """
+
+    def __init__(self, ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(ruta, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS partes (
+                clave TEXT PRIMARY KEY,
+                registros TEXT,
+                terminado REAL
+            )
+        """)
+        self.conn.commit()
+
+    def leer(self, clave):
+        """Registros de una parte terminada, o None si no está en el diario"""
+        with self.lock:
+            fila = self.conn.execute("SELECT registros FROM partes WHERE clave = ?", (clave,)).fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    def terminadas(self, claves):
+        """Cuáles de las claves están en el diario"""
+        claves = list(claves)
+        with self.lock:
+            filas = []
+            for i in range(0, len(claves), 500):
+                tramo = claves[i:i + 500]
+                filas += self.conn.execute(
+                    f"SELECT clave FROM partes WHERE clave IN ({','.join('?' * len(tramo))})", tramo
+                ).fetchall()
+        return {clave for clave, in filas}
+
+    def guardar(self, clave, registros):
+        # Las fechas (Timestamp) se guardan como texto; quien lee las repone
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO partes VALUES (?, ?, ?)",
+                (clave, json.dumps(registros, ensure_ascii=False, default=str), time.time())
+            )
+            self.conn.commit()
+
+    def borrar(self, prefijo=''):
+        with self.lock:
+            self.conn.execute("DELETE FROM partes WHERE substr(clave, 1, ?) = ?", (len(prefijo), prefijo))
+            self.conn.commit()
+
+diario_recorridos = DiarioRecorridos(os.path.join(CACHE_DIR, "recorridos.sqlite"))
@@ -0,0 +1,237 @@
+"""Ingesta incremental: descarga solo los boletines y sumarios nuevos y los guarda en el índice local.
+
+Ejecución periódica (cron) o continua:
+
+    python -m boletines.ingesta --contenido-completo
+    python -m boletines.ingesta --cada 3600
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+from . import avisos
+from .config import DIAS_INGESTA_INICIAL, INTENTOS_BOLETIN_VACIO, INTERVALO_INGESTA, MAX_DIAS_PARALELO
+from .indices import indice_documentos, marcas_ingesta
+from .red import ejecutar_concurrente
+
+FUENTES_INGESTA = ('boja', 'boe')
+
+def _avanzar(marca, fecha, con_contenido):
+    """Lleva la marca hasta fecha; contenido_hasta solo avanza si desde el inicio no hay huecos sin texto"""
+    if con_contenido and marca.get('contenido_hasta') == marca['fecha']:
+        marca['contenido_hasta'] = fecha
+    marca['fecha'] = fecha
+
+def _con_contenido(contenido_completo, prefiltro):
+    # Con otra política que 'completa' el prefiltro deja documentos sin texto
+    return contenido_completo and (prefiltro is None or prefiltro.politica == 'completa')
+
+# ============= BOJA =============
+
+def localizar_inicio(desde):
+    """Primer boletín BOJA publicado desde la fecha indicada: (año, número) o None"""
+    from .fuentes import localizar_boletin
+    
+    fecha = datetime.combine(desde, datetime.min.time())
+    while fecha <= datetime.now():
+        localizado = localizar_boletin(fecha.year, fecha)
+        if localizado:
+            return fecha.year, localizado[0]
+        fecha += timedelta(days=1)
+    return None
+
+def ingerir_boja(contenido_completo=False, prefiltro=None, desde=None):
+    """Recorre los boletines posteriores a la marca; devuelve el número de documentos nuevos"""
+    import pandas as pd
+    from .fuentes import BoletinNoDisponible, buscar_en_boletin_completo, sondear_boletin
+    
+    marca = marcas_ingesta.leer('boja')
+    if marca is None:
+        desde = desde or (datetime.now() - timedelta(days=DIAS_INGESTA_INICIAL)).date()
+        try:
+            inicio = localizar_inicio(desde)
+        except BoletinNoDisponible as e:
+            avisos.salida.warning(f"⚠️ BOJA: no se ha podido localizar el primer boletín ({e})")
+            return 0
+        if not inicio:
+            avisos.salida.warning(f"⚠️ BOJA: ningún boletín desde {desde.strftime('%d/%m/%Y')}")
+            return 0
+        marca = {'anio': inicio[0], 'numero': inicio[1] - 1, 'fecha': None,
+                 'inicio': desde.isoformat(), 'contenido_hasta': None}
+    
+    año, siguiente = marca['anio'], marca['numero'] + 1
+    nuevos = 0
+    while True:
+        # Se sondea un lote de números a la vez; la serie termina en el primero que no existe.
+        # Un sondeo fallido (False) corta la pasada sin dar la serie por terminada
+        numeros = list(range(siguiente, siguiente + MAX_DIAS_PARALELO))
+        sondeos = ejecutar_concurrente(lambda n: sondear_boletin(año, n, revalidar=True), numeros,
+                                       max_workers=MAX_DIAS_PARALELO, por_defecto=False)
+        publicados = []
+        for numero, sondeo in zip(numeros, sondeos):
+            if not sondeo:
+                break
+            publicados.append((numero, *sondeo))
+        
+        fallido = len(publicados) < len(numeros) and sondeos[len(publicados)] is False
+        if fallido:
+            avisos.log.warning(f"BOJA {numeros[len(publicados)]}/{año} no se ha podido consultar: se reintenta en la próxima pasada")
+        
+        if not publicados:
+            if not fallido and año < datetime.now().year:
+                año, siguiente = año + 1, 1
+                continue
+            break
+        
+        por_boletin = ejecutar_concurrente(
+            lambda p: buscar_en_boletin_completo(año, p[0], pd.to_datetime(p[1]), contenido_completo, None, p[2], prefiltro),
+            publicados, max_workers=MAX_DIAS_PARALELO, por_defecto=None
+        )
+        for (numero, fecha, _), docs in zip(publicados, por_boletin):
+            if not docs:
+                # Un boletín que no se ha podido recorrer se reintenta en las próximas pasadas;
+                # si sigue vacío se salta, y el contenido completo ya no cubre su fecha
+                clave = f"{año}/{numero:03d}"
+                vacio = marca.get('vacio') or [clave, 0]
+                intentos = vacio[1] + 1 if vacio[0] == clave else 1
+                if intentos < INTENTOS_BOLETIN_VACIO:
+                    marca['vacio'] = [clave, intentos]
+                    marcas_ingesta.guardar('boja', marca)
+                    avisos.log.warning(f"BOJA {clave} sin documentos (intento {intentos} de {INTENTOS_BOLETIN_VACIO}): se reintenta en la próxima pasada")
+                    return nuevos
+                avisos.salida.warning(f"⚠️ BOJA {clave} sin documentos tras {intentos} intentos: se salta")
+                con_contenido = False
+            else:
+                nuevos += len(docs)
+                con_contenido = _con_contenido(contenido_completo, prefiltro)
+                avisos.salida.success(f"✅ BOJA {numero}/{año} ({fecha.strftime('%d/%m/%Y')}): {len(docs)} docs")
+            marca.pop('vacio', None)
+            marca.update(anio=año, numero=numero)
+            _avanzar(marca, fecha.strftime('%Y-%m-%d'), con_contenido)
+            marcas_ingesta.guardar('boja', marca)
+        
+        siguiente = publicados[-1][0] + 1
+        if len(publicados) < len(numeros):
+            break
+    
+    return nuevos
+
+# ============= BOE =============
+
+def ingerir_boe(contenido_completo=False, prefiltro=None, desde=None):
+    """Guarda los sumarios diarios del BOE posteriores a la marca"""
+    from .config import MAX_DESCARGAS
+    from .fuentes import completar_contenidos, sumario_boe
+    
+    hoy = datetime.now().date()
+    marca = marcas_ingesta.leer('boe')
+    if marca is None or 'inicio' not in marca:
+        desde = desde or hoy - timedelta(days=DIAS_INGESTA_INICIAL)
+        marca = {'fecha': None, 'inicio': desde.isoformat(), 'contenido_hasta': None}
+        primero = desde
+    else:
+        primero = datetime.fromisoformat(marca['fecha']).date() + timedelta(days=1) if marca['fecha'] else datetime.fromisoformat(marca['inicio']).date()
+    
+    fechas = [datetime.combine(primero + timedelta(days=i), datetime.min.time()) for i in range((hoy - primero).days + 1)]
+    por_dia = ejecutar_concurrente(
+        lambda fecha: sumario_boe(fecha, revalidar=fecha.date() >= hoy), fechas, max_workers=MAX_DESCARGAS
+    )
+    
+    # La marca avanza mientras los días estén completos; un día sin BOE solo cuenta si ya ha pasado
+    nuevos = []
+    for fecha, docs in zip(fechas, por_dia):
+        if docs is None or (not docs and fecha.date() >= hoy):
+            break
+        nuevos.extend(docs)
+        _avanzar(marca, fecha.date().isoformat(), _con_contenido(contenido_completo, prefiltro))
+    
+    if contenido_completo:
+        completar_contenidos(nuevos, prefiltro)
+        for r in nuevos:
+            r['Tiene_Contenido'] = r['Longitud_Contenido'] > 0
+    indice_documentos.guardar(nuevos)
+    
+    if marca['fecha']:
+        marcas_ingesta.guardar('boe', marca)
+    if nuevos:
+        avisos.salida.success(f"✅ BOE hasta {datetime.fromisoformat(marca['fecha']).strftime('%d/%m/%Y')}: {len(nuevos)} docs")
+    return len(nuevos)
+
+# ============= INGESTA =============
+
+def ingerir(fuentes=FUENTES_INGESTA, contenido_completo=False, politica='completa', desde=None, alertas=False):
+    """Una pasada de ingesta; devuelve los documentos nuevos por fuente.
+
+    Con alertas, los documentos nuevos se comparan después con las búsquedas guardadas.
+    """
+    from .filtrado import Prefiltro
+    
+    # La ingesta no conoce las búsquedas futuras: el prefiltro solo separa las ayudas del resto
+    prefiltro = Prefiltro([], True, True, politica)
+    nuevos = {}
+    if 'boja' in fuentes:
+        nuevos['boja'] = ingerir_boja(contenido_completo, prefiltro, desde)
+    if 'boe' in fuentes:
+        nuevos['boe'] = ingerir_boe(contenido_completo, prefiltro, desde)
+    if alertas:
+        from .alertas import avisar
+        avisar()
+    return nuevos
+
+def cobertura(fuente):
+    """Fechas (inicio, fin) que la ingesta de la fuente tiene completas y hasta cuál de ellas
+    (desde inicio, sin huecos) tienen también el texto completo, o None si no lo tienen"""
+    marca = marcas_ingesta.leer(fuente)
+    if not marca or not marca.get('fecha'):
+        return None
+    contenido_hasta = marca.get('contenido_hasta')
+    return (
+        datetime.fromisoformat(marca['inicio']).date(),
+        datetime.fromisoformat(marca['fecha']).date(),
+        datetime.fromisoformat(contenido_hasta).date() if contenido_hasta else None
+    )
+
+def vigilar(intervalo=INTERVALO_INGESTA, **opciones):
+    """Repite la ingesta cada intervalo segundos hasta que se interrumpa"""
+    while True:
+        try:
+            nuevos = ingerir(**opciones)
+            avisos.log.info(f"Ingesta {datetime.now():%d/%m/%Y %H:%M}: {nuevos}")
+        except Exception:
+            avisos.log.exception("Ingesta fallida; se reintenta en la próxima pasada")
+        time.sleep(intervalo)
+
+def main(argv=None):
+    from .filtrado import POLITICAS_PREFILTRO
+    
+    parser = argparse.ArgumentParser(prog="boletines.ingesta", description="Ingesta incremental de BOJA y BOE en el índice local")
+    parser.add_argument("--fuentes", nargs="+", choices=FUENTES_INGESTA, default=list(FUENTES_INGESTA))
+    parser.add_argument("--desde", type=lambda t: datetime.strptime(t, '%Y-%m-%d').date(),
+                        help=f"Primera fecha a ingerir si aún no hay marca (por defecto, hace {DIAS_INGESTA_INICIAL} días)")
+    parser.add_argument("--contenido-completo", action="store_true", help="Descargar también el texto de las disposiciones")
+    parser.add_argument("--politica", choices=list(POLITICAS_PREFILTRO), default="completa",
+                        help="Qué documentos descargar completos")
+    parser.add_argument("--reiniciar", action="store_true", help="Olvidar las marcas y volver a empezar desde --desde")
+    parser.add_argument("--alertas", action="store_true", help="Avisar a las búsquedas guardadas de los documentos nuevos (ver boletines.alertas)")
+    parser.add_argument("--cada", type=int, metavar="SEGUNDOS", help="Repetir indefinidamente con esta pausa")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostrar el progreso")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+    
+    if args.reiniciar:
+        for fuente in args.fuentes:
+            marcas_ingesta.borrar(fuente)
+    
+    opciones = dict(fuentes=args.fuentes, contenido_completo=args.contenido_completo, politica=args.politica, desde=args.desde,
+                    alertas=args.alertas)
+    if args.cada:
+        return vigilar(args.cada, **opciones)
+    
+    nuevos = ingerir(**opciones)
+    print(", ".join(f"{fuente}: {n} docs nuevos" for fuente, n in nuevos.items()))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,192 @@
+"""Telemetría de peticiones HTTP y tiempo por etapa, exportable como JSON o texto Prometheus"""
+
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+MAX_PETICIONES_REGISTRADAS = 5000
+LIMITES_DURACION = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+ETAPAS = {
+    'sondeo': "Búsqueda del número de boletín de cada fecha",
+    'secciones': "Recorrido de secciones y disposiciones de un boletín",
+    'contenido': "Descarga del texto completo de las disposiciones",
+    'descarga': "Peticiones HTTP (incluye caché, esperas del limitador y reintentos)",
+    'analisis': "Análisis HTML",
+    'pdf': "Lectura de PDF",
+    'filtrado': "Filtrado por ayudas y palabras clave",
+    'relevancia': "Ordenación por relevancia (BM25)",
+    'extraccion': "Extracción de tipo, organismo, cuantía y plazo",
+    'ia': "Resúmenes con IA",
+    'presentacion': "Presentación de resultados en la interfaz",
+}
+
+class Metricas:
+    """Peticiones HTTP y etapas de una ejecución (o acumuladas desde el último reiniciar)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.activas = threading.local()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self.lock:
+            self.inicio = time.time()
+            self.peticiones = deque(maxlen=MAX_PETICIONES_REGISTRADAS)
+            self.por_host = {}
+            self.etapas = {}
+
+    # ----- peticiones -----
+
+    def registrar_peticion(self, url, metodo, estado, num_bytes, segundos, reintentos=0, cache='sin_cache'):
+        host = urlparse(url).netloc
+        with self.lock:
+            self.peticiones.append({
+                'url': url, 'metodo': metodo, 'estado': estado, 'bytes': num_bytes,
+                'segundos': segundos, 'reintentos': reintentos, 'cache': cache, 'momento': time.time()
+            })
+            totales = self.por_host.setdefault(host, {
+                'peticiones': {}, 'bytes': 0, 'segundos': 0.0, 'reintentos': 0,
+                'duracion': [0] * (len(LIMITES_DURACION) + 1)
+            })
+            clave = (str(estado), cache)
+            totales['peticiones'][clave] = totales['peticiones'].get(clave, 0) + 1
+            totales['bytes'] += num_bytes
+            totales['segundos'] += segundos
+            totales['reintentos'] += reintentos
+            cubeta = next((i for i, limite in enumerate(LIMITES_DURACION) if segundos <= limite), len(LIMITES_DURACION))
+            totales['duracion'][cubeta] += 1
+
+    def ultimas_peticiones(self):
+        with self.lock:
+            return list(self.peticiones)
+
+    # ----- etapas -----
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Suma el tiempo real y de CPU del hilo a la etapa; una etapa anidada en sí misma cuenta una vez"""
+        activas = self.activas.__dict__.setdefault('nombres', set())
+        if nombre in activas:
+            yield
+            return
+        
+        activas.add(nombre)
+        inicio, inicio_cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            segundos, cpu = time.perf_counter() - inicio, time.thread_time() - inicio_cpu
+            activas.discard(nombre)
+            with self.lock:
+                acumulado = self.etapas.setdefault(nombre, {'llamadas': 0, 'segundos': 0.0, 'cpu': 0.0})
+                acumulado['llamadas'] += 1
+                acumulado['segundos'] += segundos
+                acumulado['cpu'] += cpu
+
+    # ----- exportación -----
+
+    def resumen(self):
+        with self.lock:
+            hosts = {
+                host: {
+                    'peticiones': sum(t['peticiones'].values()),
+                    'por_estado_y_cache': {f"{estado}/{cache}": n for (estado, cache), n in sorted(t['peticiones'].items())},
+                    'bytes': t['bytes'],
+                    'segundos': round(t['segundos'], 4),
+                    'reintentos': t['reintentos'],
+                }
+                for host, t in self.por_host.items()
+            }
+            etapas = {
+                nombre: {'llamadas': e['llamadas'], 'segundos': round(e['segundos'], 4), 'cpu': round(e['cpu'], 4)}
+                for nombre, e in self.etapas.items()
+            }
+            return {'desde': self.inicio, 'duracion': round(time.time() - self.inicio, 3), 'hosts': hosts, 'etapas': etapas}
+
+    def json(self):
+        return json.dumps(self.resumen(), ensure_ascii=False, indent=2)
+
+    def prometheus(self):
+        """Formato de exposición de texto de Prometheus (contadores acumulados)"""
+        lineas = []
+        
+        def metrica(nombre, tipo, ayuda):
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+        
+        with self.lock:
+            por_host = {host: dict(t, peticiones=dict(t['peticiones']), duracion=list(t['duracion'])) for host, t in self.por_host.items()}
+            etapas = {nombre: dict(e) for nombre, e in self.etapas.items()}
+        
+        metrica("boletines_peticiones_total", "counter", "Peticiones HTTP por servidor, estado y resultado de caché")
+        for host, t in por_host.items():
+            for (estado, cache), n in sorted(t['peticiones'].items()):
+                lineas.append(f'boletines_peticiones_total{{host="{host}",estado="{estado}",cache="{cache}"}} {n}')
+        for nombre, clave, ayuda in (("boletines_peticiones_bytes_total", 'bytes', "Bytes recibidos"),
+                                     ("boletines_reintentos_total", 'reintentos', "Reintentos por 429/5xx o errores de conexión")):
+            metrica(nombre, "counter", ayuda)
+            for host, t in por_host.items():
+                lineas.append(f'{nombre}{{host="{host}"}} {t[clave]}')
+        
+        metrica("boletines_peticion_duracion_segundos", "histogram", "Duración de las peticiones HTTP")
+        for host, t in por_host.items():
+            acumulado = 0
+            for limite, n in zip(list(LIMITES_DURACION) + ['+Inf'], t['duracion']):
+                acumulado += n
+                lineas.append(f'boletines_peticion_duracion_segundos_bucket{{host="{host}",le="{limite}"}} {acumulado}')
+            lineas.append(f'boletines_peticion_duracion_segundos_sum{{host="{host}"}} {t["segundos"]:.6f}')
+            lineas.append(f'boletines_peticion_duracion_segundos_count{{host="{host}"}} {acumulado}')
+        
+        for nombre, clave, ayuda in (("boletines_etapa_llamadas_total", 'llamadas', "Ejecuciones de cada etapa"),
+                                     ("boletines_etapa_segundos_total", 'segundos', "Tiempo real acumulado por etapa"),
+                                     ("boletines_etapa_cpu_segundos_total", 'cpu', "Tiempo de CPU del hilo acumulado por etapa")):
+            metrica(nombre, "counter", ayuda)
+            for etapa, e in etapas.items():
+                valor = e[clave] if clave == 'llamadas' else f"{e[clave]:.6f}"
+                lineas.append(f'{nombre}{{etapa="{etapa}"}} {valor}')
+        
+        return "\n".join(lineas) + "\n"
+
+metricas = Metricas()
+
+def etapa(nombre):
+    return metricas.etapa(nombre)
+
+def medido(nombre):
+    """Decorador: cada llamada a la función cuenta en la etapa indicada"""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with metricas.etapa(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+# ============= PERFIL =============
+
+@contextmanager
+def perfilar(ruta=None, lineas=30):
+    """cProfile del hilo actual durante el bloque; el informe queda en el dict devuelto.
+
+    Los hilos de descarga no se perfilan: su tiempo aparece en las etapas.
+    """
+    resultado = {}
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield resultado
+    finally:
+        perfil.disable()
+        if ruta:
+            perfil.dump_stats(ruta)
+        salida = io.StringIO()
+        pstats.Stats(perfil, stream=salida).sort_stats("cumulative").print_stats(lineas)
+        resultado['informe'] = salida.getvalue()
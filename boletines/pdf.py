@@ -0,0 +1,124 @@
+"""Texto de las versiones PDF de las disposiciones, leído página a página en un pool de procesos"""
+
+import importlib.util
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .config import (
+    MAX_PROCESOS_PDF, PDF_MAX_BYTES, PDF_MAX_CARACTERES, PDF_MAX_PAGINAS, PDF_TAREAS_POR_PROCESO, PDF_TIMEOUT,
+)
+from .metricas import medido
+
+# ============= LECTURA DE PÁGINAS =============
+
+def _paginas_pymupdf(datos):
+    import pymupdf
+    
+    with pymupdf.open(stream=datos, filetype="pdf") as documento:
+        for pagina in documento:
+            yield pagina.get_text()
+
+def _paginas_pdfminer(datos):
+    from io import BytesIO
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+    
+    for pagina in extract_pages(BytesIO(datos)):
+        yield " ".join(elemento.get_text() for elemento in pagina if isinstance(elemento, LTTextContainer))
+
+def texto_pdf(datos, patrones_parada=(), max_paginas=PDF_MAX_PAGINAS, max_caracteres=PDF_MAX_CARACTERES, hasta=None):
+    """Texto de un PDF en memoria; deja de leer cuando todos los patrones_parada han aparecido
+    o, con hasta (una hora de time.time()), cuando se pasa de esa hora"""
+    if hasta is not None and time.time() >= hasta:
+        return ""
+    paginas = _paginas_pymupdf(datos) if importlib.util.find_spec("pymupdf") else _paginas_pdfminer(datos)
+    
+    partes, longitud = [], 0
+    pendientes = list(patrones_parada)
+    for numero, texto in enumerate(paginas, 1):
+        partes.append(texto)
+        longitud += len(texto)
+        pendientes = [p for p in pendientes if not p.search(texto)]
+        if ((patrones_parada and not pendientes) or numero >= max_paginas or longitud >= max_caracteres
+                or (hasta is not None and time.time() >= hasta)):
+            paginas.close()
+            break
+    
+    return " ".join(" ".join(partes)[:max_caracteres].split())
+
+# ============= POOL DE PROCESOS =============
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _pool_pdf():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: el proceso principal tiene hilos (descargas, Streamlit) y fork no es seguro
+            _pool = ProcessPoolExecutor(
+                max_workers=MAX_PROCESOS_PDF,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=PDF_TAREAS_POR_PROCESO
+            )
+        return _pool
+
+def _reiniciar_pool(roto):
+    global _pool
+    with _pool_lock:
+        if _pool is roto:
+            _pool = None
+    roto.shutdown(wait=False, cancel_futures=True)
+
+@medido('pdf')
+def extraer_texto_pdf(datos, patrones_parada=()):
+    """texto_pdf en un proceso del pool; "" si el PDF no se puede leer o no termina en PDF_TIMEOUT.
+
+    El plazo cuenta desde que se pide, también en el proceso: una tarea que espera turno o
+    que se pasa de tiempo deja de leer páginas en vez de seguir ocupando el proceso.
+    Los procesos se crean con spawn: los scripts que usen la librería deben protegerse con
+    if __name__ == "__main__".
+    """
+    pool = _pool_pdf()
+    hasta = time.time() + PDF_TIMEOUT
+    try:
+        futuro = pool.submit(texto_pdf, datos, tuple(patrones_parada), PDF_MAX_PAGINAS, PDF_MAX_CARACTERES, hasta)
+    except BrokenProcessPool:
+        _reiniciar_pool(pool)
+        return ""
+    try:
+        return futuro.result(timeout=PDF_TIMEOUT)
+    except BrokenProcessPool:
+        _reiniciar_pool(pool)
+        return ""
+    except Exception:
+        futuro.cancel()
+        return ""
+
+# ============= DESCARGA =============
+
+def descargar_pdf(session, url):
+    """Bytes del PDF, o None si no es un PDF o supera PDF_MAX_BYTES.
+
+    Se descarga entero a un búfer limitado: la tabla de referencias de un PDF está al final,
+    así que no se puede abrir antes. Parar al encontrar los campos ahorra análisis, no descarga.
+    """
+    try:
+        with session.get(url, timeout=30, stream=True) as response:
+            if response.status_code != 200:
+                return None
+            if int(response.headers.get("Content-Length") or 0) > PDF_MAX_BYTES:
+                return None
+            
+            datos = bytearray()
+            for bloque in response.iter_content(64 * 1024):
+                datos += bloque
+                if len(datos) > PDF_MAX_BYTES:
+                    return None
+    except Exception:
+        return None
+    
+    return bytes(datos) if datos.startswith(b"%PDF") else None
@@ -0,0 +1,171 @@
+"""Búsqueda inteligente sin conexión: expansión de la consulta y ordenación por relevancia (BM25).
+
+El índice se construye con NumPy sobre los documentos ya obtenidos: listas de aparición por
+término (documentos y frecuencias) para puntuar, y términos por documento para las
+co-ocurrencias. La consulta se amplía con los sinónimos de SINONIMOS y con los términos que
+más aparecen junto a los suyos en el propio corpus.
+"""
+
+import heapq
+import re
+from collections import Counter
+
+from . import avisos
+from .config import BM25_B, BM25_K1, PESO_EXPANSION, PESO_SINONIMO, TERMINOS_EXPANSION
+from .filtrado import SINONIMOS, normalizar_texto, textos_documentos
+from .metricas import medido
+
+# Palabras de dos o más caracteres y números (también de una cifra: 'sección 3')
+PATRON_TERMINO = re.compile(r'\w\w+|\d')
+
+PALABRAS_VACIAS = frozenset("""
+    al algo algun alguna algunas alguno algunos ante antes aquel aquella asi aun bajo bien cada cual cuales cuando
+    como con contra cual de del desde donde durante el ella ellas ellos en entre era es esa esas ese eso esos esta
+    estas este esto estos fue ha han hasta hay la las le les lo los mas me mi mis muy ni no nos o otra otras otro
+    otros para pero poco por porque que quien quienes se sea segun ser si sin sobre su sus tal tambien tan te
+    tiene tienen toda todas todo todos tras un una unas uno unos y ya
+    busco buscar quiero necesito informacion relacionada relacionadas relacionados
+""".split())
+
+def tokenizar(texto):
+    """Términos de un texto ya normalizado, sin palabras vacías"""
+    return [t for t in PATRON_TERMINO.findall(texto) if t not in PALABRAS_VACIAS]
+
+def _grupos_sinonimos():
+    """Cada término de SINONIMOS (clave o sinónimo) con los términos de todo su grupo"""
+    grupos = {}
+    for clave, sinonimos in SINONIMOS.items():
+        terminos = set(tokenizar(normalizar_texto(' '.join([clave, *sinonimos]))))
+        for termino in terminos:
+            grupos.setdefault(termino, set()).update(terminos)
+    return grupos
+
+# ============= ÍNDICE =============
+
+class IndiceBM25:
+    """Índice invertido en memoria de una lista de textos normalizados"""
+
+    def __init__(self, textos):
+        import numpy as np
+
+        self.vocabulario = {}
+        filas, columnas, frecuencias = [], [], []
+        longitudes = []
+        for fila, texto in enumerate(textos):
+            conteo = Counter(PATRON_TERMINO.findall(texto))
+            for vacia in PALABRAS_VACIAS & conteo.keys():
+                del conteo[vacia]
+            filas.extend([fila] * len(conteo))
+            columnas.extend([self.vocabulario.setdefault(termino, len(self.vocabulario)) for termino in conteo])
+            frecuencias.extend(conteo.values())
+            longitudes.append(sum(conteo.values()))
+
+        self.num_documentos = len(longitudes)
+        self.longitudes = np.array(longitudes, dtype=np.float32)
+        self.media_longitud = float(self.longitudes.mean()) if self.num_documentos else 0.0
+
+        # Términos por documento (en orden de fila) y documentos por término
+        self.fila_entrada = np.array(filas, dtype=np.int32)
+        self.termino_entrada = np.array(columnas, dtype=np.int32)
+        orden = np.argsort(self.termino_entrada, kind='stable')
+        self.documentos = self.fila_entrada[orden]
+        self.frecuencias = np.array(frecuencias, dtype=np.float32)[orden]
+        self.inicio = np.searchsorted(self.termino_entrada[orden], np.arange(len(self.vocabulario) + 1))
+
+        self.df = np.diff(self.inicio)
+        self.idf = np.log1p((self.num_documentos - self.df + 0.5) / (self.df + 0.5)).astype(np.float32)
+
+    def __len__(self):
+        return self.num_documentos
+
+    def _apariciones(self, id_termino):
+        return slice(self.inicio[id_termino], self.inicio[id_termino + 1])
+
+    def expandir(self, consulta, n=TERMINOS_EXPANSION):
+        """Pesos {término: peso} de la consulta ampliada con sinónimos y co-ocurrencias"""
+        import numpy as np
+
+        pesos = dict.fromkeys(tokenizar(normalizar_texto(consulta)), 1.0)
+        grupos = _grupos_sinonimos()
+        for termino in list(pesos):
+            for sinonimo in grupos.get(termino, ()):
+                pesos.setdefault(sinonimo, PESO_SINONIMO)
+
+        ids = [self.vocabulario[t] for t, peso in pesos.items() if peso == 1.0 and t in self.vocabulario]
+        if not ids or not n:
+            return pesos
+
+        # Términos de los documentos que contienen alguno de la consulta, por tf-idf en ese conjunto
+        en_consulta = np.zeros(self.num_documentos, dtype=bool)
+        for id_termino in ids:
+            en_consulta[self.documentos[self._apariciones(id_termino)]] = True
+        conjunta = np.bincount(self.termino_entrada[en_consulta[self.fila_entrada]], minlength=len(self.vocabulario))
+        puntuacion = np.where(conjunta > 1, conjunta * self.idf, 0.0)
+
+        terminos = list(self.vocabulario)
+        candidatos = (i for i in np.flatnonzero(puntuacion) if terminos[i] not in pesos and not terminos[i].isdigit())
+        mejores = heapq.nlargest(n, candidatos, key=puntuacion.__getitem__)
+        if mejores:
+            maximo = puntuacion[mejores[0]]
+            for i in mejores:
+                pesos[terminos[i]] = PESO_EXPANSION * float(puntuacion[i] / maximo)
+        return pesos
+
+    def puntuar(self, pesos):
+        """Puntuación BM25 de cada documento para los términos ponderados"""
+        import numpy as np
+
+        puntuaciones = np.zeros(self.num_documentos, dtype=np.float32)
+        normalizacion = BM25_K1 * (1 - BM25_B + BM25_B * self.longitudes / (self.media_longitud or 1.0))
+        for termino, peso in pesos.items():
+            id_termino = self.vocabulario.get(termino)
+            if id_termino is None:
+                continue
+            apariciones = self._apariciones(id_termino)
+            documentos, tf = self.documentos[apariciones], self.frecuencias[apariciones]
+            puntuaciones[documentos] += peso * self.idf[id_termino] * tf * (BM25_K1 + 1) / (tf + normalizacion[documentos])
+        return puntuaciones
+
+    def mejores(self, consulta, k=10, expandir=True):
+        """Los k documentos más relevantes: [(fila, puntuación)], de mayor a menor"""
+        import numpy as np
+
+        pesos = self.expandir(consulta) if expandir else dict.fromkeys(tokenizar(normalizar_texto(consulta)), 1.0)
+        puntuaciones = self.puntuar(pesos)
+        return [(int(i), float(puntuaciones[i])) for i in heapq.nlargest(k, np.flatnonzero(puntuaciones), key=puntuaciones.__getitem__)]
+
+# ============= BÚSQUEDA =============
+
+def busqueda_inteligente(consulta, indice, n=TERMINOS_EXPANSION):
+    """Palabras clave para una consulta en lenguaje natural, sin conexión (ver busqueda_inteligente_openai)"""
+    pesos = indice.expandir(consulta, n)
+    return sorted(pesos, key=pesos.get, reverse=True)
+
+@medido('relevancia')
+def indexar(df):
+    """Índice BM25 de las filas de un DataFrame de resultados (título, resumen y texto completo)"""
+    return IndiceBM25(textos_documentos(df))
+
+@medido('relevancia')
+def ordenar_por_relevancia(df, consulta, k=None, indice=None):
+    """Documentos ordenados por relevancia BM25 (columna Relevancia); con k, solo los k mejores.
+
+    Los documentos sin ningún término de la consulta ampliada quedan al final, por fecha. Para
+    ordenar varias veces las mismas filas puede pasarse el índice ya construido (indexar).
+    """
+    if df is None or df.empty or not consulta.strip():
+        return df
+    
+    import numpy as np
+    
+    if indice is None:
+        indice = indexar(df)
+    pesos = indice.expandir(consulta)
+    avisos.salida.info(f"🧠 Consulta ampliada: {', '.join(f'{t} ({p:.2f})' for t, p in sorted(pesos.items(), key=lambda tp: -tp[1]))}")
+    
+    puntuaciones = indice.puntuar(pesos)
+    df = df.drop(columns=['Contenido_Completo'], errors='ignore').assign(Relevancia=puntuaciones.round(3))
+    if k is not None:
+        filas = heapq.nlargest(k, np.flatnonzero(puntuaciones), key=puntuaciones.__getitem__)
+        return df.iloc[filas]
+    return df.sort_values(['Relevancia', 'Fecha'], ascending=False, na_position='last', kind='stable')
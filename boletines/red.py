@@ -0,0 +1,351 @@
+"""Sesión HTTP compartida: caché en disco, limitación de tasa y concurrencia por servidor"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from .config import (
+    CACHE_DIR, CACHE_TTL_BOLETINES, CACHE_TTL_FEEDS, CACHE_TTL_NO_ENCONTRADO, DIAS_DEFINITIVO, ESTADOS_REINTENTO,
+    MAX_DESCARGAS, MAX_POR_HOST, MAX_RETRY_AFTER, METODOS_REINTENTO, PATRON_BOLETIN, PATRON_FEED, REINTENTOS,
+    TASA_INCREMENTO, TASA_INICIAL, TASA_MAXIMA, TASA_MINIMA,
+)
+from .indices import indice_boletines
+from .metricas import metricas
+
+# ============= CACHÉ HTTP =============
+
+class CacheHTTP:
+    """Cuerpos HTTP en SQLite, indexados por URL"""
+
+    def __init__(self, ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(ruta, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                url TEXT PRIMARY KEY,
+                estado INTEGER,
+                cabeceras TEXT,
+                cuerpo BLOB,
+                guardado REAL
+            )
+        """)
+        self.conn.commit()
+        self.stats = {'aciertos': 0, 'fallos': 0, 'revalidados': 0}
+
+    def leer(self, url):
+        with self.lock:
+            fila = self.conn.execute(
+                "SELECT estado, cabeceras, cuerpo, guardado FROM respuestas WHERE url = ?", (url,)
+            ).fetchone()
+        if fila:
+            return {'estado': fila[0], 'cabeceras': json.loads(fila[1]), 'cuerpo': fila[2], 'guardado': fila[3]}
+        return None
+
+    def guardar(self, url, estado, cabeceras, cuerpo):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?)",
+                (url, estado, json.dumps(cabeceras), cuerpo, time.time())
+            )
+            self.conn.commit()
+
+    def renovar(self, url):
+        with self.lock:
+            self.conn.execute("UPDATE respuestas SET guardado = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+
+    def contar(self, clave):
+        with self.lock:
+            self.stats[clave] += 1
+
+def fecha_publicacion(url):
+    """Fecha del boletín o sumario al que pertenece url, o None si no es una página de boletín.
+
+    Un número de BOJA que aún no está en el índice de boletines da el 31 de diciembre de su año,
+    la fecha más tardía que puede tener.
+    """
+    match = PATRON_BOLETIN.match(url)
+    if not match:
+        return None
+    if match.group('dia'):
+        return datetime.strptime(match.group('dia'), '%Y%m%d')
+    año, numero = int(match.group('anio')), int(match.group('numero'))
+    conocido = indice_boletines.obtener(año, numero)
+    return conocido[0] if conocido else datetime(año, 12, 31)
+
+def publicado_del_todo(publicado, momento=None):
+    """Si un boletín publicado en esa fecha ya no puede cambiar en momento (timestamp; ahora por defecto)"""
+    momento = datetime.now() if momento is None else datetime.fromtimestamp(momento)
+    return momento >= publicado + timedelta(days=DIAS_DEFINITIVO)
+
+def pagina_definitiva(url):
+    """Si url es una página de un boletín o sumario que ya no puede cambiar"""
+    publicado = fecha_publicacion(url)
+    return publicado is not None and publicado_del_todo(publicado)
+
+class AdaptadorCache(HTTPAdapter):
+    """HTTPAdapter que sirve desde CacheHTTP las páginas de boletín y revalida los feeds y los boletines recientes"""
+
+    CABECERAS_GUARDADAS = ('Content-Type', 'ETag', 'Last-Modified')
+
+    def __init__(self, cache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, stream=False, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            with metricas.etapa('descarga'):
+                response, cache = self._enviar(request, stream=stream, **kwargs)
+        except Exception as e:
+            metricas.registrar_peticion(request.url, request.method, 0, 0, time.perf_counter() - inicio, getattr(e, 'reintentos', 0))
+            raise
+        
+        num_bytes = int(response.headers.get('Content-Length') or 0) if stream else len(response.content or b'')
+        metricas.registrar_peticion(
+            request.url, request.method, response.status_code, num_bytes,
+            time.perf_counter() - inicio, getattr(response, 'reintentos', 0), cache
+        )
+        return response
+
+    def _enviar(self, request, stream=False, **kwargs):
+        """Respuesta y resultado de caché: acierto, revalidado, fallo o sin_cache"""
+        url = request.url
+        publicado = fecha_publicacion(url)
+        boletin = publicado is not None
+        feed = bool(PATRON_FEED.search(url))
+
+        if request.method != 'GET' or stream or not (boletin or feed):
+            return self._enviar_red(request, stream=stream, **kwargs), 'sin_cache'
+
+        # Cache-Control: no-cache siempre consulta el servidor
+        sin_cache = 'no-cache' in request.headers.get('Cache-Control', '')
+        guardada = self.cache.leer(url)
+        if guardada:
+            edad = time.time() - guardada['guardado']
+            if guardada['estado'] == 200 and not sin_cache:
+                # Solo es definitiva la copia descargada cuando el boletín ya estaba publicado del todo
+                definitiva = boletin and publicado_del_todo(publicado, guardada['guardado'])
+                if definitiva or edad < (CACHE_TTL_BOLETINES if boletin else CACHE_TTL_FEEDS):
+                    self.cache.contar('aciertos')
+                    return self._respuesta_cacheada(request, guardada), 'acierto'
+            if guardada['estado'] == 404 and edad < CACHE_TTL_NO_ENCONTRADO and not sin_cache:
+                self.cache.contar('aciertos')
+                return self._respuesta_cacheada(request, guardada), 'acierto'
+            if guardada['estado'] == 200:
+                if guardada['cabeceras'].get('ETag'):
+                    request.headers['If-None-Match'] = guardada['cabeceras']['ETag']
+                if guardada['cabeceras'].get('Last-Modified'):
+                    request.headers['If-Modified-Since'] = guardada['cabeceras']['Last-Modified']
+
+        response = self._enviar_red(request, stream=stream, **kwargs)
+
+        if response.status_code == 304 and guardada:
+            self.cache.renovar(url)
+            self.cache.contar('revalidados')
+            return self._respuesta_cacheada(request, guardada), 'revalidado'
+
+        self.cache.contar('fallos')
+        if response.status_code == 200 or (response.status_code == 404 and boletin):
+            cabeceras = {k: response.headers[k] for k in self.CABECERAS_GUARDADAS if k in response.headers}
+            self.cache.guardar(url, response.status_code, cabeceras, response.content)
+
+        return response, 'fallo'
+
+    def _enviar_red(self, request, **kwargs):
+        limitador = limitador_host(request.url)
+        # Un método no idempotente puede haber llegado al servidor aunque falle: se envía una vez
+        reintentos = REINTENTOS if request.method in METODOS_REINTENTO else 0
+        with _semaforo_host(request.url):
+            for intento in range(reintentos + 1):
+                limitador.esperar()
+                try:
+                    response = super().send(request, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    limitador.fallo()
+                    if intento == reintentos:
+                        e.reintentos = intento
+                        raise
+                    continue
+                
+                if response.status_code in ESTADOS_REINTENTO:
+                    limitador.fallo(leer_retry_after(response))
+                    if intento < reintentos:
+                        response.close()
+                        continue
+                else:
+                    limitador.exito()
+                response.reintentos = intento
+                return response
+
+    def _respuesta_cacheada(self, request, guardada):
+        response = requests.Response()
+        response.status_code = guardada['estado']
+        response.reason = 'OK' if guardada['estado'] == 200 else 'Not Found'
+        response.headers = CaseInsensitiveDict(guardada['cabeceras'])
+        response._content = guardada['cuerpo']
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.from_cache = True
+        return response
+
+cache_http = CacheHTTP(os.path.join(CACHE_DIR, "http.sqlite"))
+
+def estadisticas_cache():
+    """Aciertos, fallos y revalidaciones de la caché HTTP en esta sesión"""
+    with cache_http.lock:
+        return dict(cache_http.stats)
+
+# ============= SESIÓN =============
+
+def crear_session():
+    session = requests.Session()
+    
+    # Los reintentos los gestiona AdaptadorCache a través del limitador de tasa
+    adapter = AdaptadorCache(cache_http, pool_maxsize=MAX_DESCARGAS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    
+    session.headers.update({
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+        "Connection": "keep-alive",
+    })
+    
+    return session
+
+session = crear_session()
+
+# ============= LIMITACIÓN DE TASA =============
+
+class LimitadorTasa:
+    """Cubo de fichas de un servidor con aumento aditivo y reducción multiplicativa"""
+
+    def __init__(self, tasa=TASA_INICIAL):
+        self.lock = threading.Lock()
+        self.tasa = tasa
+        self.fichas = 1.0
+        self.ultimo = time.monotonic()
+        self.pausa_hasta = 0.0
+
+    def esperar(self):
+        while True:
+            with self.lock:
+                ahora = time.monotonic()
+                self.fichas = min(max(1.0, self.tasa), self.fichas + (ahora - self.ultimo) * self.tasa)
+                self.ultimo = ahora
+                if ahora >= self.pausa_hasta and self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                espera = max(self.pausa_hasta - ahora, (1 - self.fichas) / self.tasa)
+            time.sleep(espera)
+
+    def exito(self):
+        with self.lock:
+            self.tasa = min(TASA_MAXIMA, self.tasa + TASA_INCREMENTO)
+
+    def fallo(self, retry_after=None):
+        with self.lock:
+            self.tasa = max(TASA_MINIMA, self.tasa / 2)
+            self.fichas = 0.0
+            if retry_after:
+                self.pausa_hasta = max(self.pausa_hasta, time.monotonic() + retry_after)
+
+_limitadores = {}
+_limitadores_lock = threading.Lock()
+
+def limitador_host(url):
+    host = urlparse(url).netloc
+    with _limitadores_lock:
+        if host not in _limitadores:
+            _limitadores[host] = LimitadorTasa()
+        return _limitadores[host]
+
+def leer_retry_after(response):
+    """Segundos indicados en la cabecera Retry-After (número o fecha HTTP)"""
+    valor = response.headers.get('Retry-After')
+    if not valor:
+        return None
+    try:
+        segundos = float(valor)
+    except ValueError:
+        try:
+            segundos = (parsedate_to_datetime(valor) - datetime.now(parsedate_to_datetime(valor).tzinfo)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, min(MAX_RETRY_AFTER, segundos))
+
+# ============= DESCARGA CONCURRENTE =============
+
+_semaforos_host = {}
+_semaforos_lock = threading.Lock()
+_max_por_host = MAX_POR_HOST
+
+def configurar_descargas(max_por_host):
+    """Cambia el límite de peticiones simultáneas por servidor (compartido por toda la sesión)"""
+    global _max_por_host
+    with _semaforos_lock:
+        if max_por_host != _max_por_host:
+            _max_por_host = max(1, int(max_por_host))
+            _semaforos_host.clear()
+
+def _semaforo_host(url):
+    host = urlparse(url).netloc
+    with _semaforos_lock:
+        if host not in _semaforos_host:
+            _semaforos_host[host] = threading.BoundedSemaphore(_max_por_host)
+        return _semaforos_host[host]
+
+def iterar_concurrente(funcion, elementos, max_workers=MAX_DESCARGAS, por_defecto=None):
+    """Aplica funcion a cada elemento en un pool de hilos y genera (indice, resultado) según terminan.
+
+    Un fallo en un elemento da por_defecto sin detener al resto. Si se deja de consumir el
+    generador, las tareas que no han empezado se cancelan y las que están en marcha terminan
+    sin esperarlas.
+    """
+    elementos = list(elementos)
+    if not elementos:
+        return
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(elementos)))
+    try:
+        futuros = {pool.submit(funcion, elemento): i for i, elemento in enumerate(elementos)}
+        for futuro in as_completed(futuros):
+            try:
+                resultado = futuro.result()
+            except Exception:
+                resultado = por_defecto
+            yield futuros[futuro], resultado
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def ejecutar_concurrente(funcion, elementos, max_workers=MAX_DESCARGAS, por_defecto=None, progreso=None, al_completar=None):
+    """Aplica funcion a cada elemento en un pool de hilos, conservando el orden.
+
+    Un fallo en un elemento deja por_defecto en su posición sin detener al resto.
+    progreso(hechos, total) y al_completar(indice, resultado) se llaman desde el hilo principal.
+    """
+    elementos = list(elementos)
+    resultados = [por_defecto] * len(elementos)
+    for hechos, (i, resultado) in enumerate(iterar_concurrente(funcion, elementos, max_workers, por_defecto), 1):
+        resultados[i] = resultado
+        if al_completar:
+            al_completar(i, resultado)
+        if progreso:
+            progreso(hechos, len(elementos))
+
+    return resultados
@@ -0,0 +1,57 @@
+"""Los módulos de boletines leen la configuración al importarse: la caché va a un directorio
+temporal y BOJA y BOE apuntan a un servidor local con el corpus sintético de los benchmarks
+(BOJA 2024 del 2 de enero al 2 de febrero).
+
+Los sumarios del BOE del 14 de enero (domingo, sin BOE: 404) y del 15 de enero se sirven desde
+tests/datos, con el formato de la API de datos abiertos en lugar del simplificado del corpus.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import generar
+from benchmarks.servidor import ServidorCorpus
+
+DATOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos")
+
+_corpus = generar(tempfile.mkdtemp(prefix="boletines-corpus-"))
+for dia, estado in (("20240114", 404), ("20240115", 200)):
+    with open(os.path.join(DATOS, f"sumario_boe_{dia}.xml"), "rb") as f:
+        _corpus.añadir(f"/datosabiertos/api/boe/sumario/{dia}", f.read(), "application/xml", estado)
+_servidor = ServidorCorpus(_corpus)
+os.environ["BOLETINES_CACHE_DIR"] = tempfile.mkdtemp(prefix="boletines-tests-")
+os.environ["BOLETINES_URL_BOJA"] = os.environ["BOLETINES_URL_BOE"] = _servidor.arrancar()
+
+@pytest.fixture
+def servidor():
+    """El servidor del corpus, sin latencia ni errores y con las estadísticas a cero.
+
+    Los 503 llegan sin pausa (Retry-After: 0) y el limitador de tasa del servidor empieza
+    en su máximo, para que las pruebas de errores no esperen.
+    """
+    from boletines.red import TASA_MAXIMA, limitador_host
+    
+    _servidor.latencia = _servidor.variacion = _servidor.errores = 0.0
+    _servidor.retry_after = 0
+    _servidor.stats = dict.fromkeys(_servidor.stats, 0)
+    limitador = limitador_host(_servidor.url)
+    limitador.tasa, limitador.pausa_hasta = TASA_MAXIMA, 0.0
+    yield _servidor
+    _servidor.latencia = _servidor.variacion = _servidor.errores = 0.0
+
+@pytest.fixture
+def cache_vacia():
+    """Caché HTTP sin respuestas guardadas, para contar las peticiones que llegan al servidor"""
+    from boletines import red
+    
+    with red.cache_http.lock:
+        red.cache_http.conn.execute("DELETE FROM respuestas")
+        red.cache_http.conn.commit()
+
+def pytest_sessionfinish(session, exitstatus):
+    _servidor.parar()
@@ -0,0 +1,108 @@
+from boletines.alertas import Percolador, consultas_guardadas, guardar_consulta, percolar
+from boletines.indices import indice_documentos
+
+def consulta(nombre, palabras, solo_ayudas=True, busqueda_exacta=True):
+    return {'nombre': nombre, 'palabras': palabras, 'solo_ayudas': solo_ayudas, 'busqueda_exacta': busqueda_exacta, 'destino': ''}
+
+CONSULTAS = [
+    consulta("turismo", ["turismo"]),
+    consulta("pymes", ["pyme"], solo_ayudas=False),
+    consulta("energía", ["energ"], busqueda_exacta=False),
+    consulta("todas las ayudas", []),
+    consulta("castillos", ["castillo de la mota"], solo_ayudas=False),
+]
+
+def nombres(percolador, texto):
+    return [percolador.consultas[i]['nombre'] for i in percolador.coincidencias(texto)]
+
+def test_percolador_terminos_exactos_y_sinonimos():
+    percolador = Percolador(CONSULTAS)
+    
+    assert nombres(percolador, "Subvenciones a la hostelería de Cádiz") == ["turismo", "todas las ayudas"]
+    assert nombres(percolador, "Resolución sobre pequeña empresa") == ["pymes"]
+    # Término exacto: 'turismos' no es 'turismo'
+    assert nombres(percolador, "Ayudas para turismos eléctricos") == ["todas las ayudas"]
+
+def test_percolador_solo_ayudas():
+    percolador = Percolador(CONSULTAS)
+    
+    assert nombres(percolador, "Nombramiento en la Consejería de Turismo") == []
+    assert nombres(percolador, "Convocatoria de ayudas al turismo rural") == ["turismo", "todas las ayudas"]
+
+def test_percolador_parciales_y_varias_palabras():
+    percolador = Percolador(CONSULTAS)
+    
+    assert nombres(percolador, "Ayudas a la eficiencia energética") == ["energía", "todas las ayudas"]
+    assert nombres(percolador, "Restauración del Castillo de la Mota") == ["castillos"]
+
+def test_percolador_coincide_con_busqueda_uno_a_uno():
+    from boletines.filtrado import BuscadorPalabras, TERMINOS_AYUDAS, expandir_palabras_clave, normalizar_texto
+    
+    textos = [
+        "Subvenciones a la hostelería", "Ayudas FEDER para pymes", "Orden de la Consejería de Turismo",
+        "Convocatoria de ayudas a autónomos del sector energético", "Edicto del Castillo de la Mota",
+    ]
+    percolador = Percolador(CONSULTAS)
+    ayudas = BuscadorPalabras(TERMINOS_AYUDAS)
+    for texto in textos:
+        normalizado = normalizar_texto(texto)
+        esperadas = [
+            i for i, c in enumerate(CONSULTAS)
+            if (not c['solo_ayudas'] or ayudas.coincide(normalizado))
+            and (not c['palabras'] or BuscadorPalabras(expandir_palabras_clave(c['palabras']), c['busqueda_exacta']).coincide(normalizado))
+        ]
+        assert percolador.coincidencias(texto) == esperadas, texto
+
+def documento(enlace, titulo):
+    return {'Boletín': 'BOJA', 'Título': titulo, 'Resumen': '', 'Enlace': enlace, 'Fecha': '2024-01-15', 'Contenido_Completo': ''}
+
+def test_sin_busquedas_la_marca_avanza():
+    for c in consultas_guardadas.listar():
+        consultas_guardadas.borrar(c['nombre'])
+    percolar()
+    indice_documentos.guardar([documento("https://alertas/antigua", "Ayudas a la hostelería de Cádiz")])
+    assert percolar() == {}
+    
+    guardar_consulta("hostelería", ["hostelería"])
+    indice_documentos.guardar([documento("https://alertas/nueva", "Ayudas a la hostelería de Huelva")])
+    try:
+        avisadas = percolar()
+    finally:
+        consultas_guardadas.borrar("hostelería")
+    assert [d['Enlace'] for d in avisadas["hostelería"]] == ["https://alertas/nueva"]
+
+def test_el_texto_completo_que_llega_despues_se_compara():
+    guardar_consulta("castillos", ["castillo de la mota"], solo_ayudas=False)
+    try:
+        percolar()
+        # Primero se ingiere sin contenido y después llega el texto con el término
+        indice_documentos.guardar([documento("https://alertas/mota", "Resolución de la Delegación de Cultura")])
+        assert "castillos" not in percolar()
+        indice_documentos.guardar([dict(documento("https://alertas/mota", "Resolución de la Delegación de Cultura"),
+                                        Contenido_Completo="Obras de restauración en el Castillo de la Mota")])
+        avisadas = percolar()
+        # Guardar otra vez lo mismo no es un cambio
+        indice_documentos.guardar([documento("https://alertas/mota", "Resolución de la Delegación de Cultura")])
+        repetida = percolar()
+    finally:
+        consultas_guardadas.borrar("castillos")
+    assert [d['Enlace'] for d in avisadas["castillos"]] == ["https://alertas/mota"]
+    assert repetida == {}
+
+def test_indice_sin_columna_version(tmp_path):
+    import sqlite3
+    from boletines.indices import IndiceDocumentos
+    
+    # Índice guardado antes de la columna version
+    ruta = str(tmp_path / "documentos.sqlite")
+    IndiceDocumentos(ruta).guardar([{'Enlace': "https://t/1", 'Título': "Uno"}, {'Enlace': "https://t/2", 'Título': "Dos"}])
+    conn = sqlite3.connect(ruta)
+    conn.execute("DROP INDEX documentos_version")
+    conn.execute("ALTER TABLE documentos DROP COLUMN version")
+    conn.commit()
+    conn.close()
+    
+    indice = IndiceDocumentos(ruta)
+    assert [d['version'] for d in indice.posteriores(0)] == [1, 2]
+    indice.guardar([{'Enlace': "https://t/1", 'Título': "Uno", 'Contenido_Completo': "Texto"}])
+    assert [(d['Enlace'], d['version']) for d in indice.posteriores(2)] == [("https://t/1", 3)]
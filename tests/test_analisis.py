@@ -0,0 +1,60 @@
+"""Las funciones de analisis frente a BeautifulSoup(..., 'html.parser'), al que sustituyen"""
+
+import feedparser
+import pytest
+from bs4 import BeautifulSoup
+
+from boletines import analisis
+from boletines.analisis import ETIQUETAS_SIN_TEXTO
+
+def enlaces_bs(html):
+    return [(a['href'], a.get_text(strip=True)) for a in BeautifulSoup(html, 'html.parser').find_all('a', href=True)]
+
+def texto_visible_bs(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    for elemento in soup(list(ETIQUETAS_SIN_TEXTO)):
+        elemento.decompose()
+    return soup.get_text(separator=' ', strip=True)
+
+def paginas_del_corpus(servidor):
+    """Boletín, secciones y disposiciones del BOJA 5 y disposiciones del BOE del 8 de enero"""
+    for ruta, entrada in sorted(servidor.corpus.rutas.items()):
+        if entrada['tipo'].startswith('text/html') and ('/boja/2024/005/' in ruta or 'BOE-A-2024-006' in ruta):
+            yield ruta, servidor.corpus.leer(ruta)[2].decode('utf-8')
+
+def test_paginas_del_corpus_como_beautifulsoup(servidor):
+    paginas = list(paginas_del_corpus(servidor))
+    assert len(paginas) > 30
+    for ruta, html in paginas:
+        assert analisis.enlaces(analisis.documento(html)) == enlaces_bs(html), ruta
+        assert analisis.texto_visible(analisis.documento(html)) == texto_visible_bs(html), ruta
+
+def test_resumenes_del_feed_como_beautifulsoup(servidor):
+    feed = feedparser.parse(servidor.corpus.leer("/boja/distribucion/boja.xml")[2])
+    assert feed.entries
+    for entrada in feed.entries:
+        resumen = entrada.get('summary', '')
+        assert analisis.texto_fragmento(resumen) == BeautifulSoup(resumen, 'html.parser').get_text()
+
+@pytest.mark.parametrize("html", [
+    '<a href="/s1">Sec <b>uno</b><script>x</script><!-- nota --></a>',
+    '<a href="/s2"><style>a {}</style> Sección  2 </a><a name="sin-href">x</a>',
+])
+def test_enlaces_sin_scripts(html):
+    assert analisis.enlaces(analisis.documento(html)) == enlaces_bs(html)
+
+@pytest.mark.parametrize("fragmento", [
+    "&nbsp;", "&nbsp;Ayudas", "  Convocatoria <b>FEDER</b>", "\n\n<p>uno</p>\n <p>dos</p>",
+    "Texto <!-- nota --> fin", "a<script>x</script>b", "<pre>  \n  </pre>", "a</div>b<div>c", "Sin etiquetas",
+])
+def test_texto_fragmento(fragmento):
+    assert analisis.texto_fragmento(fragmento) == BeautifulSoup(fragmento, 'html.parser').get_text()
+
+def test_cabecera_boletin():
+    pagina = (
+        '<html><body><header><nav><h1>Portal</h1> Actualizado el 2 de enero de 2024</nav></header>'
+        '<main><h1>BOJA número 23</h1><!-- cabecera --><p class="fecha">Publicado el 1 de febrero de 2024</p>'
+        '<ul><li><a href="/boja/2024/023/s1">Orden de 12 de enero de 2024</a></li></ul></main></body></html>'
+    )
+    assert analisis.cabecera_boletin(analisis.documento(pagina)) == "BOJA número 23 Publicado el 1 de febrero de 2024"
+    assert analisis.cabecera_boletin(analisis.documento("<html><body><p>Sin título, 3 de enero de 2024</p></body></html>")) == ''
@@ -0,0 +1,66 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from boletines import avisos, busqueda, extraccion
+
+pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+def _por_etiqueta(elementos, etiqueta):
+    return next(e for e in elementos if e.label == etiqueta)
+
+@pytest.fixture
+def app(monkeypatch):
+    """La página, con los avisos de la librería de vuelta a logging al terminar (la página los lleva a streamlit)"""
+    monkeypatch.setattr(avisos, 'salida', avisos.salida)
+    return AppTest.from_file(APP, default_timeout=60)
+
+@pytest.fixture
+def llamadas(monkeypatch):
+    """Búsquedas y filas extraídas en cada ejecución de la página"""
+    contadas = {'busquedas': 0, 'extraidas': []}
+    buscar, extraer = busqueda.buscar_y_filtrar_progresivo, extraccion.extraer_informacion_documentos
+    
+    def buscar_contando(*args, **kwargs):
+        contadas['busquedas'] += 1
+        return buscar(*args, **kwargs)
+    
+    def extraer_contando(df, palabras_clave):
+        contadas['extraidas'].append(len(df))
+        return extraer(df, palabras_clave)
+    
+    monkeypatch.setattr(busqueda, 'buscar_y_filtrar_progresivo', buscar_contando)
+    monkeypatch.setattr(extraccion, 'extraer_informacion_documentos', extraer_contando)
+    return contadas
+
+def test_resultados_paginados_sin_repetir_la_busqueda(servidor, app, llamadas):
+    app.run()
+    # Feed BOJA del corpus, sin limitar a ayudas: entre 21 y 40 resultados
+    _por_etiqueta(app.checkbox, "Solo ayudas").uncheck()
+    _por_etiqueta(app.button, "🚀 Buscar").click()
+    app.run()
+    
+    assert not app.exception
+    total = len(app.session_state['resultados'])
+    pagina = _por_etiqueta(app.number_input, "Página (de 2)")
+    assert pagina.value == 1 and len(app.dataframe[0].value) == 20
+    # Solo se extraen los campos de las filas visibles
+    assert llamadas == {'busquedas': 1, 'extraidas': [20]}
+    
+    pagina.set_value(2).run()
+    assert len(app.dataframe[0].value) == total - 20
+    assert llamadas == {'busquedas': 1, 'extraidas': [20, total - 20]}
+    
+    # Volver a una página ya vista no extrae de nuevo
+    _por_etiqueta(app.number_input, "Página (de 2)").set_value(1).run()
+    assert llamadas == {'busquedas': 1, 'extraidas': [20, total - 20]}
+    
+    # El CSV se prepara bajo demanda con todos los resultados
+    _por_etiqueta(app.button, "📥 Preparar CSV con todos los resultados").click().run()
+    assert llamadas['extraidas'][-1] == total and llamadas['busquedas'] == 1
+    assert len(pd.read_csv(io.StringIO(app.session_state['csv']))) == total
@@ -0,0 +1,77 @@
+import time
+from datetime import date
+
+import pytest
+import requests
+
+from benchmarks.__main__ import imprimir, medir, percentil
+from benchmarks.corpus import Corpus, generar
+from benchmarks.servidor import ServidorCorpus
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    """Dos días de BOJA con una sección de dos disposiciones"""
+    return generar(str(tmp_path_factory.mktemp("corpus")), desde=date(2024, 1, 2), hasta=date(2024, 1, 3), secciones=1, docs_por_seccion=2)
+
+@pytest.fixture
+def servidor_corpus(corpus):
+    servidor = ServidorCorpus(corpus, semilla=1)
+    servidor.arrancar()
+    yield servidor
+    servidor.parar()
+
+def test_corpus_sintetico_reproducible(corpus, tmp_path):
+    otro = generar(str(tmp_path), desde=date(2024, 1, 2), hasta=date(2024, 1, 3), secciones=1, docs_por_seccion=2)
+    assert otro.rutas == corpus.rutas
+    
+    # Se relee del directorio con sus metadatos
+    releido = Corpus(corpus.directorio)
+    assert releido.existe and releido.meta['origen'] == "sintetico"
+    assert releido.fechas() == [date(2024, 1, 2), date(2024, 1, 3)]
+    estado, tipo, cuerpo = releido.leer("/boja/2024/002/")
+    assert estado == 200 and tipo.startswith("text/html") and "BOJA número 2".encode() in cuerpo
+    assert releido.leer("/boja/2024/003/") is None
+    # Los enlaces absolutos se guardan con el marcador del servidor
+    assert b"{{URL_BOJA}}/boja/2024/002/1000" in releido.leer("/boja/distribucion/boja.xml")[2]
+
+def test_servidor_sustituye_enlaces_y_cuenta(servidor_corpus):
+    feed = requests.get(f"{servidor_corpus.url}/boja/distribucion/boja.xml", timeout=5)
+    assert feed.status_code == 200 and f"{servidor_corpus.url}/boja/2024/002/1000" in feed.text
+    
+    pdf = requests.get(f"{servidor_corpus.url}/eboja/2024/2/BOJA24-002-01000.pdf", timeout=5)
+    assert pdf.headers['Content-Type'] == "application/pdf" and pdf.content.startswith(b"%PDF")
+    
+    assert requests.get(f"{servidor_corpus.url}/boja/2024/099/", timeout=5).status_code == 404
+    assert servidor_corpus.stats['peticiones'] == 3 and servidor_corpus.stats['no_encontradas'] == 1
+    assert servidor_corpus.stats['bytes'] == len(feed.content) + len(pdf.content)
+
+def test_servidor_con_latencia_y_errores(servidor_corpus):
+    servidor_corpus.latencia, servidor_corpus.errores, servidor_corpus.retry_after = 0.05, 1.0, 3
+    inicio = time.perf_counter()
+    respuesta = requests.get(f"{servidor_corpus.url}/boja/2024/002/", timeout=5)
+    
+    assert time.perf_counter() - inicio >= 0.05
+    assert respuesta.status_code == 503 and respuesta.headers['Retry-After'] == "3"
+    assert servidor_corpus.stats['errores'] == 1
+
+def test_medir(servidor_corpus):
+    assert percentil([5, 1, 4, 2, 3], 50) == 3 and percentil([5, 1, 4, 2, 3], 99) == 5
+    
+    preparados = []
+    def pedir(ruta):
+        return len(requests.get(f"{servidor_corpus.url}{ruta}", timeout=5).content)
+    
+    r = medir(pedir, ["/boja/2024/002/", "/boja/2024/003/"], preparar=lambda: preparados.append(1), servidor=servidor_corpus)
+    
+    assert r['llamadas'] == 2 and r['unidades'] > 0 and r['unidades_s'] > 0
+    assert r['p50_ms'] <= r['p90_ms'] <= r['p99_ms'] and r['pico_mb'] > 0
+    # La llamada que mide la memoria no cuenta en las peticiones; preparar va antes de cada una
+    assert r['peticiones'] == 2 and len(preparados) == 3
+
+def test_imprimir_compara_con_la_base(capsys):
+    resultado = {'llamadas': 2, 'unidades': 10, 'unidades_s': 110.0, 'p50_ms': 9.0, 'p90_ms': 10.0, 'p99_ms': 10.0, 'pico_mb': 1.0, 'peticiones': 4}
+    imprimir({'feed': resultado}, {'feed': dict(resultado, unidades_s=100.0, p50_ms=10.0)})
+    
+    cabecera, linea = capsys.readouterr().out.splitlines()
+    assert "Δ unid./s" in cabecera
+    assert linea.startswith("feed") and "+10.0%" in linea and "-10.0%" in linea
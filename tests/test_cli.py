@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from boletines import fuentes, red
+from boletines.cli import crear_parser, main
+from boletines.indices import DiarioRecorridos, IndiceBoletines
+
+@pytest.fixture
+def indices_temporales(tmp_path, monkeypatch):
+    """Índice de boletines y diario propios: lo que recorre la CLI no llega a otras pruebas"""
+    indice = IndiceBoletines(str(tmp_path / "boletines.sqlite"))
+    monkeypatch.setattr(fuentes, 'indice_boletines', indice)
+    monkeypatch.setattr(red, 'indice_boletines', indice)
+    monkeypatch.setattr(fuentes, 'diario_recorridos', DiarioRecorridos(str(tmp_path / "recorridos.sqlite")))
+
+def test_argumentos():
+    args = crear_parser().parse_args(["--fuentes", "historico", "boe_historico", "--desde", "2024-01-15", "-p", "FEDER, turismo", "--no-exacta", "-o", "a.csv"])
+    assert args.fuentes == ["historico", "boe_historico"] and str(args.desde) == "2024-01-15"
+    assert args.palabras == "FEDER, turismo" and args.no_exacta and not args.todas
+    assert args.politica == "conservadora" and args.salida == "a.csv"
+    
+    # -o es obligatoria y las fuentes y políticas se validan
+    for argv in ([], ["--fuentes", "diario", "-o", "a.csv"], ["--politica", "todas", "-o", "a.csv"]):
+        with pytest.raises(SystemExit):
+            crear_parser().parse_args(argv)
+
+def test_salida_con_extension_desconocida(tmp_path):
+    with pytest.raises(SystemExit, match=r"\.csv o \.parquet"):
+        main(["-o", str(tmp_path / "ayudas.xlsx")])
+    assert not (tmp_path / "ayudas.xlsx").exists()
+
+def test_busqueda_historica_a_csv(servidor, indices_temporales, tmp_path, capsys):
+    salida = tmp_path / "ayudas.csv"
+    
+    assert main(["--fuentes", "historico", "--desde", "2024-01-15", "--hasta", "2024-01-16", "-p", "pyme", "-o", str(salida)]) == 0
+    
+    df = pd.read_csv(salida, encoding='utf-8-sig')
+    assert capsys.readouterr().out.strip() == f"{len(df)} resultados -> {salida}"
+    assert len(df) > 0 and set(df['Numero_Boletin']) <= {10, 11}
+    assert {'Título', 'Enlace', 'tipo_documento', 'cuantia', 'contexto_palabras'} <= set(df.columns)
+
+def test_sin_resultados(servidor, indices_temporales, tmp_path):
+    # 28/01/2024 es domingo: sin boletín no hay resultados ni fichero
+    salida = tmp_path / "ayudas.csv"
+    assert main(["--fuentes", "historico", "--desde", "2024-01-28", "--hasta", "2024-01-28", "-o", str(salida)]) == 1
+    assert not salida.exists()
@@ -0,0 +1,106 @@
+import pandas as pd
+
+from boletines.config import BANDAS_MINHASH, PERMUTACIONES_MINHASH, URL_BOJA
+from boletines.duplicados import Agrupador, agrupar_duplicados, claves_bandas, firma, repartir_descargas, similitud, vocabulario
+from boletines.filtrado import filtrar_indice_local
+from boletines.fuentes import completar_contenidos
+from boletines.indices import indice_documentos
+
+ORDEN = "Orden de 12 de enero de 2024 por la que se convocan ayudas a pymes del sector turístico de la provincia de Sevilla"
+EXTRACTO = "Extracto de la Orden de 12 de enero de 2024 por la que se convocan ayudas a pymes del sector turístico de la provincia de Sevilla"
+CORRECCION = "Corrección de errores de la Orden de 12 de enero de 2024 por la que se convocan ayudas a pymes del sector turístico de la provincia de Sevilla"
+OTRA = "Orden de 12 de enero de 2024 por la que se convocan ayudas a pymes del sector agrícola de la provincia de Sevilla"
+
+def test_firma():
+    assert firma("Orden de nombramiento") is None
+    f = firma(ORDEN)
+    assert len(f) == PERMUTACIONES_MINHASH
+    assert (f == firma(ORDEN)).all()
+    assert len(claves_bandas(f)) == BANDAS_MINHASH
+
+def test_similitud_estimada():
+    assert similitud(firma(ORDEN), firma(EXTRACTO)) == 1.0
+    assert similitud(firma(ORDEN), firma(OTRA)) < 0.9
+    assert similitud(firma(ORDEN), firma("Resolución de la Dirección General de Fondos Europeos sobre el programa operativo")) < 0.2
+
+def test_agrupador_separa_lugares_distintos():
+    ecija = "Resolución por la que se conceden ayudas a la rehabilitación de viviendas en el municipio de Écija"
+    osuna = "Resolución por la que se conceden ayudas a la rehabilitación de viviendas en el municipio de Osuna"
+    agrupador = Agrupador()
+    
+    assert agrupador.representante("ecija", firma(ecija), vocabulario(ecija)) == "ecija"
+    assert agrupador.representante("osuna", firma(osuna), vocabulario(osuna)) == "osuna"
+
+def test_agrupador_replica_en_el_boe():
+    boja = "Orden de 12 de enero de 2024, por la que se convocan ayudas a pymes del sector turístico de la provincia de Sevilla"
+    boe = ("Extracto de la Orden de 12 de enero de 2024, de la Consejería de Turismo, Cultura y Deporte, por la que se convocan"
+           " ayudas a pymes del sector turístico de la provincia de Sevilla")
+    referencia = f"{boja} (BOJA núm. 12, de 18 de enero de 2024)"
+    # Añade el organismo y además cambia el sector: es otra disposición
+    otra_boe = boe.replace("turístico", "agrícola")
+    agrupador = Agrupador()
+    
+    assert agrupador.representante("boja", firma(boja), vocabulario(boja)) == "boja"
+    assert agrupador.representante("boe", firma(boe), vocabulario(boe)) == "boja"
+    assert agrupador.representante("referencia", firma(referencia), vocabulario(referencia)) == "boja"
+    assert agrupador.representante("otra_boe", firma(otra_boe), vocabulario(otra_boe)) == "otra_boe"
+
+def test_agrupar_duplicados_conserva_cada_texto():
+    df = pd.DataFrame({
+        'Enlace': ["orden", "extracto", "correccion", "otra", "corto"],
+        'Título': [ORDEN, EXTRACTO, CORRECCION, OTRA, "Ayudas"],
+        'Resumen': ["a", "b", "c", "d", "e"],
+    })
+    unicos = agrupar_duplicados(df)
+    
+    assert list(unicos['Enlace']) == ["orden", "otra", "corto"]
+    assert list(unicos['Duplicados']) == [["extracto", "correccion"], [], []]
+    assert list(unicos['Resumen']) == ["a", "d", "e"]
+
+def test_repartir_descargas_mismo_titulo_y_dia():
+    lunes, martes = pd.Timestamp(2024, 1, 29), pd.Timestamp(2024, 1, 30, 9)
+    registros = [{'Enlace': e, 'Título': t, 'Fecha': f} for e, t, f in [
+        ("orden", ORDEN, lunes), ("replica", ORDEN.upper().replace("turístico", "turistico"), lunes),
+        ("otro_dia", ORDEN, martes), ("extracto", EXTRACTO, lunes), ("correccion", CORRECCION, lunes),
+        ("correccion2", CORRECCION, lunes), ("sin_fecha", ORDEN, None), ("corto", "Ayudas", lunes), ("corto2", "Ayudas", lunes),
+    ]]
+    descargar, repetidos = repartir_descargas(registros)
+    
+    # Solo la réplica del mismo día (mayúsculas y acentos aparte); las correcciones, siempre
+    assert [(r['Enlace'], representante) for r, representante in repetidos] == [("replica", "orden")]
+    assert [r['Enlace'] for r in descargar] == ["orden", "otro_dia", "extracto", "correccion", "correccion2", "sin_fecha", "corto", "corto2"]
+    
+    # Con la orden ya en el índice tampoco se descarga la réplica
+    descargar, repetidos = repartir_descargas(registros[1:], guardados=registros[:1])
+    assert [(r['Enlace'], representante) for r, representante in repetidos] == [("replica", "orden")]
+
+def test_completar_contenidos_no_descarga_la_replica(servidor):
+    servidor.corpus.añadir("/boja/2024/021/9103", f"<html><body><h1>{OTRA}</h1><p>Plazo de presentación de solicitudes: un mes.</p></body></html>")
+    servidor.corpus.añadir("/boja/2024/021/9104", f"<html><body><h1>{OTRA}</h1><p>Plazo de presentación de solicitudes: un mes.</p></body></html>")
+    fecha = pd.Timestamp(2024, 1, 30)
+    orden = {'Enlace': f"{URL_BOJA}/boja/2024/021/9103", 'Título': OTRA, 'Resumen': "", 'Fecha': fecha}
+    replica = {'Enlace': f"{URL_BOJA}/boja/2024/021/9104", 'Título': OTRA, 'Resumen': "", 'Fecha': fecha}
+    peticiones = servidor.stats['peticiones']
+    
+    assert completar_contenidos([orden, replica]) == [orden, replica]
+    
+    assert servidor.stats['peticiones'] - peticiones == 1
+    assert orden['Longitud_Contenido'] > 0 and replica['Longitud_Contenido'] == 0
+    # La réplica no guarda el texto de la orden con su enlace
+    assert list(indice_documentos.contenidos([orden['Enlace'], replica['Enlace']])) == [orden['Enlace']]
+
+def test_completar_contenidos_descarga_cada_publicacion(servidor):
+    # La corrección trae un plazo que no está en la orden: tiene que poder encontrarse
+    servidor.corpus.añadir("/boja/2024/021/9101", f"<html><body><h1>{ORDEN}</h1><p>Plazo de presentación de solicitudes: un mes.</p></body></html>")
+    servidor.corpus.añadir("/boja/2024/021/9102", f"<html><body><h1>{CORRECCION}</h1><p>Donde dice un mes debe decir cuarenta y cinco días naturales.</p></body></html>")
+    orden = {'Enlace': f"{URL_BOJA}/boja/2024/021/9101", 'Título': ORDEN, 'Resumen': "", 'Fecha': pd.Timestamp(2024, 1, 30)}
+    correccion = {'Enlace': f"{URL_BOJA}/boja/2024/021/9102", 'Título': CORRECCION, 'Resumen': "", 'Fecha': pd.Timestamp(2024, 1, 30)}
+    completar_contenidos([orden, correccion])
+    
+    assert orden['Longitud_Contenido'] > 0 and correccion['Longitud_Contenido'] > 0
+    textos = indice_documentos.contenidos([orden['Enlace'], correccion['Enlace']])
+    assert "cuarenta y cinco" in textos[correccion['Enlace']] and "cuarenta y cinco" not in textos[orden['Enlace']]
+    assert list(filtrar_indice_local(["cuarenta y cinco días"], solo_ayudas=False)['Enlace']) == [correccion['Enlace']]
+    
+    # Al mostrar los resultados siguen siendo uno solo
+    assert list(agrupar_duplicados(pd.DataFrame([orden, correccion]))['Duplicados']) == [[correccion['Enlace']]]
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from boletines import extraccion, fuentes
+from boletines.extraccion import extraer_informacion_documento, extraer_informacion_documentos
+from boletines.filtrado import Prefiltro
+from boletines.indices import indice_documentos
+
+PALABRAS = ["pyme", "FEDER", "turismo", "castillo"]
+
+def test_por_lotes_como_fila_a_fila(servidor, monkeypatch):
+    fecha = pd.Timestamp(fuentes.sondear_boletin(2024, 6)[0])
+    # Con y sin texto en el índice: el prefiltro estricto solo descarga lo que ya pasa
+    df = pd.DataFrame(fuentes.buscar_en_boletin_completo(2024, 6, fecha, contenido_completo=True, prefiltro=Prefiltro(["pyme"], politica='estricta')))
+    assert 'Contenido_Completo' not in df.columns
+    assert (df['Longitud_Contenido'] > 0).any() and (df['Longitud_Contenido'] == 0).any()
+    
+    # Tramos pequeños para que el último quede incompleto
+    monkeypatch.setattr(extraccion, 'TRAMO_TEXTOS', 7)
+    lotes = extraer_informacion_documentos(df, PALABRAS)
+    
+    assert list(lotes.index) == list(df.index)
+    contenidos = indice_documentos.iterar_contenidos(df['Enlace'])
+    for (i, fila), contenido in zip(df.iterrows(), contenidos):
+        assert lotes.loc[i].to_dict() == extraer_informacion_documento(fila['Título'], fila['Resumen'], contenido or '', PALABRAS), fila['Enlace']
+    # Los campos que se comparan no están vacíos
+    for campo in ('tipo_documento', 'organismo', 'cuantia', 'plazo_solicitud'):
+        assert (lotes[campo] != '').any(), campo
+
+def test_por_lotes_mismos_campos_con_contenido_en_columna():
+    df = pd.DataFrame({
+        'Título': ["Orden de ayudas a pymes", "Resolución de la Dirección General de Turismo", None],
+        'Resumen': ["Consejería de Empleo, Empresa y Trabajo", None, "Anuncio"],
+        'Contenido_Completo': [
+            "Cuantía: 12.000,00 euros. Plazo de presentación de solicitudes: un mes desde la publicación. Fondos FEDER.",
+            None, "",
+        ],
+    }, index=[10, 20, 30])
+    
+    lotes = extraer_informacion_documentos(df, PALABRAS)
+    
+    for i, fila in df.iterrows():
+        uno = extraer_informacion_documento(fila['Título'] or '', fila['Resumen'] or '', fila['Contenido_Completo'] or '', PALABRAS)
+        assert list(lotes.columns) == list(uno)
+        assert lotes.loc[i].to_dict() == uno, i
+    # El contexto tiene palabras encontradas (con su sinónimo) y no encontradas
+    encontradas = {c['encontrado_como'] for c in lotes.loc[10, 'contexto_palabras']}
+    assert 'No encontrada' in encontradas and len(encontradas) > 1
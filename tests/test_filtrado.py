@@ -0,0 +1,149 @@
+import logging
+import re
+
+import pandas as pd
+import pytest
+
+from boletines import filtrado
+from boletines.filtrado import (
+    BuscadorPalabras, FiltroIncremental, Prefiltro, expandir_palabras_clave, filtrar_indice_local, filtrar_resultados, normalizar_texto
+)
+from boletines.indices import IndiceDocumentos, indice_documentos
+
+REGISTROS = [
+    {'Boletín': 'BOJA', 'Título': 'Ayudas al turismo rural', 'Resumen': '', 'Enlace': 'https://t/1', 'Longitud_Contenido': 0},
+    {'Boletín': 'BOJA', 'Título': 'Nombramiento de personal', 'Resumen': 'Turismo', 'Enlace': 'https://t/2', 'Longitud_Contenido': 0},
+    {'Boletín': 'BOE', 'Título': 'Orden de convocatoria', 'Resumen': 'Bases reguladoras', 'Enlace': 'https://t/3', 'Longitud_Contenido': 40},
+    {'Boletín': 'BOE', 'Título': 'Subvenciones a la hostelería', 'Resumen': '', 'Enlace': 'https://t/4', 'Longitud_Contenido': 0},
+    {'Boletín': 'BOE', 'Título': 'Ayudas a la agricultura', 'Resumen': '', 'Enlace': 'https://t/5', 'Longitud_Contenido': 0},
+]
+
+TEXTOS = pd.Series([
+    "Ayudas a la pequeña empresa y a la mediana empresa del sector turístico",
+    "Fondos europeos FEDER de desarrollo regional",
+    "Subvención para autónomos de la hostelería",
+    "Convocatoria de restauración de fachadas",
+    "Bases de la pymes-innovación y del turismo",
+    "Fondos europeo para la Unión Europea",
+    "Orden de nombramientos",
+])
+
+@pytest.mark.parametrize("busqueda_exacta", [True, False])
+def test_buscador_como_str_contains_termino_a_termino(busqueda_exacta):
+    # Sinónimos que se solapan: 'fondos europeo' dentro de 'fondos europeos',
+    # 'autonomo' y 'autónomo' normalizan igual, 'restauracion' y 'restauración' también
+    terminos = expandir_palabras_clave(["feder", "pyme", "turismo"]) + ["mediana empresa", "empresa"]
+    buscador = BuscadorPalabras(terminos, busqueda_exacta)
+    textos = TEXTOS.map(normalizar_texto)
+    
+    for termino in terminos:
+        # Comportamiento anterior: un str.contains por término sobre el texto normalizado
+        if busqueda_exacta:
+            esperado = textos.str.contains(r'\b' + re.escape(normalizar_texto(termino)) + r'\b', regex=True)
+        else:
+            esperado = textos.str.contains(normalizar_texto(termino), regex=False)
+        hallado = textos.map(lambda t: buscador.indice[termino] in buscador.encontrar(t))
+        assert list(hallado) == list(esperado), termino
+    assert list(textos.map(buscador.coincide)) == list(textos.map(lambda t: bool(buscador.encontrar(t))))
+
+def test_buscador_acentos_y_limites_de_palabra():
+    exacto = BuscadorPalabras(["subvención", "autonomo", "pyme"])
+    # Con o sin acento en el término y en el texto
+    assert exacto.indice["subvención"] in exacto.encontrar(normalizar_texto("Subvencion nominativa"))
+    assert exacto.indice["autonomo"] in exacto.encontrar(normalizar_texto("Trabajo autónomo"))
+    # Búsqueda exacta: ni 'pymes' ni 'autonomos' son 'pyme' o 'autonomo'
+    assert exacto.encontrar(normalizar_texto("Ayudas a pymes y autónomos")) == set()
+    assert exacto.encontrar("pyme-innovacion") == {exacto.indice["pyme"]}
+    
+    parcial = BuscadorPalabras(["pyme", "autonomo"], busqueda_exacta=False)
+    assert parcial.encontrar(normalizar_texto("Ayudas a pymes y autónomos")) == {0, 1}
+
+CLASES = {
+    'pasa': {'Título': "Convocatoria de ayudas a pymes", 'Resumen': ""},
+    'pasa por la sección': {'Título': "Extracto de la Orden de 3 de enero", 'Seccion': "Subvenciones a la pequeña empresa", 'Resumen': ""},
+    'dudoso': {'Título': "Orden por la que se aprueban las bases reguladoras", 'Resumen': ""},
+    'descartado': {'Título': "Resolución por la que se nombra personal funcionario", 'Resumen': ""},
+    'edicto': {'Título': "Edicto del Juzgado de lo Social", 'Resumen': "Emplazamiento"},
+}
+
+def test_prefiltro_clasifica_con_titulo_seccion_y_resumen():
+    prefiltro = Prefiltro(["pyme"])
+    assert {nombre: prefiltro.clasificar(r) for nombre, r in CLASES.items()} == {
+        'pasa': 'pasa', 'pasa por la sección': 'pasa', 'dudoso': 'dudoso', 'descartado': 'descartado', 'edicto': 'descartado',
+    }
+    # Sin palabras clave ni filtro de ayudas todo pasa
+    assert {Prefiltro([], solo_ayudas=False).clasificar(r) for r in CLASES.values()} == {'pasa'}
+
+@pytest.mark.parametrize("politica, descargados", [
+    ('estricta', {'pasa', 'pasa por la sección'}),
+    ('conservadora', {'pasa', 'pasa por la sección', 'dudoso'}),
+    ('completa', set(CLASES)),
+])
+def test_prefiltro_necesita_contenido_segun_la_politica(politica, descargados):
+    prefiltro = Prefiltro(["pyme"], politica=politica)
+    assert {nombre for nombre, r in CLASES.items() if prefiltro.necesita_contenido(r)} == descargados
+
+def test_filtro_incremental_lee_el_contenido_del_indice():
+    indice_documentos.guardar([dict(REGISTROS[2], Contenido_Completo="Ayudas a empresas de restauración")])
+    filtro = FiltroIncremental(["turismo"])
+    
+    assert [r['Enlace'] for r in filtro.filtrar(REGISTROS)] == ['https://t/1', 'https://t/3', 'https://t/4']
+
+def test_filtro_incremental_por_tandas_igual_que_de_una_vez():
+    indice_documentos.guardar([dict(REGISTROS[2], Contenido_Completo="Ayudas a empresas de restauración")])
+    filtro = FiltroIncremental(["turismo", "agricultura"], busqueda_exacta=True)
+    por_tandas = [r['Enlace'] for i in range(0, len(REGISTROS), 2) for r in filtro.filtrar(REGISTROS[i:i + 2])]
+    
+    df = pd.DataFrame(REGISTROS)
+    df['Contenido_Completo'] = list(indice_documentos.iterar_contenidos(df['Enlace']))
+    de_una_vez = filtrar_resultados(df, ["turismo", "agricultura"], busqueda_exacta=True)
+    assert por_tandas == list(de_una_vez['Enlace'])
+
+def test_filtro_incremental_sin_palabras_ni_ayudas():
+    assert FiltroIncremental([], solo_ayudas=False).filtrar(REGISTROS) == REGISTROS
+    assert [r['Enlace'] for r in FiltroIncremental([]).filtrar(REGISTROS)] == ['https://t/1', 'https://t/3', 'https://t/4', 'https://t/5']
+
+def test_filtro_incremental_avisa_como_filtrar_resultados(caplog):
+    indice_documentos.guardar([dict(REGISTROS[2], Contenido_Completo="Ayudas a empresas de restauración")])
+    df = pd.DataFrame(REGISTROS)
+    df['Contenido_Completo'] = list(indice_documentos.iterar_contenidos(df['Enlace']))
+    with caplog.at_level(logging.INFO, logger="boletines"):
+        filtrar_resultados(df, ["turismo"])
+    esperados = [m for m in caplog.messages if m.startswith(("📊 Filtro", "🔍", "  ✓"))]
+    
+    caplog.clear()
+    filtro = FiltroIncremental(["turismo"])
+    # Un registro que se vuelve a filtrar (al llegar su texto) cuenta una vez
+    for i in range(0, len(REGISTROS), 2):
+        filtro.filtrar(REGISTROS[i:i + 2])
+    filtro.filtrar(REGISTROS[2:3])
+    with caplog.at_level(logging.INFO, logger="boletines"):
+        filtro.avisar()
+    
+    assert caplog.messages == esperados
+    assert "📊 Filtro ayudas: 4 docs" in esperados and any(m.startswith("  ✓") for m in esperados)
+
+CORPUS_PYMES = [
+    {'Boletín': 'BOJA', 'Título': 'Ayudas a las pymes del comercio', 'Enlace': 'https://p/1'},
+    {'Boletín': 'BOJA', 'Título': 'Ayudas a la micropyme rural', 'Enlace': 'https://p/2'},
+    {'Boletín': 'BOE', 'Título': 'Subvenciones para autónomos', 'Enlace': 'https://p/3'},
+    {'Boletín': 'BOE', 'Título': 'Convocatoria de ayudas a la industria', 'Enlace': 'https://p/4', 'Contenido_Completo': 'Dirigidas a la pequeña empresa'},
+    {'Boletín': 'BOE', 'Título': 'Nombramiento de personal de la pyme pública', 'Enlace': 'https://p/5'},
+]
+
+@pytest.mark.parametrize("busqueda_exacta", [True, False])
+def test_indice_local_como_filtrar_resultados(tmp_path, monkeypatch, busqueda_exacta):
+    indice = IndiceDocumentos(str(tmp_path / "documentos.sqlite"))
+    monkeypatch.setattr(filtrado, 'indice_documentos', indice)
+    indice.guardar(CORPUS_PYMES)
+    df = pd.DataFrame(CORPUS_PYMES).fillna({'Contenido_Completo': ''}).assign(Resumen='')
+    
+    en_memoria = set(filtrar_resultados(df, ["pyme"], busqueda_exacta=busqueda_exacta)['Enlace'])
+    en_indice = set(filtrar_indice_local(["pyme"], busqueda_exacta=busqueda_exacta)['Enlace'])
+    
+    if busqueda_exacta:
+        assert en_indice == en_memoria == {'https://p/4'}
+    else:
+        # El índice busca por comienzo de palabra: 'micropyme' solo aparece en memoria
+        assert en_memoria == {'https://p/1', 'https://p/2', 'https://p/3', 'https://p/4'}
+        assert en_indice == en_memoria - {'https://p/2'}
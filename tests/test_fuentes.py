@@ -0,0 +1,193 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from boletines import fuentes, red
+from boletines.config import PDF_MARGEN_CAMPO, URL_BOE, URL_BOJA
+from boletines.filtrado import Prefiltro
+from boletines.fuentes import BoletinNoDisponible, completar_contenidos, extraer_contenido_completo, iterar_completados, localizar_boletin, sumario_boe
+from boletines.indices import IndiceBoletines, IndiceDocumentos, indice_documentos
+
+# ============= DESCARGA DE CONTENIDO =============
+
+CUANTIA_PDF = "2.500.000,00 euros"
+
+@pytest.fixture
+def pdfs_leidos(monkeypatch):
+    """URL de los PDF que se leen"""
+    leidos = []
+    texto_de_pdf = fuentes.texto_de_pdf
+    
+    def texto_de_pdf_contando(url, *args):
+        leidos.append(url)
+        return texto_de_pdf(url, *args)
+    
+    monkeypatch.setattr(fuentes, 'texto_de_pdf', texto_de_pdf_contando)
+    return leidos
+
+def test_pdf_solo_si_el_prefiltro_da_por_buena_la_disposicion(servidor, pdfs_leidos):
+    # HTML largo sin cuantía ni plazo; su PDF de una página los tiene
+    url = f"{URL_BOJA}/boja/2024/006/1004"
+    sin_pdf = extraer_contenido_completo(url)
+    assert pdfs_leidos == [] and CUANTIA_PDF not in sin_pdf
+    
+    con_pdf = extraer_contenido_completo(url, leer_pdf=True)
+    assert pdfs_leidos == [f"{URL_BOJA}/eboja/2024/6/BOJA24-006-01004.pdf"]
+    # Del PDF solo los campos que faltaban, con su margen
+    assert con_pdf.startswith(sin_pdf) and CUANTIA_PDF in con_pdf
+    assert len(con_pdf) - len(sin_pdf) < 3 * (2 * PDF_MARGEN_CAMPO + 200)
+    
+    # Con todos los campos ya en el HTML no hace falta el PDF
+    servidor.corpus.añadir("/boja/2024/006/9002", (
+        "<html><body><h1>Orden por la que se convocan ayudas a pymes</h1><p>" + "Texto de la orden. " * 30 + "</p>"
+        "<p>Cuantía máxima: 60.000,00 euros. Plazo de presentación de solicitudes: veinte días hábiles."
+        " Podrán ser beneficiarias las pequeñas y medianas empresas andaluzas.</p>"
+        "<a href='/eboja/2024/6/BOJA24-006-01004.pdf'>Descargar PDF</a></body></html>"
+    ))
+    assert CUANTIA_PDF not in extraer_contenido_completo(f"{URL_BOJA}/boja/2024/006/9002", leer_pdf=True)
+    assert len(pdfs_leidos) == 1
+
+def test_pdf_con_html_corto(servidor, pdfs_leidos):
+    servidor.corpus.añadir("/boja/2024/006/9004", (
+        "<html><body><h1>Extracto de la convocatoria</h1>"
+        "<a href='/eboja/2024/6/BOJA24-006-01004.pdf'>Descargar PDF</a></body></html>"
+    ))
+    texto = extraer_contenido_completo(f"{URL_BOJA}/boja/2024/006/9004")
+    
+    assert pdfs_leidos == [f"{URL_BOJA}/eboja/2024/6/BOJA24-006-01004.pdf"]
+    assert CUANTIA_PDF in texto and "Página 1." in texto
+
+def test_completar_contenidos_lee_pdf_de_lo_que_pasa(servidor, pdfs_leidos):
+    # Los dos con HTML sin campos y PDF con ellos; solo el primero pasa el prefiltro
+    ayudas = {'Enlace': f"{URL_BOJA}/boja/2024/007/1003", 'Título': "Convocatoria de ayudas a pymes del sector turístico", 'Resumen': ""}
+    nombramiento = {'Enlace': f"{URL_BOJA}/boja/2024/007/1006", 'Título': "Resolución por la que se nombra personal funcionario", 'Resumen': ""}
+    completar_contenidos([ayudas, nombramiento], Prefiltro(["pyme"], politica='completa'))
+    
+    assert pdfs_leidos == [f"{URL_BOJA}/eboja/2024/7/BOJA24-007-01003.pdf"]
+    textos = indice_documentos.contenidos([ayudas['Enlace'], nombramiento['Enlace']])
+    assert CUANTIA_PDF in textos[ayudas['Enlace']] and CUANTIA_PDF not in textos[nombramiento['Enlace']]
+
+@pytest.mark.parametrize("politica, descargados", [
+    ('estricta', {'ayudas'}),
+    ('conservadora', {'ayudas', 'dudoso'}),
+    ('completa', {'ayudas', 'dudoso', 'nombramiento'}),
+])
+def test_politicas_del_prefiltro(servidor, pdfs_leidos, tmp_path, monkeypatch, politica, descargados):
+    monkeypatch.setattr(fuentes, 'indice_documentos', IndiceDocumentos(str(tmp_path / "documentos.sqlite")))
+    registros = {
+        'ayudas': {'Enlace': f"{URL_BOJA}/boja/2024/007/1003", 'Título': "Convocatoria de ayudas a pymes del sector turístico", 'Resumen': ""},
+        'dudoso': {'Enlace': f"{URL_BOJA}/boja/2024/007/1004", 'Título': "Orden por la que se aprueban las bases reguladoras", 'Resumen': ""},
+        'nombramiento': {'Enlace': f"{URL_BOJA}/boja/2024/007/1006", 'Título': "Resolución por la que se nombra personal funcionario", 'Resumen': ""},
+    }
+    
+    completados = list(iterar_completados(list(registros.values()), Prefiltro(["pyme"], politica=politica)))
+    
+    # Se generan todos; solo se descargan los que pide la política
+    assert len(completados) == 3
+    assert {nombre for nombre, r in registros.items() if r.get('Longitud_Contenido')} == descargados
+    # El PDF solo se lee de lo que ya pasa el prefiltro, sea cual sea la política
+    assert pdfs_leidos == [f"{URL_BOJA}/eboja/2024/7/BOJA24-007-01003.pdf"]
+
+# ============= LOCALIZAR BOLETÍN =============
+
+@pytest.fixture
+def sondeos(servidor, cache_vacia, tmp_path, monkeypatch):
+    """Números sondeados, con un índice de boletines vacío y sin caché HTTP"""
+    monkeypatch.setattr(fuentes, 'indice_boletines', IndiceBoletines(str(tmp_path / "boletines.sqlite")))
+    numeros = []
+    sondear = fuentes.sondear_boletin
+    
+    def sondear_contando(año, num_boletin, revalidar=False):
+        numeros.append(num_boletin)
+        return sondear(año, num_boletin, revalidar)
+    
+    monkeypatch.setattr(fuentes, 'sondear_boletin', sondear_contando)
+    return numeros
+
+def test_localizar_boletin_por_interpolacion(servidor, sondeos):
+    # En el corpus el BOJA 10 es el del lunes 15 de enero: la interpolación acierta a la primera
+    assert localizar_boletin(2024, datetime(2024, 1, 15)) == (10, 'boja')
+    assert sondeos == [10] and servidor.stats['peticiones'] == 1
+    
+    # La segunda vez sale del índice, sin sondear
+    assert localizar_boletin(2024, datetime(2024, 1, 15)) == (10, 'boja')
+    assert sondeos == [10] and servidor.stats['peticiones'] == 1
+
+def test_localizar_boletin_bisecta(servidor, sondeos):
+    # La interpolación se queda en el 3 sin reducir el rango a la mitad: el siguiente sondeo
+    # es la mitad del rango (127, aún no publicado) y después vuelve a interpolar
+    assert localizar_boletin(2024, datetime(2024, 1, 5)) == (4, 'boja')
+    assert sondeos == [3, 127, 4]
+    # El 127 no existe en ninguna de las dos variantes
+    assert servidor.stats['peticiones'] == 4 and servidor.stats['no_encontradas'] == 2
+
+def test_localizar_boletin_dia_sin_boletin(servidor, sondeos):
+    # 28/01/2024 es domingo: los boletines del viernes y del lunes son consecutivos
+    assert localizar_boletin(2024, datetime(2024, 1, 28)) is None
+    assert sondeos == [19, 135, 20]
+    assert fuentes.indice_boletines.vecinos(datetime(2024, 1, 28)) == (19, 20)
+    assert servidor.stats['peticiones'] == 4
+
+def test_localizar_boletin_sin_respuesta(servidor, sondeos, monkeypatch):
+    monkeypatch.setattr(red, "REINTENTOS", 0)
+    servidor.errores = 1.0
+    with pytest.raises(BoletinNoDisponible):
+        localizar_boletin(2024, datetime(2024, 1, 15))
+    # Un fallo no acota el rango ni se toma por boletín inexistente
+    assert sondeos == [10]
+    assert fuentes.indice_boletines.vecinos(datetime(2024, 1, 15)) == (None, None)
+
+def test_fecha_del_boletin_sale_de_su_cabecera(servidor, sondeos):
+    # Un menú y un cuadro de noticias con fechas anteriores a la del boletín
+    servidor.corpus.añadir("/boja/2024/200/", (
+        '<html><body><header><nav><a href="/">Inicio</a> Actualizado el 2 de enero de 2024</nav></header>'
+        '<div class="noticias"><p>Jornada del 5 de enero de 2024</p></div>'
+        '<main><h1>BOJA número 200</h1><p class="fecha">Publicado el 15 de octubre de 2024</p>'
+        '<ul><li><a href="/boja/2024/200/s1">Orden de 12 de enero de 2024</a></li></ul></main></body></html>'
+    ))
+    assert fuentes.sondear_boletin(2024, 200) == (datetime(2024, 10, 15), 'boja')
+
+def test_etapas_de_los_dias_en_curso(servidor, sondeos):
+    etapas = fuentes._EtapasDias()
+    lunes, martes = datetime(2024, 1, 15), datetime(2024, 1, 16)
+    etapas.para(martes).text("    🔍 Probando BOJA 11 (rango 1-250)...")
+    
+    assert fuentes.encontrar_boletin_por_fecha(2024, lunes, progress_detail=etapas.para(lunes))
+    # La última etapa de cada día, por fecha
+    assert etapas.resumen() == "15/01/2024 ✅ ENCONTRADO! BOJA 10 · 16/01/2024 🔍 Probando BOJA 11 (rango 1-250)..."
+    etapas.terminar(lunes)
+    assert etapas.resumen() == "16/01/2024 🔍 Probando BOJA 11 (rango 1-250)..."
+
+def test_feed_no_fija_fechas_de_boletin(servidor, sondeos):
+    # El feed trae los documentos del BOJA 24; su fecha no se guarda como la del boletín
+    assert fuentes.buscar_boja_feed()
+    assert fuentes.indice_boletines.obtener(2024, 24) is None
+    
+    # La fecha sale de la página del boletín al sondearlo
+    assert localizar_boletin(2024, datetime(2024, 2, 2)) == (24, 'boja')
+    assert fuentes.indice_boletines.obtener(2024, 24) == (datetime(2024, 2, 2), 'boja')
+
+# ============= BOE =============
+
+def test_sumario_boe_de_la_api(servidor):
+    registros = sumario_boe(datetime(2024, 1, 15), revalidar=True)
+    
+    assert [r['Enlace'] for r in registros] == [
+        f"{URL_BOE}/diario_boe/txt.php?id={identificador}"
+        for identificador in ("BOE-A-2024-701", "BOE-A-2024-745", "BOE-A-2024-746", "BOE-B-2024-1523")
+    ]
+    orden, ayudas, convenio, extracto = registros
+    assert orden['Título'].startswith("Orden HAC/12/2024, de 10 de enero")
+    assert orden['Resumen'] == "BOE 13/2024 - I. Disposiciones generales - MINISTERIO DE HACIENDA"
+    assert ayudas['Enlace_PDF'] == f"{URL_BOE}/boe/dias/2024/01/15/pdfs/BOE-A-2024-745.pdf"
+    assert ayudas['Seccion'] == "III. Otras disposiciones" and ayudas['Numero_Boletin'] == 13
+    assert ayudas['Fecha'] == pd.Timestamp(2024, 1, 15)
+    assert '"Industria Conectada 4.0"' in convenio['Título']
+    # En la sección V los items van directamente en el departamento, sin epígrafe
+    assert extracto['Resumen'].endswith("MINISTERIO DE AGRICULTURA, PESCA Y ALIMENTACIÓN")
+    # El PDF del sumario completo (sumario_diario) no es una disposición
+    assert not any("BOE-S-" in r['Enlace'] for r in registros)
+
+def test_sumario_boe_dia_sin_boe(servidor):
+    assert sumario_boe(datetime(2024, 1, 14), revalidar=True) == []
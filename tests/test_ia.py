@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("openai")
+
+from benchmarks.servidor_ia import ServidorIA
+from boletines import ia
+
+@pytest.fixture
+def servidor(monkeypatch):
+    servidor = ServidorIA()
+    monkeypatch.setenv("OPENAI_BASE_URL", servidor.arrancar())
+    monkeypatch.setattr(ia, "_clientes", {})
+    yield servidor
+    servidor.parar()
+
+def textos(prefijo, n, largo=200):
+    return [f"{prefijo} {i} " + "ayuda para pymes " * (largo // 17) + f"fin {prefijo}-{i}" for i in range(n)]
+
+def test_lote_en_una_peticion_y_en_orden(servidor):
+    entrada = textos("orden", 5)
+    resumenes = ia.resumir_documentos(entrada, "sk-prueba")
+    
+    assert servidor.stats['peticiones'] == 1
+    assert [r["resumen"].split()[-1] for r in resumenes] == [f"orden-{i}" for i in range(5)]
+
+def test_resumenes_en_cache(servidor):
+    entrada = textos("cache", 3)
+    primera = ia.resumir_documentos(entrada, "sk-prueba")
+    peticiones = servidor.stats['peticiones']
+    
+    assert ia.resumir_documentos(entrada, "sk-prueba") == primera
+    assert servidor.stats['peticiones'] == peticiones
+
+def test_textos_largos_van_solos(servidor):
+    entrada = textos("largo", 3, largo=ia.IA_LOTE_CARACTERES)
+    resumenes = ia.resumir_documentos(entrada, "sk-prueba")
+    
+    assert servidor.stats['peticiones'] == 3
+    assert all(r["tipo"] == "ayuda" for r in resumenes)
+
+def test_lote_mal_formado_se_pide_por_documento(servidor, monkeypatch):
+    responder = ServidorIA.responder
+    
+    def lotes_cortados(contenido):
+        texto, documentos = responder(contenido)
+        return (texto[:len(texto) // 2] if documentos > 1 else texto), documentos
+    
+    monkeypatch.setattr(servidor, "responder", lotes_cortados)
+    entrada = textos("cortado", 4)
+    resumenes = ia.resumir_documentos(entrada, "sk-prueba")
+    
+    assert servidor.stats['peticiones'] == 1 + 4
+    assert [r["resumen"].split()[-1] for r in resumenes] == [f"cortado-{i}" for i in range(4)]
+
+def test_respuesta_truncada_no_rompe(servidor):
+    servidor.malformados = 1.0
+    entrada = textos("truncado", 3)
+    
+    assert ia.resumir_documentos(entrada, "sk-prueba") == [{}, {}, {}]
+    # El lote y después cada documento
+    assert servidor.stats['peticiones'] == 1 + 3
+    assert servidor.stats['malformados'] == 4
+
+def test_reintentos_en_429(servidor):
+    servidor.errores = 1.0
+    
+    assert ia.resumir_documentos(textos("429", 1), "sk-prueba") == [{}]
+    assert servidor.stats['peticiones'] == ia.REINTENTOS + 1
+
+def test_presupuesto_agotado(servidor):
+    resumenes = ia.resumir_documentos(textos("presupuesto", 2), "sk-prueba", presupuesto_tokens=10)
+    
+    assert resumenes == [{}, {}]
+    assert servidor.stats['peticiones'] == 0
+
+def test_busqueda_inteligente(servidor):
+    assert ia.busqueda_inteligente_openai("ayudas a pymes", "sk-prueba") == "ayudas a pymes"
+    assert servidor.stats['peticiones'] == 1
@@ -0,0 +1,141 @@
+from datetime import datetime
+
+import pandas as pd
+
+from boletines import fuentes, red
+from boletines.config import URL_BOJA
+from boletines.filtrado import textos_documentos
+from boletines.indices import DiarioRecorridos, IndiceDocumentos, diario_recorridos
+
+# ============= DIARIO DE RECORRIDOS =============
+
+def test_diario_guarda_y_lee(tmp_path):
+    diario = DiarioRecorridos(str(tmp_path / "recorridos.sqlite"))
+    assert diario.leer("boja/2024/020") is None
+    
+    diario.guardar("boja/2024/020", [{'Título': 'Orden', 'Fecha': pd.Timestamp(2024, 1, 30)}])
+    diario.guardar("boja/dia/2024-01-28", [])
+    
+    assert diario.leer("boja/2024/020") == [{'Título': 'Orden', 'Fecha': '2024-01-30 00:00:00'}]
+    # Un día sin boletín está terminado aunque no tenga registros
+    assert diario.leer("boja/dia/2024-01-28") == []
+
+def test_diario_terminadas_y_borrar(tmp_path):
+    diario = DiarioRecorridos(str(tmp_path / "recorridos.sqlite"))
+    for n in range(1, 701):
+        diario.guardar(f"boja/2024/{n:03d}", [])
+    diario.guardar("boe/20240102", [])
+    
+    claves = [f"boja/2024/{n:03d}" for n in range(600, 801)]
+    assert diario.terminadas(claves) == {f"boja/2024/{n:03d}" for n in range(600, 701)}
+    
+    diario.borrar("boja/")
+    assert diario.terminadas(["boja/2024/001", "boe/20240102"]) == {"boe/20240102"}
+
+def test_boletin_recorrido_se_lee_del_diario(servidor):
+    diario_recorridos.borrar("boja/2024/022")
+    fecha = pd.Timestamp(fuentes.sondear_boletin(2024, 22)[0])
+    primera = fuentes.buscar_en_boletin_completo(2024, 22, fecha)
+    assert primera and diario_recorridos.leer("boja/2024/022") is not None
+    
+    # Sin caché HTTP, el segundo recorrido tampoco pide nada al servidor
+    with red.cache_http.lock:
+        red.cache_http.conn.execute("DELETE FROM respuestas")
+        red.cache_http.conn.commit()
+    servidor.stats['peticiones'] = 0
+    segunda = fuentes.buscar_en_boletin_completo(2024, 22, fecha)
+    
+    assert servidor.stats['peticiones'] == 0
+    assert [d['Enlace'] for d in segunda] == [d['Enlace'] for d in primera]
+    assert all(d['Fecha'] == fecha for d in segunda)
+
+def test_seccion_vacia_no_se_da_por_terminada(servidor, cache_vacia):
+    # La sección se publica primero sin disposiciones y después con ellas
+    ruta = "/boja/2024/023/s9"
+    url = f"{URL_BOJA}{ruta}"
+    servidor.corpus.añadir(ruta, "<html><body><h2>Sección 9</h2></body></html>")
+    assert fuentes.extraer_documentos_de_seccion(url) == []
+    assert diario_recorridos.leer(url) is None
+    
+    servidor.corpus.añadir(ruta, '<html><body><h2>Sección 9</h2><a href="/boja/2024/023/9001">Orden de convocatoria de ayudas</a></body></html>')
+    # La página vacía ya se descargó publicada del todo: la caché la daría por definitiva
+    with red.cache_http.lock:
+        red.cache_http.conn.execute("DELETE FROM respuestas")
+        red.cache_http.conn.commit()
+    documentos = fuentes.extraer_documentos_de_seccion(url)
+    assert documentos == [{'titulo': "Orden de convocatoria de ayudas", 'url': f"{URL_BOJA}/boja/2024/023/9001"}]
+    assert diario_recorridos.leer(url) == documentos
+
+def test_boletin_y_sumario_recientes_no_se_anotan(servidor, tmp_path, monkeypatch):
+    diario = DiarioRecorridos(str(tmp_path / "recorridos.sqlite"))
+    monkeypatch.setattr(fuentes, 'diario_recorridos', diario)
+    fecha = pd.Timestamp(fuentes.sondear_boletin(2024, 6)[0])
+    seccion = f"{URL_BOJA}/boja/2024/006/s1"
+    
+    # Con un plazo que aún no ha pasado, el boletín y el sumario se leen pero pueden cambiar
+    monkeypatch.setattr(red, "DIAS_DEFINITIVO", 100_000)
+    assert fuentes.buscar_en_boletin_completo(2024, 6, fecha)
+    assert fuentes.sumario_boe(datetime(2024, 1, 15))
+    assert diario.terminadas(["boja/2024/006", seccion, "boe/2024-01-15"]) == set()
+    
+    monkeypatch.setattr(red, "DIAS_DEFINITIVO", 3)
+    registros = fuentes.buscar_en_boletin_completo(2024, 6, fecha)
+    fuentes.sumario_boe(datetime(2024, 1, 15))
+    assert diario.terminadas(["boja/2024/006", seccion, "boe/2024-01-15"]) == {"boja/2024/006", seccion, "boe/2024-01-15"}
+    assert len(diario.leer("boja/2024/006")) == len(registros)
+
+def test_dia_sin_boletin_solo_con_respuesta_cierta(servidor, monkeypatch):
+    # 28/01/2024 es domingo: con el servidor caído no se anota; con respuesta, sí
+    diario_recorridos.borrar("boja/dia/2024-01-28")
+    monkeypatch.setattr(red, "REINTENTOS", 0)
+    servidor.errores = 1.0
+    assert fuentes.encontrar_boletin_por_fecha(2024, datetime(2024, 1, 28)) == []
+    assert diario_recorridos.leer("boja/dia/2024-01-28") is None
+    
+    servidor.errores = 0.0
+    assert fuentes.encontrar_boletin_por_fecha(2024, datetime(2024, 1, 28)) == []
+    assert diario_recorridos.leer("boja/dia/2024-01-28") == []
+
+# ============= TEXTO COMPLETO EN EL ÍNDICE =============
+
+def _documentos(n):
+    return [{'Boletín': 'BOJA', 'Título': f"Orden {i}", 'Resumen': "", 'Enlace': f"https://t/{i}",
+             'Contenido_Completo': f"Texto de la orden {i}. " * (i % 3)} for i in range(n)]
+
+def test_contenidos_por_tramos_en_orden(tmp_path, monkeypatch):
+    indice = IndiceDocumentos(str(tmp_path / "documentos.sqlite"))
+    documentos = _documentos(1200)
+    indice.guardar(documentos)
+    
+    # Sin contenido no se guarda texto ni se borra el que había
+    indice.guardar([dict(documentos[1], Contenido_Completo="")])
+    
+    leidos = []
+    contenidos = indice.contenidos
+    monkeypatch.setattr(indice, 'contenidos', lambda enlaces: leidos.append(len(enlaces)) or contenidos(enlaces))
+    
+    # Enlaces repetidos, ausentes o vacíos dan '' en su posición
+    enlaces = [d['Enlace'] for d in documentos] + ["https://t/no", None, float('nan'), "https://t/1"]
+    textos = list(indice.iterar_contenidos(enlaces, tramo=100))
+    assert textos == [d['Contenido_Completo'] for d in documentos] + ['', '', '', documentos[1]['Contenido_Completo']]
+    assert max(leidos) <= 100
+    
+    # Más enlaces que parámetros admite una consulta de SQLite
+    assert indice.longitudes(enlaces) == {d['Enlace']: len(d['Contenido_Completo']) for d in documentos if d['Contenido_Completo']}
+
+def test_los_registros_llevan_longitud_y_el_texto_sale_del_indice(tmp_path, monkeypatch):
+    import boletines.filtrado
+    
+    indice = IndiceDocumentos(str(tmp_path / "documentos.sqlite"))
+    monkeypatch.setattr(boletines.filtrado, 'indice_documentos', indice)
+    documentos = _documentos(6)
+    indice.guardar(documentos)
+    
+    df = indice.consultar()
+    assert 'Contenido_Completo' not in df.columns
+    assert list(df['Longitud_Contenido']) == [len(d['Contenido_Completo']) for d in documentos]
+    assert list(df['Tiene_Contenido']) == [bool(d['Contenido_Completo']) for d in documentos]
+    
+    # El filtrado lee del índice el texto de las filas con longitud, igual que si viniera en columna
+    en_columna = df.assign(Contenido_Completo=[d['Contenido_Completo'] for d in documentos])
+    assert list(textos_documentos(df)) == list(textos_documentos(en_columna))
@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import pytest
+
+from boletines import fuentes, ingesta
+from boletines.config import INTENTOS_BOLETIN_VACIO
+from boletines.indices import marcas_ingesta
+
+def hoy(mes, dia):
+    """datetime con now() fijo en el día indicado de 2024"""
+    class Fijo(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2024, mes, dia, 9, 0)
+    return Fijo
+
+def marca(fuente, **valores):
+    """Fija la marca de la fuente durante la prueba"""
+    anterior = marcas_ingesta.leer(fuente)
+    marcas_ingesta.guardar(fuente, valores)
+    yield
+    if anterior:
+        marcas_ingesta.guardar(fuente, anterior)
+
+@pytest.fixture
+def marca_boe():
+    yield from marca('boe', fecha='2024-01-13', inicio='2024-01-13', contenido_hasta=None)
+
+@pytest.fixture
+def marca_boja(monkeypatch):
+    # Último boletín ingerido, el BOJA 22 (31 de enero); en el corpus quedan el 23 y el 24
+    monkeypatch.setattr(ingesta, 'datetime', hoy(2, 2))
+    yield from marca('boja', anio=2024, numero=22, fecha='2024-01-31', inicio='2024-01-02', contenido_hasta='2024-01-31')
+
+# ============= BOJA =============
+
+def test_ingerir_boja_avanza_contenido_hasta(servidor, marca_boja):
+    assert ingesta.ingerir_boja(contenido_completo=True) == 72
+    
+    leida = marcas_ingesta.leer('boja')
+    assert (leida['numero'], leida['fecha'], leida['contenido_hasta']) == (24, '2024-02-02', '2024-02-02')
+    assert ingesta.cobertura('boja')[2].isoformat() == '2024-02-02'
+
+def test_ingerir_boja_sin_contenido_no_avanza_contenido_hasta(servidor, marca_boja):
+    assert ingesta.ingerir_boja() == 72
+    
+    leida = marcas_ingesta.leer('boja')
+    assert (leida['fecha'], leida['contenido_hasta']) == ('2024-02-02', '2024-01-31')
+
+def test_boletin_vacio_se_salta_tras_los_intentos(servidor, marca_boja, monkeypatch):
+    monkeypatch.setattr(fuentes, 'buscar_en_boletin_completo', lambda *args, **kwargs: [])
+    
+    for intento in range(1, INTENTOS_BOLETIN_VACIO):
+        assert ingesta.ingerir_boja(contenido_completo=True) == 0
+        leida = marcas_ingesta.leer('boja')
+        assert (leida['numero'], leida['vacio']) == (22, ['2024/023', intento])
+    
+    # En la última pasada el 23 se salta y el 24, también vacío, empieza sus intentos
+    assert ingesta.ingerir_boja(contenido_completo=True) == 0
+    leida = marcas_ingesta.leer('boja')
+    assert (leida['numero'], leida['fecha'], leida['vacio']) == (23, '2024-02-01', ['2024/024', 1])
+    # El boletín saltado queda sin texto: contenido_hasta no lo cubre
+    assert leida['contenido_hasta'] == '2024-01-31'
+
+def test_main_con_cada_no_sigue_tras_vigilar(monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(ingesta, 'vigilar', lambda intervalo, **opciones: llamadas.append(intervalo))
+    monkeypatch.setattr(ingesta, 'ingerir', lambda **opciones: pytest.fail("ingerir tras vigilar"))
+    
+    ingesta.main(["--cada", "60"])
+    assert llamadas == [60]
+
+# ============= BOE =============
+
+def test_ingerir_boe_pasa_el_dia_sin_boe(servidor, marca_boe, monkeypatch):
+    monkeypatch.setattr(ingesta, 'datetime', hoy(1, 15))
+    
+    # El domingo 14 no hay BOE (404) y la marca lo pasa hasta el sumario del 15
+    assert ingesta.ingerir_boe() == 4
+    assert marcas_ingesta.leer('boe')['fecha'] == '2024-01-15'
+    assert servidor.stats['no_encontradas'] == 0
+
+def test_ingerir_boe_hoy_sin_sumario_no_avanza(servidor, marca_boe, monkeypatch):
+    monkeypatch.setattr(ingesta, 'datetime', hoy(1, 14))
+    
+    # Un día sin sumario solo cuenta cuando ya ha pasado: hoy puede estar aún sin publicar
+    assert ingesta.ingerir_boe() == 0
+    assert marcas_ingesta.leer('boe')['fecha'] == '2024-01-13'
@@ -0,0 +1,40 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from boletines import pdf
+from boletines.extraccion import PATRONES_CAMPOS
+from boletines.pdf import texto_pdf
+
+@pytest.fixture
+def pdfs(servidor):
+    """PDF del corpus: campos en la página 2 de 12 y 40 páginas sin campos"""
+    return {
+        'campos': servidor.corpus.leer("/eboja/2024/6/BOJA24-006-01002.pdf")[2],
+        'largo': servidor.corpus.leer("/eboja/2024/6/BOJA24-006-01003.pdf")[2],
+    }
+
+def test_lectura_se_para_con_los_campos(pdfs):
+    texto = texto_pdf(pdfs['campos'], PATRONES_CAMPOS)
+    
+    assert all(patron.search(texto) for patron in PATRONES_CAMPOS)
+    assert "Página 2." in texto and "Página 3." not in texto
+    # Sin patrones de parada se lee entero
+    assert "Página 12." in texto_pdf(pdfs['campos'])
+
+def test_lectura_sin_campos_hasta_el_limite(pdfs):
+    assert "Página 40." in texto_pdf(pdfs['largo'], PATRONES_CAMPOS)
+    
+    texto = texto_pdf(pdfs['largo'], PATRONES_CAMPOS, max_paginas=5)
+    assert "Página 5." in texto and "Página 6." not in texto
+
+def test_lectura_se_para_al_pasar_el_plazo(pdfs, monkeypatch):
+    # Reloj que avanza un segundo en cada consulta: una antes de empezar y otra por página
+    reloj = itertools.count()
+    monkeypatch.setattr(pdf, 'time', SimpleNamespace(time=lambda: next(reloj)))
+    
+    texto = texto_pdf(pdfs['largo'], PATRONES_CAMPOS, hasta=3)
+    assert "Página 3." in texto and "Página 4." not in texto
+    # Una tarea que empieza con el plazo ya vencido no abre el PDF
+    assert texto_pdf(pdfs['largo'], hasta=0) == ""
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from boletines import ranking
+from boletines.filtrado import normalizar_texto
+from boletines.ranking import IndiceBM25, busqueda_inteligente, ordenar_por_relevancia, tokenizar
+
+TEXTOS = [
+    "Ayudas al turismo rural en la provincia de Jaén",
+    "Subvenciones a la pequeña empresa del sector turístico con fondos FEDER",
+    "Nombramiento de personal funcionario",
+    "Ayudas a la hostelería y al turismo: turismo de interior",
+    "Convocatoria de ayudas a la agricultura ecológica",
+]
+
+def indice():
+    return IndiceBM25([normalizar_texto(t) for t in TEXTOS])
+
+def test_tokenizar_sin_palabras_vacias():
+    assert tokenizar("ayudas para las pymes de la seccion 3") == ["ayudas", "pymes", "seccion", "3"]
+
+def test_bm25_ordena_por_frecuencia_y_rareza():
+    mejores = indice().mejores("turismo", expandir=False)
+    
+    assert [fila for fila, _ in mejores] == [3, 0]
+    assert mejores[0][1] > mejores[1][1] > 0
+
+def test_bm25_termino_raro_pesa_mas():
+    bm25 = indice()
+    comun = bm25.puntuar({"ayudas": 1.0})
+    raro = bm25.puntuar({"jaen": 1.0})
+    
+    assert raro[0] > comun[0]
+    assert comun[2] == 0 and raro[1] == 0
+
+def test_bm25_expansion_con_sinonimos():
+    pesos = indice().expandir("pyme")
+    
+    assert pesos["pyme"] == 1.0
+    assert 0 < pesos["autonomo"] < 1.0
+    assert 1 in [fila for fila, _ in indice().mejores("pyme")]
+
+def test_busqueda_inteligente_empieza_por_la_consulta():
+    palabras = busqueda_inteligente("turismo rural", indice())
+    
+    assert palabras[:2] == ["turismo", "rural"]
+    assert "hosteleria" in palabras
+
+def test_bm25_sin_documentos_ni_coincidencias():
+    assert IndiceBM25([]).mejores("turismo") == []
+    assert indice().mejores("astronomia") == []
+
+def test_ordenar_usa_el_indice_dado(monkeypatch):
+    df = pd.DataFrame({'Título': TEXTOS, 'Resumen': '', 'Fecha': pd.NaT})
+    monkeypatch.setattr(ranking, 'indexar', lambda df: pytest.fail("el índice ya estaba construido"))
+    
+    assert list(ordenar_por_relevancia(df, "turismo", indice=indice())['Título'][:2]) == [TEXTOS[3], TEXTOS[0]]
+    
+    # Un índice dado que se evalúa como falso (como uno sin documentos) tampoco se reconstruye
+    class IndiceFalso(IndiceBM25):
+        def __bool__(self):
+            return False
+    
+    falso = IndiceFalso([normalizar_texto(t) for t in TEXTOS])
+    assert list(ordenar_por_relevancia(df, "turismo", indice=falso)['Título'][:2]) == [TEXTOS[3], TEXTOS[0]]
@@ -0,0 +1,234 @@
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from boletines import alertas, fuentes, red
+from boletines.metricas import metricas
+from boletines.config import MAX_POR_HOST, URL_BOE, URL_BOJA
+
+# ============= CACHÉ HTTP =============
+
+def test_pagina_de_boletin_se_sirve_de_cache(servidor, cache_vacia):
+    url = f"{URL_BOJA}/boja/2024/020/"
+    primera = red.session.get(url, timeout=5)
+    segunda = red.session.get(url, timeout=5)
+    
+    assert servidor.stats['peticiones'] == 1
+    assert not getattr(primera, 'from_cache', False) and segunda.from_cache
+    assert segunda.status_code == 200 and segunda.text == primera.text
+
+def test_boletin_reciente_caduca_y_sin_cache_va_al_servidor(servidor, cache_vacia, monkeypatch):
+    # Sumario de hoy: puede estar publicándose, se guarda solo CACHE_TTL_BOLETINES
+    hoy = datetime.now().strftime('%Y%m%d')
+    servidor.corpus.añadir(f"/datosabiertos/api/boe/sumario/{hoy}", "<response/>", "application/xml")
+    url = f"{URL_BOE}/datosabiertos/api/boe/sumario/{hoy}"
+    red.session.get(url, timeout=5)
+    assert red.session.get(url, timeout=5).from_cache
+    assert servidor.stats['peticiones'] == 1
+    
+    red.session.get(url, timeout=5, headers={'Cache-Control': 'no-cache'})
+    assert servidor.stats['peticiones'] == 2
+    
+    monkeypatch.setattr(red, "CACHE_TTL_BOLETINES", 0)
+    assert not getattr(red.session.get(url, timeout=5), 'from_cache', False)
+    assert servidor.stats['peticiones'] == 3
+
+def test_copia_de_un_boletin_recien_publicado_no_es_definitiva(servidor, cache_vacia):
+    # Descargado el mismo día de su publicación, el BOJA 20 no se da por definitivo aunque hoy sí lo sea
+    url = f"{URL_BOJA}/boja/2024/020/"
+    fecha, _ = fuentes.sondear_boletin(2024, 20)
+    assert red.fecha_publicacion(url) == fecha
+    red.session.get(url, timeout=5)
+    with red.cache_http.lock:
+        red.cache_http.conn.execute("UPDATE respuestas SET guardado = ? WHERE url = ?", ((fecha + timedelta(hours=9)).timestamp(), url))
+        red.cache_http.conn.commit()
+    
+    assert not getattr(red.session.get(url, timeout=5), 'from_cache', False)
+    assert red.session.get(url, timeout=5).from_cache
+    
+    # Un número aún sin fecha en el índice vale como del 31 de diciembre de su año
+    assert red.fecha_publicacion(f"{URL_BOJA}/boja/2024/240/s1") == datetime(2024, 12, 31)
+    assert red.fecha_publicacion(f"{URL_BOJA}/boja/distribucion/boja.xml") is None
+
+def test_no_encontrado_se_guarda_y_se_revalida(servidor, cache_vacia):
+    url = f"{URL_BOJA}/boja/2024/240/"
+    assert red.session.get(url, timeout=5).status_code == 404
+    assert red.session.get(url, timeout=5).status_code == 404
+    assert servidor.stats['peticiones'] == 1
+    
+    red.session.get(url, timeout=5, headers={'Cache-Control': 'no-cache'})
+    assert servidor.stats['peticiones'] == 2
+
+def test_feed_dentro_del_ttl_y_sin_cache(servidor, cache_vacia):
+    url = f"{URL_BOJA}/boja/distribucion/boja.xml"
+    red.session.get(url, timeout=5)
+    red.session.get(url, timeout=5)
+    assert servidor.stats['peticiones'] == 1
+    
+    red.session.get(url, timeout=5, headers={'Cache-Control': 'no-cache'})
+    assert servidor.stats['peticiones'] == 2
+
+def test_errores_no_se_guardan(servidor, cache_vacia):
+    servidor.errores = 1.0
+    url = f"{URL_BOJA}/boja/2024/021/"
+    assert red.session.get(url, timeout=5).status_code == 503
+    assert red.cache_http.leer(url) is None
+    
+    servidor.errores = 0.0
+    assert red.session.get(url, timeout=5).status_code == 200
+    assert red.cache_http.leer(url)['estado'] == 200
+
+# ============= LIMITACIÓN DE TASA =============
+
+def test_limitador_respeta_la_tasa():
+    limitador = red.LimitadorTasa(tasa=20.0)
+    inicio = time.monotonic()
+    for _ in range(5):
+        limitador.esperar()
+    # La primera ficha está disponible; las otras cuatro llegan a 20 por segundo
+    assert time.monotonic() - inicio >= 4 / 20 * 0.9
+
+def test_limitador_aumento_aditivo_y_reduccion_multiplicativa():
+    limitador = red.LimitadorTasa(tasa=4.0)
+    limitador.exito()
+    assert limitador.tasa == 4.0 + red.TASA_INCREMENTO
+    limitador.fallo()
+    assert limitador.tasa == (4.0 + red.TASA_INCREMENTO) / 2
+    for _ in range(10):
+        limitador.fallo()
+    assert limitador.tasa == red.TASA_MINIMA
+    for _ in range(1000):
+        limitador.exito()
+    assert limitador.tasa == red.TASA_MAXIMA
+
+def test_limitador_pausa_con_retry_after():
+    limitador = red.LimitadorTasa(tasa=red.TASA_MAXIMA)
+    limitador.fallo(retry_after=0.3)
+    inicio = time.monotonic()
+    limitador.esperar()
+    assert time.monotonic() - inicio >= 0.25
+
+def test_leer_retry_after():
+    def respuesta(valor):
+        response = requests.Response()
+        if valor is not None:
+            response.headers['Retry-After'] = valor
+        return response
+    
+    assert red.leer_retry_after(respuesta(None)) is None
+    assert red.leer_retry_after(respuesta("2")) == 2.0
+    assert red.leer_retry_after(respuesta("100000")) == red.MAX_RETRY_AFTER
+    assert red.leer_retry_after(respuesta("mañana")) is None
+    assert 5 <= red.leer_retry_after(respuesta(formatdate(time.time() + 10, usegmt=True))) <= 10
+
+# ============= DESCARGA CONCURRENTE =============
+
+def test_ejecutar_concurrente_conserva_el_orden():
+    def lento(n):
+        time.sleep(0.01 * (5 - n))
+        if n == 3:
+            raise ValueError(n)
+        return n * 10
+    
+    completados, avances = [], []
+    resultados = red.ejecutar_concurrente(lento, range(5), max_workers=5, por_defecto=-1,
+                                          progreso=lambda hechos, total: avances.append((hechos, total)),
+                                          al_completar=lambda i, r: completados.append(i))
+    
+    assert resultados == [0, 10, 20, -1, 40]
+    assert sorted(completados) == list(range(5)) and completados != list(range(5))
+    assert avances == [(i, 5) for i in range(1, 6)]
+
+def test_iterar_concurrente_segun_terminan():
+    orden = [i for i, _ in red.iterar_concurrente(lambda n: time.sleep(0.05 * n), [3, 1, 2], max_workers=3)]
+    assert orden == [1, 2, 0]
+
+def test_iterar_concurrente_cancela_lo_pendiente():
+    empezados = []
+    
+    def tarea(n):
+        empezados.append(n)
+        time.sleep(0.05)
+        return n
+    
+    generador = red.iterar_concurrente(tarea, range(20), max_workers=2)
+    next(generador)
+    generador.close()
+    time.sleep(0.2)
+    assert len(empezados) < 20
+
+def test_limite_de_peticiones_por_servidor(servidor, cache_vacia):
+    servidor.latencia = 0.2
+    red.configurar_descargas(2)
+    try:
+        inicio = time.monotonic()
+        paginas = red.ejecutar_concurrente(
+            lambda n: red.session.get(f"{URL_BOJA}/boja/2024/{n:03d}/", timeout=5).status_code, range(2, 8), max_workers=6
+        )
+        # Seis peticiones de 0,2 s, de dos en dos
+        assert time.monotonic() - inicio >= 0.55
+    finally:
+        red.configurar_descargas(MAX_POR_HOST)
+    assert paginas == [200] * 6
+
+# ============= REINTENTOS =============
+
+@pytest.fixture
+def servidor_503():
+    """Responde 503 a todo y cuenta las peticiones por método"""
+    peticiones = {'GET': 0, 'POST': 0}
+    
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def log_message(self, *args):
+            pass
+        
+        def responder(self):
+            peticiones[self.command] += 1
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        
+        do_GET = do_POST = responder
+    
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_port}", peticiones
+    servidor.shutdown()
+    servidor.server_close()
+
+def test_get_se_reintenta(servidor_503):
+    url, peticiones = servidor_503
+    red.limitador_host(url).tasa = red.TASA_MAXIMA
+    
+    assert red.session.get(f"{url}/pagina", timeout=5).status_code == 503
+    assert peticiones['GET'] == red.REINTENTOS + 1
+
+def test_webhook_se_envia_una_vez(servidor_503):
+    url, peticiones = servidor_503
+    
+    with pytest.raises(requests.HTTPError):
+        alertas.enviar_webhook(f"{url}/webhook", "pymes", [])
+    assert peticiones['POST'] == 1
+
+def test_reintentos_registrados_sin_respuesta(monkeypatch):
+    monkeypatch.setattr(red, "REINTENTOS", 2)
+    with socket.socket() as libre:
+        libre.bind(("127.0.0.1", 0))
+        url = f"http://127.0.0.1:{libre.getsockname()[1]}"
+    red.limitador_host(url).tasa = red.TASA_MAXIMA
+    
+    # Conexión rechazada: el GET agota sus reintentos y el POST se envía una sola vez
+    for metodo, reintentos in (("GET", 2), ("POST", 0)):
+        with pytest.raises(requests.ConnectionError):
+            red.session.request(metodo, f"{url}/pagina", timeout=5)
+        ultima = metricas.ultimas_peticiones()[-1]
+        assert (ultima['metodo'], ultima['estado'], ultima['reintentos']) == (metodo, 0, reintentos)